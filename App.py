@@ -1,15 +1,44 @@
 import streamlit as st
 import pandas as pd
-import json
-import gspread
-from oauth2client.service_account import ServiceAccountCredentials
-from datetime import datetime
-import plotly.express as px
-import plotly.graph_objects as go
-from typing import Optional, Dict, List, Any
-import io
-import base64
-from collections import Counter
+import numpy as np
+import os
+from datetime import datetime, timedelta, timezone
+from typing import Optional, Dict, List, Any, Callable
+from template_manager.analysis import ANALYSIS_CACHE_PATH_ENV_VAR, AnalysisCache, analyze_templates
+from template_manager.blobstore import (
+    CODE_HASH_COLUMN,
+    BlobStore,
+    code_search_mask,
+    content_hash,
+    dehydrate,
+    hydrate,
+    open_blob_store
+)
+from template_manager.core import (
+    ID_COLUMN,
+    code_length_series,
+    create_sample_data,
+    delete_templates,
+    ensure_template_ids,
+    export_to_csv,
+    export_to_json,
+    filter_templates,
+    format_code_for_display,
+    get_statistics,
+    import_from_json,
+    new_template_id,
+    search_mask,
+    set_category
+)
+from template_manager.credentials import CredentialsError, fingerprint, load_service_account, service_account_from_env
+from template_manager.facets import bits_from_mask, build_facet_index, mask_from_bits
+from template_manager.history import TemplateHistory, open_template_history
+from template_manager.merge import resolve_conflicts, snapshot_base
+from template_manager.perf import get_recorder
+from template_manager.similarity import SimilarityIndex
+from template_manager.sync import SyncError, fetch_templates, push_templates
+from template_manager.telemetry import SHEETS_QUOTA_PER_MINUTE, SyncLog, calls_per_minute, open_sync_log, quota_usage, summarize
+from template_manager.workbook import XLSX_MIME, check_cell_limits, export_to_xlsx, import_from_xlsx
 
 # Page configuration
 st.set_page_config(
@@ -153,9 +182,31 @@ st.markdown("""
 </style>
 """, unsafe_allow_html=True)
 
-# Google Sheets configuration
-GOOGLE_SHEETS_ID = "1eFZcnDoGT2NJHaEQSgxW5psN5kvlkYx1vtuXGRFTGTk"
-GOOGLE_SHEETS_SHEET_NAME = "demo_examples"
+# Gallery configuration
+GALLERY_PAGE_SIZE = 12
+SHEET_PAGE_SIZE = 25
+PREVIEW_CACHE_MAX_ENTRIES = 2048
+# Code bodies kept in memory per process, shared by every session
+BLOB_CACHE_MAX_ENTRIES = 4096
+SIMILAR_TEMPLATES_COUNT = 5
+
+# Instrumentation (process-wide, near-zero cost while disabled)
+perf = get_recorder()
+
+@st.cache_resource
+def get_template_history() -> TemplateHistory:
+    """One history per process, shared by every session writing the same file."""
+    return open_template_history()
+
+@st.cache_resource
+def get_sync_log() -> SyncLog:
+    """One sync log per process, shared by every session."""
+    return open_sync_log()
+
+@st.cache_resource
+def get_blob_store() -> BlobStore:
+    """One code blob store per process; sessions hold only CodeHash references."""
+    return open_blob_store(cache_size=BLOB_CACHE_MAX_ENTRIES)
 
 # Session state initialization
 def initialize_session_state():
@@ -163,22 +214,111 @@ def initialize_session_state():
         st.session_state.gsheet_credentials = None
     if 'templates_data' not in st.session_state:
         st.session_state.templates_data = None
+    if 'data_version' not in st.session_state:
+        st.session_state.data_version = 0
+    if 'derived_cache' not in st.session_state:
+        st.session_state.derived_cache = {}
     if 'last_sync' not in st.session_state:
         st.session_state.last_sync = None
+    if 'sync_base' not in st.session_state:
+        st.session_state.sync_base = None
+    if 'push_conflicts' not in st.session_state:
+        st.session_state.push_conflicts = None
+    if 'perf_lease' not in st.session_state:
+        st.session_state.perf_lease = None
     if 'selected_template' not in st.session_state:
         st.session_state.selected_template = None
-    if 'filter_category' not in st.session_state:
-        st.session_state.filter_category = "All"
     if 'search_query' not in st.session_state:
         st.session_state.search_query = ""
     if 'edit_mode' not in st.session_state:
         st.session_state.edit_mode = False
     if 'show_preview' not in st.session_state:
         st.session_state.show_preview = False
+    if 'sheet_limit' not in st.session_state:
+        st.session_state.sheet_limit = SHEET_PAGE_SIZE
+    if 'sheet_filter_key' not in st.session_state:
+        st.session_state.sheet_filter_key = None
+    if 'gallery_limit' not in st.session_state:
+        st.session_state.gallery_limit = GALLERY_PAGE_SIZE
+    if 'gallery_filter_key' not in st.session_state:
+        st.session_state.gallery_filter_key = None
+    if 'preview_cache' not in st.session_state:
+        st.session_state.preview_cache = {}
+    if 'template_history' not in st.session_state:
+        st.session_state.template_history = get_template_history()
+    if 'analysis_cache' not in st.session_state:
+        st.session_state.analysis_cache = AnalysisCache(os.environ.get(ANALYSIS_CACHE_PATH_ENV_VAR))
+    if 'similarity_index' not in st.session_state:
+        st.session_state.similarity_index = SimilarityIndex(blob_store=get_blob_store())
 
 initialize_session_state()
 
 # Utility Functions
+def set_templates_data(df: Optional[pd.DataFrame]):
+    """Replace the session's templates and invalidate derived data.
+
+    Code bodies go to the blob store; the session keeps CodeHash references.
+    """
+    st.session_state.templates_data = dehydrate(ensure_template_ids(df), get_blob_store()) if df is not None else None
+    mark_templates_changed()
+
+def template_code(template: pd.Series) -> str:
+    """Load a template's code body from the blob store."""
+    if CODE_HASH_COLUMN in template:
+        return get_blob_store().get(template[CODE_HASH_COLUMN])
+    return str(template.get('Code', ''))
+
+def has_code(df: pd.DataFrame) -> bool:
+    """Whether templates carry code, inline or as references."""
+    return CODE_HASH_COLUMN in df.columns or 'Code' in df.columns
+
+def with_code(df: pd.DataFrame) -> pd.DataFrame:
+    """A copy of templates with their code bodies loaded, for exports and pushes."""
+    return hydrate(df, get_blob_store())
+
+def save_template_code(idx: Any, code: str):
+    """Store a body and point a template at it."""
+    st.session_state.templates_data.at[idx, CODE_HASH_COLUMN] = get_blob_store().put(code)
+
+def mark_templates_changed():
+    """Invalidate derived data after templates_data was modified in place."""
+    st.session_state.data_version += 1
+    st.session_state.derived_cache = {}
+
+def cached_derived(name: str, compute: Callable[[], Any]) -> Any:
+    """Compute a value derived from templates_data once per data version."""
+    cache = st.session_state.derived_cache
+    if name not in cache:
+        cache[name] = compute()
+    return cache[name]
+
+def get_template_analysis() -> pd.DataFrame:
+    """Per-template analysis, re-analysing only bodies not already cached."""
+    return cached_derived(
+        'analysis',
+        lambda: analyze_templates(st.session_state.templates_data, st.session_state.analysis_cache, blob_store=get_blob_store())
+    )
+
+def get_similarity_index() -> SimilarityIndex:
+    """The similarity index, brought up to date with the current templates."""
+    def sync_index():
+        st.session_state.similarity_index.sync(st.session_state.templates_data)
+        return st.session_state.similarity_index
+    return cached_derived('similarity', sync_index)
+
+def get_code_lengths() -> pd.Series:
+    """Character count of every template's code, read from the store only for unseen bodies."""
+    def lengths():
+        df = st.session_state.templates_data
+        if CODE_HASH_COLUMN not in df.columns:
+            return code_length_series(df) if 'Code' in df.columns else pd.Series(0, index=df.index)
+        return df[CODE_HASH_COLUMN].map(get_blob_store().length)
+    return cached_derived('code_lengths', lengths)
+
+def get_template_statistics() -> Dict[str, Any]:
+    """Statistics for the current templates, once per data version."""
+    return cached_derived('stats', lambda: get_statistics(st.session_state.templates_data, get_code_lengths()))
+
 def fetch_google_sheets_data() -> Optional[pd.DataFrame]:
     """Fetch data from Google Sheets using credentials."""
     if not st.session_state.gsheet_credentials:
@@ -186,66 +326,117 @@ def fetch_google_sheets_data() -> Optional[pd.DataFrame]:
         return None
     
     try:
-        scope = [
-            'https://spreadsheets.google.com/feeds',
-            'https://www.googleapis.com/auth/drive'
-        ]
-        
-        creds = ServiceAccountCredentials.from_json_keyfile_dict(
-            st.session_state.gsheet_credentials,
-            scope
-        )
-        
-        client = gspread.authorize(creds)
-        sheet = client.open_by_key(GOOGLE_SHEETS_ID)
-        worksheet = sheet.worksheet(GOOGLE_SHEETS_SHEET_NAME)
-        
-        data = worksheet.get_all_records()
-        
-        if data:
-            df = pd.DataFrame(data)
-            st.session_state.last_sync = datetime.now()
-            return df
-        else:
-            return None
-    
-    except Exception as e:
-        st.error(f"Error fetching Google Sheets data: {str(e)}")
+        df = fetch_templates(st.session_state.gsheet_credentials, sync_log=get_sync_log())
+    except SyncError as e:
+        st.error(str(e))
         return None
+    
+    if df is not None:
+        st.session_state.last_sync = datetime.now()
+        # The base mirrors the sheet as fetched, before set_templates_data assigns local Ids
+        st.session_state.sync_base = snapshot_base(df)
+    return df
 
-def push_to_google_sheets(df: pd.DataFrame) -> bool:
-    """Push updated data back to Google Sheets."""
+def push_to_google_sheets(df: pd.DataFrame, force: bool = False) -> bool:
+    """Push updated data back to Google Sheets, merging concurrent sheet edits."""
     if not st.session_state.gsheet_credentials:
         st.error("No credentials found")
         return False
     
     try:
-        scope = [
-            'https://spreadsheets.google.com/feeds',
-            'https://www.googleapis.com/auth/drive'
-        ]
-        
-        creds = ServiceAccountCredentials.from_json_keyfile_dict(
+        result = push_templates(
             st.session_state.gsheet_credentials,
-            scope
+            with_code(df),
+            base=st.session_state.sync_base,
+            force=force,
+            sync_log=get_sync_log()
         )
-        
-        client = gspread.authorize(creds)
-        sheet = client.open_by_key(GOOGLE_SHEETS_ID)
-        worksheet = sheet.worksheet(GOOGLE_SHEETS_SHEET_NAME)
-        
-        # Clear existing data
-        worksheet.clear()
-        
-        # Update with new data
-        worksheet.update([df.columns.values.tolist()] + df.values.tolist())
-        
-        st.session_state.last_sync = datetime.now()
-        return True
+    except SyncError as e:
+        st.error(str(e))
+        return False
     
-    except Exception as e:
-        st.error(f"Error pushing to Google Sheets: {str(e)}")
+    if result['status'] == 'conflicts':
+        st.session_state.push_conflicts = result
+        st.warning(f"⚠️ {len(result['conflicts'])} conflicting edits must be resolved before pushing")
         return False
+    
+    st.session_state.push_conflicts = None
+    st.session_state.sync_base = result['base']
+    if result['remote_changes']:
+        set_templates_data(result['df'])
+        st.info(f"🔀 Merged {result['remote_changes']} changes made in Google Sheets")
+    st.session_state.last_sync = datetime.now()
+    return True
+
+def render_push_conflicts():
+    """Let the user resolve conflicts between local and remote edits."""
+    result = st.session_state.push_conflicts
+    
+    st.markdown("### ⚠️ Push Conflicts")
+    st.caption(
+        f"{len(result['conflicts'])} edits conflict with changes made in Google Sheets since your last sync. "
+        f"{result['remote_changes']} non-conflicting remote changes were merged automatically."
+    )
+    
+    kind_labels = {
+        'edit': "edited on both sides",
+        'add': "added on both sides",
+        'deleted_remotely': "edited here, deleted in Sheets",
+        'deleted_locally': "deleted here, edited in Sheets"
+    }
+    choices = {}
+    for item in result['conflicts']:
+        label = f"#{item['number']} · {item['field'] or 'row'} ({kind_labels[item['kind']]})"
+        with st.expander(label, expanded=len(result['conflicts']) <= 3):
+            col_local, col_remote = st.columns(2)
+            for col, title, value in [(col_local, "**Mine**", item['local']), (col_remote, "**Theirs (Sheets)**", item['remote'])]:
+                with col:
+                    st.markdown(title)
+                    if value is None:
+                        st.caption("Deleted")
+                    elif isinstance(value, dict):
+                        st.json(value, expanded=False)
+                    elif item['field'] == 'Code':
+                        st.code(format_code_for_display(value, max_lines=20), language='python')
+                    else:
+                        st.text(value)
+            choice = st.radio("Keep", ["Mine", "Theirs"], key=f"conflict_{item['id']}", horizontal=True)
+            choices[item['id']] = 'local' if choice == "Mine" else 'remote'
+    
+    col1, col2, col3 = st.columns(3)
+    with col1:
+        if st.button("✅ Resolve & Push", use_container_width=True):
+            resolved = resolve_conflicts(result, choices)
+            set_templates_data(resolved)
+            st.session_state.sync_base = result['remote_base']
+            st.session_state.push_conflicts = None
+            if push_to_google_sheets(resolved):
+                st.success("✅ Pushed!")
+                st.rerun()
+    with col2:
+        if st.button("⚠️ Overwrite Sheets with Mine", use_container_width=True):
+            if push_to_google_sheets(st.session_state.templates_data, force=True):
+                st.success("✅ Pushed!")
+                st.rerun()
+    with col3:
+        if st.button("❌ Cancel Push", use_container_width=True):
+            st.session_state.push_conflicts = None
+            st.rerun()
+    
+    st.markdown("---")
+
+def template_fields(title: Any, description: Any, category: Any) -> Dict[str, Any]:
+    """Non-code fields stored alongside each history revision."""
+    return {'Title': title, 'Description': description, 'Category': category}
+
+def record_template_revision(key: Any, code: Any, fields: Dict[str, Any], previous: Optional[pd.Series] = None):
+    """Record a revision, seeding the history with the previous version first."""
+    history = st.session_state.template_history
+    if previous is not None and not history.has_history(key):
+        history.record(key, template_code(previous), template_fields(
+            previous.get('Title', ''), previous.get('Description', ''), previous.get('Category', '')
+        ))
+    history.record(key, str(code), fields)
 
 def get_category_colors() -> Dict[str, str]:
     """Get color mapping for categories."""
@@ -260,82 +451,81 @@ def get_category_colors() -> Dict[str, str]:
         "Other": "#95a5a6"
     }
 
-def format_code_for_display(code: str, max_lines: int = 20) -> str:
-    """Format code for preview display."""
-    lines = code.split('\n')
-    if len(lines) > max_lines:
-        return '\n'.join(lines[:max_lines]) + f"\n\n... ({len(lines) - max_lines} more lines)"
-    return code
-
-def export_to_json(df: pd.DataFrame) -> str:
-    """Export DataFrame to JSON string."""
-    return df.to_json(orient='records', indent=2)
-
-def import_from_json(json_str: str) -> Optional[pd.DataFrame]:
-    """Import DataFrame from JSON string."""
-    try:
-        data = json.loads(json_str)
-        return pd.DataFrame(data)
-    except Exception as e:
-        st.error(f"Error parsing JSON: {str(e)}")
-        return None
+def get_code_preview(template: pd.Series, max_lines: int) -> str:
+    """Return a cached preview of a template's code, keyed by its body's digest."""
+    cache = st.session_state.preview_cache
+    key = (template.get(CODE_HASH_COLUMN) or template.get('Code', ''), max_lines)
+    preview = cache.get(key)
+    if preview is None:
+        if len(cache) >= PREVIEW_CACHE_MAX_ENTRIES:
+            cache.clear()
+        preview = format_code_for_display(template_code(template), max_lines=max_lines)
+        cache[key] = preview
+    return preview
 
-def get_statistics(df: pd.DataFrame) -> Dict[str, Any]:
-    """Calculate statistics from template data."""
-    if df is None or len(df) == 0:
-        return {
-            'total_templates': 0,
-            'categories': {},
-            'avg_code_length': 0,
-            'total_code_length': 0,
-            'most_common_category': None
-        }
-    
-    categories = Counter(df['Category'].tolist()) if 'Category' in df.columns else {}
-    code_lengths = df['Code'].apply(len).tolist() if 'Code' in df.columns else [0]
+def render_performance_panel():
+    """Render the recorded stage timings and counters."""
+    snap = perf.snapshot()
     
-    return {
-        'total_templates': len(df),
-        'categories': dict(categories),
-        'avg_code_length': sum(code_lengths) / len(code_lengths) if code_lengths else 0,
-        'total_code_length': sum(code_lengths),
-        'most_common_category': categories.most_common(1)[0][0] if categories else None
-    }
-
-def create_sample_data() -> pd.DataFrame:
-    """Create sample template data for demonstration."""
-    sample_data = {
-        'Number': [1, 2, 3, 4, 5],
-        'Title': [
-            'Login Form',
-            'Dashboard Layout',
-            'API Endpoint',
-            'Data Visualization',
-            'Contact Form'
-        ],
-        'Category': ['HTML/CSS', 'React', 'Python', 'JavaScript', 'HTML/CSS'],
-        'Description': [
-            'Modern login form with validation',
-            'Responsive dashboard with sidebar',
-            'RESTful API endpoint with authentication',
-            'Interactive chart using D3.js',
-            'Contact form with email integration'
-        ],
-        'Code': [
-            '<form class="login-form">\n  <input type="email" placeholder="Email">\n  <input type="password" placeholder="Password">\n  <button type="submit">Login</button>\n</form>',
-            'import React from "react";\n\nconst Dashboard = () => {\n  return <div className="dashboard">...</div>;\n};',
-            'from flask import Flask, jsonify\n\napp = Flask(__name__)\n\n@app.route("/api/data")\ndef get_data():\n    return jsonify({"status": "success"})',
-            'const data = [10, 20, 30, 40, 50];\nd3.select("svg")\n  .selectAll("rect")\n  .data(data)\n  .enter()\n  .append("rect");',
-            '<form class="contact-form">\n  <input type="text" placeholder="Name">\n  <input type="email" placeholder="Email">\n  <textarea placeholder="Message"></textarea>\n  <button type="submit">Send</button>\n</form>'
+    if snap['stages']:
+        stage_rows = [
+            {
+                'Stage': name,
+                'Calls': stats['count'],
+                'Avg (ms)': round(stats['avg_seconds'] * 1000, 2),
+                'Max (ms)': round(stats['max_seconds'] * 1000, 2),
+                'Last (ms)': round(stats['last_seconds'] * 1000, 2),
+                'Peak alloc (KiB)': round(stats['peak_alloc_bytes'] / 1024, 1) if stats['peak_alloc_bytes'] is not None else None
+            }
+            for name, stats in sorted(snap['stages'].items())
         ]
-    }
-    return pd.DataFrame(sample_data)
+        st.dataframe(pd.DataFrame(stage_rows), use_container_width=True, hide_index=True)
+    else:
+        st.caption("No spans recorded yet.")
+    
+    for counter in snap['counters']:
+        labels = ', '.join(f"{k}={v}" for k, v in counter['labels'].items())
+        st.caption(f"{counter['name']} ({labels}): {counter['value']:,.0f}")
+    
+    st.download_button(
+        label="📥 Metrics JSON",
+        data=perf.to_json(),
+        file_name="template_manager_metrics.json",
+        mime="application/json",
+        use_container_width=True
+    )
+    st.download_button(
+        label="📥 Prometheus Text",
+        data=perf.to_prometheus(),
+        file_name="template_manager_metrics.prom",
+        mime="text/plain",
+        use_container_width=True
+    )
+    if st.button("♻️ Reset Metrics", use_container_width=True):
+        perf.reset()
+        st.rerun()
+    
+    perf.write_metrics_file()
 
 # Sidebar
 with st.sidebar:
     st.markdown("### 📝 Code Template Manager")
     st.markdown("---")
     
+    # Performance instrumentation toggle; the panel itself is filled in at the end of the run.
+    # Each session holds its own lease so toggling here never affects other sessions.
+    lease = st.session_state.perf_lease
+    show_perf = st.toggle("⏱️ Performance", key="perf_toggle", help="Record stage timings for every rerun")
+    trace_allocations = show_perf and st.checkbox("Track allocations", key="perf_trace_allocations")
+    if lease is not None and (not show_perf or trace_allocations != lease.trace_allocations):
+        lease.release()
+        st.session_state.perf_lease = lease = None
+    if show_perf and lease is None:
+        st.session_state.perf_lease = perf.acquire(trace_allocations=trace_allocations)
+    perf_panel = st.container()
+    
+    st.markdown("---")
+    
     # Google Sheets Credentials Upload
     st.markdown("#### 🔐 Google Sheets Connection")
     
@@ -346,15 +536,26 @@ with st.sidebar:
     )
     
     if uploaded_file is not None:
+        raw_key = uploaded_file.getvalue()
+        account = st.session_state.gsheet_credentials
+        # Parse only when a different key is attached; reruns reuse the shared account
+        if account is None or account.fingerprint != fingerprint(raw_key):
+            try:
+                st.session_state.gsheet_credentials = load_service_account(raw_key)
+            except CredentialsError as e:
+                st.error(f"❌ {str(e)}")
+    elif st.session_state.gsheet_credentials is None:
         try:
-            credentials = json.load(uploaded_file)
-            st.session_state.gsheet_credentials = credentials
-            st.success(f"✅ Connected as: {credentials.get('client_email', 'Unknown')[:30]}...")
-        except Exception as e:
-            st.error(f"❌ Invalid JSON file: {str(e)}")
+            st.session_state.gsheet_credentials = service_account_from_env()
+        except CredentialsError as e:
+            st.error(f"❌ {str(e)}")
     
     if st.session_state.gsheet_credentials:
-        st.info(f"📧 Service Account: {st.session_state.gsheet_credentials.get('client_email', 'Unknown')[:30]}...")
+        account = st.session_state.gsheet_credentials
+        st.info(f"📧 Service Account: {account.client_email[:30]}...")
+        expires_in = account.seconds_until_expiry()
+        if expires_in is not None:
+            st.caption(f"🔄 Access token valid for {max(0, int(expires_in // 60))} min; refreshed automatically")
     
     st.markdown("---")
     
@@ -368,7 +569,7 @@ with st.sidebar:
             with st.spinner("Fetching data..."):
                 df = fetch_google_sheets_data()
                 if df is not None:
-                    st.session_state.templates_data = df
+                    set_templates_data(df)
                     st.success("✅ Synced!")
                     st.rerun()
     
@@ -378,13 +579,13 @@ with st.sidebar:
                 with st.spinner("Pushing data..."):
                     if push_to_google_sheets(st.session_state.templates_data):
                         st.success("✅ Pushed!")
-                    else:
+                    elif st.session_state.push_conflicts is None:
                         st.error("❌ Push failed")
             else:
                 st.warning("No data to push")
     
     if st.button("📋 Load Sample Data", use_container_width=True):
-        st.session_state.templates_data = create_sample_data()
+        set_templates_data(create_sample_data())
         st.success("✅ Sample data loaded!")
         st.rerun()
     
@@ -397,29 +598,51 @@ with st.sidebar:
     st.markdown("#### 💾 Import/Export")
     
     if st.session_state.templates_data is not None:
-        json_data = export_to_json(st.session_state.templates_data)
+        # Exports are built on click, off the script thread, from this rerun's frame
+        templates_snapshot = st.session_state.templates_data
         st.download_button(
             label="📥 Export JSON",
-            data=json_data,
+            data=lambda frame=templates_snapshot: export_to_json(with_code(frame)),
             file_name=f"templates_{datetime.now().strftime('%Y%m%d_%H%M%S')}.json",
             mime="application/json",
             use_container_width=True
         )
         
-        csv_data = st.session_state.templates_data.to_csv(index=False)
         st.download_button(
             label="📊 Export CSV",
-            data=csv_data,
+            data=lambda frame=templates_snapshot: export_to_csv(with_code(frame)),
             file_name=f"templates_{datetime.now().strftime('%Y%m%d_%H%M%S')}.csv",
             mime="text/csv",
             use_container_width=True
         )
+        
+        try:
+            cached_derived('export.xlsx.check', lambda: check_cell_limits(templates_snapshot, get_code_lengths()))
+            xlsx_ready = True
+        except ValueError as e:
+            st.error(f"Excel export unavailable: {str(e)}")
+            xlsx_ready = False
+        if xlsx_ready:
+            st.download_button(
+                label="📗 Export Excel",
+                data=lambda frame=templates_snapshot: export_to_xlsx(with_code(frame)),
+                file_name=f"templates_{datetime.now().strftime('%Y%m%d_%H%M%S')}.xlsx",
+                mime=XLSX_MIME,
+                use_container_width=True
+            )
     
-    json_upload = st.file_uploader("Import JSON", type=['json'])
+    json_upload = st.file_uploader("Import JSON or Excel", type=['json', 'xlsx'])
     if json_upload:
-        imported_df = import_from_json(json_upload.read().decode())
+        try:
+            if json_upload.name.lower().endswith('.xlsx'):
+                imported_df = import_from_xlsx(json_upload.getvalue())
+            else:
+                imported_df = import_from_json(json_upload.read().decode())
+        except ValueError as e:
+            st.error(f"Error parsing {json_upload.name}: {str(e)}")
+            imported_df = None
         if imported_df is not None:
-            st.session_state.templates_data = imported_df
+            set_templates_data(imported_df)
             st.success("✅ Imported successfully!")
             st.rerun()
     
@@ -427,7 +650,7 @@ with st.sidebar:
     
     # Statistics
     if st.session_state.templates_data is not None:
-        stats = get_statistics(st.session_state.templates_data)
+        stats = get_template_statistics()
         
         st.markdown("#### 📈 Quick Stats")
         st.metric("Total Templates", stats['total_templates'])
@@ -459,17 +682,24 @@ if st.session_state.templates_data is None:
     - 📈 Analytics and visualizations
     """)
     st.markdown('</div>', unsafe_allow_html=True)
+    if show_perf:
+        with perf_panel:
+            render_performance_panel()
     st.stop()
 
+if st.session_state.push_conflicts is not None:
+    render_push_conflicts()
+
 df = st.session_state.templates_data
 
 # Tabs
-tab1, tab2, tab3, tab4, tab5 = st.tabs([
+tab1, tab2, tab3, tab4, tab5, tab6 = st.tabs([
     "📊 Sheet View",
     "✏️ Editor",
     "👁️ Preview",
     "📈 Analytics",
-    "⚙️ Bulk Operations"
+    "⚙️ Bulk Operations",
+    "🩺 Sync Health"
 ])
 
 # Tab 1: Sheet View
@@ -477,7 +707,7 @@ with tab1:
     st.markdown("### 📊 Template Sheet View")
     
     # Search and Filter
-    col1, col2, col3 = st.columns([3, 2, 1])
+    col1, col2 = st.columns([3, 1])
     
     with col1:
         search_query = st.text_input(
@@ -489,38 +719,44 @@ with tab1:
         st.session_state.search_query = search_query
     
     with col2:
-        if 'Category' in df.columns:
-            categories = ["All"] + sorted(df['Category'].unique().tolist())
-            filter_category = st.selectbox(
-                "Category Filter",
-                categories,
-                index=categories.index(st.session_state.filter_category) if st.session_state.filter_category in categories else 0
-            )
-            st.session_state.filter_category = filter_category
-        else:
-            filter_category = "All"
-    
-    with col3:
         sort_by = st.selectbox(
             "Sort By",
             ["Number", "Title", "Category"] if 'Category' in df.columns else ["Number", "Title"]
         )
     
-    # Apply filters
-    filtered_df = df.copy()
+    analysis = get_template_analysis()
+    facet_index = cached_derived('facets', lambda: build_facet_index(df, analysis))
     
+    # Facet selections come from the widgets' state so counts reflect this rerun's choices
+    search_bits = None
     if search_query:
-        mask = filtered_df.apply(
-            lambda row: search_query.lower() in str(row).lower(),
-            axis=1
-        )
-        filtered_df = filtered_df[mask]
+        def search():
+            with perf.span('search'):
+                return bits_from_mask(search_mask(df, search_query) | code_search_mask(df, get_blob_store(), search_query))
+        search_bits = cached_derived(f"search:{search_query}", search)
+    facet_selections = {}
+    for facet in facet_index.facets:
+        key = f"facet_{facet}"
+        if key in st.session_state:
+            st.session_state[key] = [v for v in st.session_state[key] if v in facet_index.facets[facet]]
+        facet_selections[facet] = st.session_state.get(key, [])
+    facet_counts = facet_index.counts(facet_selections, search_bits)
     
-    if filter_category != "All" and 'Category' in filtered_df.columns:
-        filtered_df = filtered_df[filtered_df['Category'] == filter_category]
+    facet_columns = st.columns(len(facet_index.facets)) if facet_index.facets else []
+    for col, facet in zip(facet_columns, facet_index.facets):
+        with col:
+            st.multiselect(
+                facet,
+                facet_index.values(facet),
+                key=f"facet_{facet}",
+                format_func=lambda value, counts=facet_counts[facet]: f"{value} ({counts.get(value, 0)})"
+            )
     
-    if sort_by in filtered_df.columns:
-        filtered_df = filtered_df.sort_values(sort_by)
+    # Apply filters
+    with perf.span('facets.match'):
+        matched = mask_from_bits(facet_index.match(facet_selections, search_bits), len(df))
+    filtered_df = filter_templates(df.iloc[np.flatnonzero(matched)], sort_by=sort_by)
+    filter_key = (search_query, tuple((facet, tuple(values)) for facet, values in facet_selections.items()), sort_by)
     
     st.markdown(f"**Showing {len(filtered_df)} of {len(df)} templates**")
     
@@ -540,47 +776,71 @@ with tab1:
         
         st.markdown("---")
         
+        # Render only the current window of cards; the rest load on demand
+        sheet_key = (filter_key, st.session_state.data_version)
+        if st.session_state.sheet_filter_key != sheet_key:
+            st.session_state.sheet_filter_key = sheet_key
+            st.session_state.sheet_limit = SHEET_PAGE_SIZE
+        
+        sheet_df = filtered_df.iloc[:st.session_state.sheet_limit]
+        
         # Display each template as a card
-        for idx, row in filtered_df.iterrows():
-            with st.expander(f"**{row.get('Number', idx)}. {row.get('Title', 'Untitled')}**"):
-                col1, col2 = st.columns([3, 1])
-                
-                with col1:
-                    st.markdown(f"**Category:** {row.get('Category', 'N/A')}")
-                    st.markdown(f"**Description:** {row.get('Description', 'No description')}")
+        with perf.span('render.sheet_view'):
+            for idx, row in sheet_df.iterrows():
+                with st.expander(f"**{row.get('Number', idx)}. {row.get('Title', 'Untitled')}**"):
+                    col1, col2 = st.columns([3, 1])
                     
-                    if 'Code' in row:
-                        st.markdown("**Code Preview:**")
-                        code_preview = format_code_for_display(str(row['Code']), max_lines=10)
-                        st.code(code_preview, language='python')
+                    with col1:
+                        st.markdown(f"**Category:** {row.get('Category', 'N/A')}")
+                        st.markdown(f"**Description:** {row.get('Description', 'No description')}")
                         
-                        st.text(f"Total lines: {len(str(row['Code']).split(chr(10)))}")
-                
-                with col2:
-                    if st.button("✏️ Edit", key=f"edit_{idx}", use_container_width=True):
-                        st.session_state.selected_template = idx
-                        st.session_state.edit_mode = True
-                        st.rerun()
-                    
-                    if st.button("👁️ Preview", key=f"preview_{idx}", use_container_width=True):
-                        st.session_state.selected_template = idx
-                        st.session_state.show_preview = True
-                        st.rerun()
-                    
-                    if st.button("🗑️ Delete", key=f"delete_{idx}", use_container_width=True):
-                        st.session_state.templates_data = st.session_state.templates_data.drop(idx).reset_index(drop=True)
-                        st.success("Template deleted!")
-                        st.rerun()
+                        if has_code(df):
+                            language = analysis.at[idx, 'Language']
+                            complexity = analysis.at[idx, 'Complexity']
+                            st.markdown(
+                                f"**Language:** {language} · **Complexity:** "
+                                f"{'N/A' if pd.isna(complexity) else int(complexity)}"
+                            )
+                            if analysis.at[idx, 'SyntaxError']:
+                                st.warning(f"Syntax error: {analysis.at[idx, 'SyntaxError']}")
+                            
+                            st.markdown("**Code Preview:**")
+                            code_preview = get_code_preview(row, max_lines=10)
+                            st.code(code_preview, language=language if language != 'text' else None)
+                            
+                            st.text(f"Total lines: {len(template_code(row).split(chr(10)))}")
                     
-                    if 'Code' in row:
-                        st.download_button(
-                            label="💾 Download",
-                            data=str(row['Code']),
-                            file_name=f"{row.get('Title', 'template').replace(' ', '_')}.txt",
-                            mime="text/plain",
-                            key=f"download_{idx}",
-                            use_container_width=True
-                        )
+                    with col2:
+                        if st.button("✏️ Edit", key=f"edit_{idx}", use_container_width=True):
+                            st.session_state.selected_template = idx
+                            st.session_state.edit_mode = True
+                            st.rerun()
+                        
+                        if st.button("👁️ Preview", key=f"preview_{idx}", use_container_width=True):
+                            st.session_state.selected_template = idx
+                            st.session_state.show_preview = True
+                            st.rerun()
+                        
+                        if st.button("🗑️ Delete", key=f"delete_{idx}", use_container_width=True):
+                            set_templates_data(delete_templates(st.session_state.templates_data, [idx]))
+                            st.success("Template deleted!")
+                            st.rerun()
+                        
+                        if has_code(df):
+                            st.download_button(
+                                label="💾 Download",
+                                data=lambda template=row: template_code(template),
+                                file_name=f"{row.get('Title', 'template').replace(' ', '_')}.txt",
+                                mime="text/plain",
+                                key=f"download_{idx}",
+                                use_container_width=True
+                            )
+        
+        if len(filtered_df) > len(sheet_df):
+            st.caption(f"Showing cards 1-{len(sheet_df)} of {len(filtered_df)}")
+            if st.button("⬇️ Load more", key="sheet_load_more", use_container_width=True):
+                st.session_state.sheet_limit += SHEET_PAGE_SIZE
+                st.rerun()
     else:
         st.info("No templates found matching your criteria.")
 
@@ -601,7 +861,7 @@ with tab2:
             with col1:
                 new_title = st.text_input("Title", value=str(template.get('Title', '')))
                 new_description = st.text_area("Description", value=str(template.get('Description', '')), height=100)
-                new_code = st.text_area("Code", value=str(template.get('Code', '')), height=400)
+                new_code = st.text_area("Code", value=template_code(template), height=400)
             
             with col2:
                 if 'Category' in df.columns:
@@ -618,11 +878,18 @@ with tab2:
                 
                 with col_a:
                     if st.button("💾 Save", use_container_width=True):
+                        record_template_revision(
+                            template[ID_COLUMN],
+                            new_code,
+                            template_fields(new_title, new_description, new_category),
+                            previous=template
+                        )
                         st.session_state.templates_data.at[idx, 'Title'] = new_title
                         st.session_state.templates_data.at[idx, 'Description'] = new_description
-                        st.session_state.templates_data.at[idx, 'Code'] = new_code
+                        save_template_code(idx, new_code)
                         if 'Category' in st.session_state.templates_data.columns:
                             st.session_state.templates_data.at[idx, 'Category'] = new_category
+                        mark_templates_changed()
                         
                         st.success("✅ Template saved!")
                         st.session_state.edit_mode = False
@@ -645,6 +912,51 @@ with tab2:
                 char_count = len(new_code)
                 st.metric("Lines", line_count)
                 st.metric("Characters", char_count)
+            
+            # Version history
+            history = st.session_state.template_history
+            history_key = template[ID_COLUMN]
+            if history.has_history(history_key):
+                with st.expander("🕘 Version History"):
+                    revisions = history.revisions(history_key)
+                    st.dataframe(
+                        pd.DataFrame([
+                            {
+                                'Revision': rev['rev'],
+                                'Saved': rev['timestamp'],
+                                'Title': rev['fields'].get('Title', ''),
+                                'Characters': rev['size']
+                            }
+                            for rev in revisions
+                        ]),
+                        use_container_width=True,
+                        hide_index=True
+                    )
+                    
+                    rev_numbers = [rev['rev'] for rev in revisions]
+                    col_old, col_new = st.columns(2)
+                    with col_old:
+                        old_rev = st.selectbox("Compare from", rev_numbers, index=min(1, len(rev_numbers) - 1), key="history_old_rev")
+                    with col_new:
+                        new_rev = st.selectbox("Compare to", rev_numbers, index=0, key="history_new_rev")
+                    
+                    diff_text = history.diff(history_key, old_rev, new_rev)
+                    if diff_text:
+                        st.code(diff_text, language='diff')
+                    else:
+                        st.caption("No code changes between these revisions.")
+                    
+                    if st.button(f"↩️ Restore r{old_rev}", use_container_width=True):
+                        restored = next(rev for rev in revisions if rev['rev'] == old_rev)
+                        restored_code = history.get(history_key, old_rev)
+                        history.record(history_key, restored_code, restored['fields'])
+                        save_template_code(idx, restored_code)
+                        for field, value in restored['fields'].items():
+                            if field in st.session_state.templates_data.columns:
+                                st.session_state.templates_data.at[idx, field] = value
+                        mark_templates_changed()
+                        st.success(f"✅ Restored revision {old_rev}")
+                        st.rerun()
         else:
             st.warning("Template not found. It may have been deleted.")
             st.session_state.edit_mode = False
@@ -678,13 +990,19 @@ with tab2:
                         'Title': new_title,
                         'Category': new_category,
                         'Description': new_description,
-                        'Code': new_code
+                        CODE_HASH_COLUMN: get_blob_store().put(new_code),
+                        ID_COLUMN: new_template_id()
                     }
                     
-                    st.session_state.templates_data = pd.concat([
+                    set_templates_data(pd.concat([
                         st.session_state.templates_data,
                         pd.DataFrame([new_row])
-                    ], ignore_index=True)
+                    ], ignore_index=True))
+                    record_template_revision(
+                        new_row[ID_COLUMN],
+                        new_code,
+                        template_fields(new_title, new_description, new_category)
+                    )
                     
                     st.success("✅ Template added successfully!")
                     st.rerun()
@@ -709,8 +1027,9 @@ with tab3:
             
             tab_a, tab_b, tab_c = st.tabs(["📝 Code", "🌐 Rendered (HTML)", "📊 Statistics"])
             
+            code = template_code(template)
+            
             with tab_a:
-                code = str(template.get('Code', ''))
                 
                 # Detect language
                 language = 'python'
@@ -734,13 +1053,11 @@ with tab3:
             with tab_b:
                 if template.get('Category') in ['HTML/CSS', 'JavaScript', 'React']:
                     st.markdown("**Rendered Output:**")
-                    st.components.v1.html(str(template.get('Code', '')), height=600, scrolling=True)
+                    st.components.v1.html(code, height=600, scrolling=True)
                 else:
                     st.info("HTML rendering is only available for HTML/CSS, JavaScript, and React templates.")
             
             with tab_c:
-                code = str(template.get('Code', ''))
-                
                 # Code statistics
                 lines = code.split('\n')
                 non_empty_lines = [l for l in lines if l.strip()]
@@ -759,13 +1076,34 @@ with tab3:
                 
                 # Line length distribution
                 line_lengths = [len(line) for line in lines]
-                fig = px.histogram(
-                    x=line_lengths,
-                    nbins=30,
-                    title="Line Length Distribution",
-                    labels={'x': 'Line Length', 'y': 'Count'}
-                )
-                st.plotly_chart(fig, use_container_width=True)
+                with perf.span('plotly'):
+                    import plotly.express as px
+                    fig = px.histogram(
+                        x=line_lengths,
+                        nbins=30,
+                        title="Line Length Distribution",
+                        labels={'x': 'Line Length', 'y': 'Count'}
+                    )
+                    st.plotly_chart(fig, use_container_width=True)
+            
+            st.markdown("---")
+            st.markdown("### 🔗 Similar Templates")
+            
+            similar = get_similarity_index().similar(df.at[idx, ID_COLUMN], k=SIMILAR_TEMPLATES_COUNT)
+            if similar:
+                labels_by_id = cached_derived('labels_by_id', lambda: dict(zip(df[ID_COLUMN], df.index)))
+                cols = st.columns(len(similar))
+                for col, (similar_id, score) in zip(cols, similar):
+                    similar_idx = labels_by_id[similar_id]
+                    similar_row = df.loc[similar_idx]
+                    with col:
+                        st.markdown(f"**{similar_row.get('Title', 'Untitled')}**")
+                        st.caption(f"{similar_row.get('Category', 'N/A')} · {score:.0%} similar")
+                        if st.button("👁️ View", key=f"similar_view_{similar_idx}", use_container_width=True):
+                            st.session_state.selected_template = similar_idx
+                            st.rerun()
+            else:
+                st.info("No similar templates found.")
             
             if st.button("❌ Close Preview"):
                 st.session_state.show_preview = False
@@ -780,31 +1118,41 @@ with tab3:
         st.markdown("---")
         st.markdown("### 🖼️ Template Gallery")
         
+        # Render only the current window of the Sheet View selection
+        gallery_key = (filter_key, st.session_state.data_version)
+        if st.session_state.gallery_filter_key != gallery_key:
+            st.session_state.gallery_filter_key = gallery_key
+            st.session_state.gallery_limit = GALLERY_PAGE_SIZE
+        
+        gallery_df = filtered_df.iloc[:st.session_state.gallery_limit]
+        st.caption(f"Showing {len(gallery_df)} of {len(filtered_df)} templates")
+        
         cols_per_row = 3
-        for i in range(0, len(df), cols_per_row):
+        for i in range(0, len(gallery_df), cols_per_row):
             cols = st.columns(cols_per_row)
-            for j, col in enumerate(cols):
-                if i + j < len(df):
-                    idx = df.index[i + j]
-                    row = df.loc[idx]
+            for col, (idx, row) in zip(cols, gallery_df.iloc[i:i + cols_per_row].iterrows()):
+                with col:
+                    st.markdown(f"**{row.get('Title', 'Untitled')}**")
+                    st.caption(row.get('Category', 'N/A'))
                     
-                    with col:
-                        st.markdown(f"**{row.get('Title', 'Untitled')}**")
-                        st.caption(row.get('Category', 'N/A'))
-                        
-                        code_preview = format_code_for_display(str(row.get('Code', '')), max_lines=5)
-                        st.code(code_preview, language='python')
-                        
-                        if st.button("👁️ View", key=f"gallery_view_{idx}", use_container_width=True):
-                            st.session_state.selected_template = idx
-                            st.session_state.show_preview = True
-                            st.rerun()
+                    code_preview = get_code_preview(row, max_lines=5)
+                    st.code(code_preview, language='python')
+                    
+                    if st.button("👁️ View", key=f"gallery_view_{idx}", use_container_width=True):
+                        st.session_state.selected_template = idx
+                        st.session_state.show_preview = True
+                        st.rerun()
+        
+        if len(filtered_df) > len(gallery_df):
+            if st.button("⬇️ Load more", key="gallery_load_more", use_container_width=True):
+                st.session_state.gallery_limit += GALLERY_PAGE_SIZE
+                st.rerun()
 
 # Tab 4: Analytics
 with tab4:
     st.markdown("### 📈 Template Analytics")
     
-    stats = get_statistics(df)
+    stats = get_template_statistics()
     
     # Overview metrics
     col1, col2, col3, col4 = st.columns(4)
@@ -841,43 +1189,67 @@ with tab4:
     with col1:
         if stats['categories']:
             # Category distribution pie chart
-            fig = px.pie(
-                values=list(stats['categories'].values()),
-                names=list(stats['categories'].keys()),
-                title='Templates by Category',
-                color_discrete_sequence=px.colors.qualitative.Set3
-            )
-            st.plotly_chart(fig, use_container_width=True)
+            with perf.span('plotly'):
+                import plotly.express as px
+                fig = px.pie(
+                    values=list(stats['categories'].values()),
+                    names=list(stats['categories'].keys()),
+                    title='Templates by Category',
+                    color_discrete_sequence=px.colors.qualitative.Set3
+                )
+                st.plotly_chart(fig, use_container_width=True)
     
     with col2:
-        if 'Code' in df.columns:
+        if has_code(df):
             # Code length by template bar chart
-            code_lengths = df['Code'].apply(len).tolist()
+            code_lengths = get_code_lengths().tolist()
             titles = df['Title'].tolist() if 'Title' in df.columns else [f"Template {i+1}" for i in range(len(df))]
             
-            fig = px.bar(
-                x=titles,
-                y=code_lengths,
-                title='Code Length by Template',
-                labels={'x': 'Template', 'y': 'Characters'},
-                color=code_lengths,
-                color_continuous_scale='Viridis'
-            )
-            st.plotly_chart(fig, use_container_width=True)
+            with perf.span('plotly'):
+                import plotly.express as px
+                fig = px.bar(
+                    x=titles,
+                    y=code_lengths,
+                    title='Code Length by Template',
+                    labels={'x': 'Template', 'y': 'Characters'},
+                    color=code_lengths,
+                    color_continuous_scale='Viridis'
+                )
+                st.plotly_chart(fig, use_container_width=True)
     
     # Timeline or trends (if we had timestamp data)
-    if 'Code' in df.columns and 'Category' in df.columns:
+    if has_code(df) and 'Category' in df.columns:
         st.markdown("---")
         st.markdown("### 📊 Category Statistics")
         
-        category_stats = df.groupby('Category').agg({
-            'Code': ['count', lambda x: x.apply(len).mean(), lambda x: x.apply(len).sum()]
-        }).round(0)
+        category_stats = get_code_lengths().groupby(df['Category']).agg(['count', 'mean', 'sum']).round(0)
         
         category_stats.columns = ['Count', 'Avg Length', 'Total Length']
         category_stats = category_stats.reset_index()
         
         st.dataframe(category_stats, use_container_width=True)
+    
+    if has_code(df):
+        st.markdown("---")
+        st.markdown("### 🔬 Code Analysis")
+        
+        analysis = get_template_analysis()
+        syntax_errors = int(analysis['SyntaxOK'].eq(False).sum())
+        complexity = pd.to_numeric(analysis['Complexity'], errors='coerce')
+        
+        col1, col2, col3 = st.columns(3)
+        with col1:
+            st.metric("Languages", analysis['Language'].nunique())
+        with col2:
+            st.metric("Syntax Errors", syntax_errors)
+        with col3:
+            st.metric("Avg Complexity", f"{complexity.mean():.1f}" if complexity.notna().any() else "N/A")
+        
+        analysis_table = pd.concat(
+            [df[[c for c in ['Number', 'Title', 'Category'] if c in df.columns]], analysis],
+            axis=1
+        )
+        st.dataframe(analysis_table, use_container_width=True)
 
 # Tab 5: Bulk Operations
 with tab5:
@@ -916,8 +1288,8 @@ with tab5:
                 new_category = st.selectbox("New category", categories, key="bulk_category")
                 
                 if st.button("Apply Category Change", use_container_width=True):
-                    for idx in selected_indices:
-                        st.session_state.templates_data.at[idx, 'Category'] = new_category
+                    set_category(st.session_state.templates_data, selected_indices, new_category)
+                    mark_templates_changed()
                     st.success(f"✅ Updated {len(selected_indices)} templates!")
                     st.rerun()
         
@@ -926,19 +1298,17 @@ with tab5:
             
             selected_df = df.loc[selected_indices]
             
-            json_export = export_to_json(selected_df)
             st.download_button(
                 label="📥 Download JSON",
-                data=json_export,
+                data=lambda frame=selected_df: export_to_json(with_code(frame)),
                 file_name=f"selected_templates_{datetime.now().strftime('%Y%m%d_%H%M%S')}.json",
                 mime="application/json",
                 use_container_width=True
             )
             
-            csv_export = selected_df.to_csv(index=False)
             st.download_button(
                 label="📊 Download CSV",
-                data=csv_export,
+                data=lambda frame=selected_df: export_to_csv(with_code(frame)),
                 file_name=f"selected_templates_{datetime.now().strftime('%Y%m%d_%H%M%S')}.csv",
                 mime="text/csv",
                 use_container_width=True
@@ -949,7 +1319,7 @@ with tab5:
             st.warning(f"This will delete {len(selected_indices)} templates")
             
             if st.button("🗑️ Confirm Delete", use_container_width=True):
-                st.session_state.templates_data = st.session_state.templates_data.drop(selected_indices).reset_index(drop=True)
+                set_templates_data(delete_templates(st.session_state.templates_data, selected_indices))
                 st.success(f"✅ Deleted {len(selected_indices)} templates!")
                 st.rerun()
         
@@ -963,8 +1333,8 @@ with tab5:
             with st.expander(f"{row.get('Number', idx)}. {row.get('Title', 'Untitled')}"):
                 st.markdown(f"**Category:** {row.get('Category', 'N/A')}")
                 st.markdown(f"**Description:** {row.get('Description', 'No description')}")
-                if 'Code' in row:
-                    st.code(format_code_for_display(str(row['Code']), max_lines=5), language='python')
+                if has_code(df):
+                    st.code(get_code_preview(row, max_lines=5), language='python')
     else:
         st.info("Select one or more templates above to perform bulk operations.")
     
@@ -982,6 +1352,7 @@ with tab5:
         if st.button("Re-number All Templates"):
             if 'Number' in st.session_state.templates_data.columns:
                 st.session_state.templates_data['Number'] = range(1, len(st.session_state.templates_data) + 1)
+                mark_templates_changed()
                 st.success("✅ Templates re-numbered!")
                 st.rerun()
     
@@ -990,11 +1361,92 @@ with tab5:
         st.info("Remove empty rows and reset index")
         
         if st.button("Clean Data"):
-            # Remove rows where all values are empty
-            st.session_state.templates_data = st.session_state.templates_data.dropna(how='all').reset_index(drop=True)
+            # Remove rows where all values are empty (every row has an Id; empty code is a reference to '')
+            data = st.session_state.templates_data
+            blank = data.drop(columns=[c for c in (ID_COLUMN, CODE_HASH_COLUMN) if c in data.columns]).isna().all(axis=1)
+            if CODE_HASH_COLUMN in data.columns:
+                blank &= data[CODE_HASH_COLUMN] == content_hash('')
+            set_templates_data(data[~blank].reset_index(drop=True))
             st.success("✅ Data cleaned!")
             st.rerun()
 
+# Tab 6: Sync Health
+with tab6:
+    st.markdown("### 🩺 Sync Health")
+    
+    windows = {"Last hour": 1, "Last 24 hours": 24, "Last 7 days": 24 * 7, "All time": None}
+    window = st.selectbox("Time window", list(windows.keys()), index=1, key="sync_health_window")
+    since = datetime.now(timezone.utc) - timedelta(hours=windows[window]) if windows[window] else None
+    sync_records = get_sync_log().records(since)
+    
+    if not sync_records:
+        st.info("No syncs recorded in this window. Fetch or push to start collecting telemetry.")
+    else:
+        sync_summary = summarize(sync_records)
+        quota = quota_usage(sync_records)
+        
+        # Latency percentiles, split into time spent in Sheets API calls and local work
+        cols = st.columns(len(sync_summary) + 1)
+        for col, (operation, summary) in zip(cols, sync_summary.items()):
+            with col:
+                st.metric(
+                    f"{operation.title()} p50 / p95",
+                    f"{summary['p50_seconds']:.2f}s / {summary['p95_seconds']:.2f}s",
+                    help=f"API p50 {summary['p50_api_seconds']:.2f}s, p95 {summary['p95_api_seconds']:.2f}s"
+                )
+        with cols[-1]:
+            st.metric(
+                "Peak calls / minute",
+                f"{quota['peak_calls_per_minute']} / {quota['quota_per_minute']}",
+                help=f"{quota['calls_last_minute']} calls in the last minute"
+            )
+        
+        summary_df = pd.DataFrame.from_dict(sync_summary, orient='index')
+        summary_df.index.name = 'Operation'
+        st.dataframe(summary_df.reset_index(), use_container_width=True)
+        
+        records_df = pd.DataFrame(sync_records)
+        records_df['ts'] = pd.to_datetime(records_df['ts'])
+        records_df['local_seconds'] = (records_df['duration_seconds'] - records_df['api_seconds']).clip(lower=0)
+        
+        col1, col2 = st.columns(2)
+        
+        with col1:
+            with perf.span('plotly'):
+                import plotly.express as px
+                fig = px.scatter(
+                    records_df,
+                    x='ts',
+                    y='duration_seconds',
+                    color='operation',
+                    symbol='outcome',
+                    hover_data=['api_seconds', 'local_seconds', 'api_calls', 'retries', 'rows'],
+                    title='Sync Latency',
+                    labels={'ts': 'Time', 'duration_seconds': 'Seconds'}
+                )
+                st.plotly_chart(fig, use_container_width=True)
+        
+        with col2:
+            per_minute = calls_per_minute(sync_records)
+            with perf.span('plotly'):
+                import plotly.express as px
+                fig = px.bar(
+                    x=pd.to_datetime(list(per_minute.keys())),
+                    y=list(per_minute.values()),
+                    title='API Calls per Minute',
+                    labels={'x': 'Minute', 'y': 'Calls'}
+                )
+                fig.add_hline(y=SHEETS_QUOTA_PER_MINUTE, line_dash='dash', annotation_text='Quota')
+                st.plotly_chart(fig, use_container_width=True)
+        
+        st.markdown("#### 📜 Recent Syncs")
+        st.dataframe(records_df.iloc[::-1].head(50), use_container_width=True)
+
+# Performance panel (filled last so it covers every stage of this run)
+if show_perf:
+    with perf_panel:
+        render_performance_panel()
+
 # Footer
 st.markdown("---")
 st.markdown("""
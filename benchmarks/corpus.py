@@ -0,0 +1,105 @@
+"""Synthetic template corpora shaped like ``create_sample_data``."""
+
+import random
+from typing import List
+
+import pandas as pd
+
+from template_manager.core import create_sample_data
+
+CATEGORIES = ["HTML/CSS", "JavaScript", "Python", "React", "Vue", "API", "Database", "Other"]
+CORPUS_SIZES = {
+    '1k': 1_000,
+    '10k': 10_000,
+    '100k': 100_000,
+    '1m': 1_000_000
+}
+
+_WORDS = (
+    "form dashboard api endpoint chart modal table login upload search filter "
+    "pagination cache retry webhook sidebar layout card grid theme toggle"
+).split()
+
+_LINE_TEMPLATES = {
+    "Python": [
+        "def {w}_{n}(request):",
+        "    result = fetch_{w}(request.args.get('{w}'))",
+        "    if not result:",
+        "        return jsonify({{'error': '{w} not found'}}), 404",
+        "    return jsonify(result)",
+        "import {w}",
+        "from flask import Flask, jsonify"
+    ],
+    "JavaScript": [
+        "const {w}{n} = document.querySelector('.{w}');",
+        "{w}{n}.addEventListener('click', () => {{",
+        "  fetch('/api/{w}').then(r => r.json()).then(render);",
+        "}});",
+        "function render(data) {{ console.log(data.length); }}"
+    ],
+    "React": [
+        "import React, {{ useState }} from 'react';",
+        "const {W}{n} = ({{ items }}) => {{",
+        "  const [{w}, set{W}] = useState(null);",
+        "  return <div className=\"{w}\">{{items.map(i => <span key={{i}}>{{i}}</span>)}}</div>;",
+        "}};",
+        "export default {W}{n};"
+    ],
+    "HTML/CSS": [
+        "<div class=\"{w}-{n}\">",
+        "  <input type=\"text\" placeholder=\"{W}\">",
+        "  <button type=\"submit\">{W}</button>",
+        "</div>",
+        ".{w}-{n} {{ display: flex; gap: 1rem; padding: 0.5rem; }}"
+    ]
+}
+
+
+def _code_body(rng: random.Random, category: str, serial: int) -> str:
+    """Build a code body with a log-normal line count (median ~25 lines)."""
+    templates = _LINE_TEMPLATES.get(category, _LINE_TEMPLATES["Python"])
+    line_count = max(3, min(int(rng.lognormvariate(3.2, 0.8)), 600))
+    lines = []
+    for i in range(line_count):
+        word = rng.choice(_WORDS)
+        lines.append(templates[i % len(templates)].format(w=word, W=word.capitalize(), n=serial))
+    return '\n'.join(lines)
+
+
+def generate_templates(rows: int, seed: int = 0, distinct_bodies: int = 5_000) -> pd.DataFrame:
+    """Generate a deterministic template table with ``rows`` rows.
+
+    Code bodies are drawn from a pool of ``distinct_bodies`` bodies, with about a
+    fifth of rows getting a small unique edit, mirroring libraries where many
+    templates share identical or near-identical code.
+    """
+    rng = random.Random(seed)
+    sample = create_sample_data()
+    pool_size = max(1, min(distinct_bodies, rows))
+
+    pool_categories = [rng.choice(CATEGORIES) for _ in range(pool_size)]
+    pool_bodies = [_code_body(rng, category, i) for i, category in enumerate(pool_categories)]
+    pool_titles = [f"{rng.choice(_WORDS).capitalize()} {rng.choice(_WORDS).capitalize()}" for _ in range(pool_size)]
+
+    titles: List[str] = []
+    categories: List[str] = []
+    descriptions: List[str] = []
+    codes: List[str] = []
+    sample_descriptions = sample['Description'].tolist()
+    for i in range(rows):
+        k = rng.randrange(pool_size)
+        titles.append(f"{pool_titles[k]} {i + 1}")
+        categories.append(pool_categories[k])
+        descriptions.append(sample_descriptions[i % len(sample_descriptions)] if rng.random() > 0.1 else "")
+        code = pool_bodies[k]
+        if rng.random() < 0.2:
+            code = f"{code}\n// variant {i}"
+        codes.append(code)
+
+    return pd.DataFrame({
+        'Number': range(1, rows + 1),
+        'Title': titles,
+        'Category': categories,
+        'Description': descriptions,
+        'Code': codes
+    }, columns=list(sample.columns))
@@ -0,0 +1,94 @@
+"""In-memory stand-in for a gspread worksheet that counts traffic."""
+
+import json
+from typing import Any, Dict, List, Optional
+
+
+class FakeWorksheet:
+    """Implements the subset of ``gspread.Worksheet`` the app relies on."""
+
+    def __init__(self, values: Optional[List[List[Any]]] = None, title: str = "demo_examples"):
+        self.title = title
+        self._values = [list(row) for row in (values or [])]
+        self.calls: Dict[str, int] = {}
+        self.cells_read = 0
+        self.cells_written = 0
+        self.bytes_read = 0
+        self.bytes_written = 0
+
+    def _track(self, method: str):
+        self.calls[method] = self.calls.get(method, 0) + 1
+
+    def _read(self, values: List[List[Any]]) -> List[List[Any]]:
+        self.cells_read += sum(len(row) for row in values)
+        self.bytes_read += len(json.dumps(values, default=str))
+        return values
+
+    def _write(self, values: List[List[Any]]):
+        self.cells_written += sum(len(row) for row in values)
+        self.bytes_written += len(json.dumps(values, default=str))
+
+    @property
+    def row_count(self) -> int:
+        return len(self._values)
+
+    def get_all_values(self) -> List[List[str]]:
+        self._track('get_all_values')
+        return self._read([['' if v is None else str(v) for v in row] for row in self._values])
+
+    def get_all_records(self) -> List[Dict[str, Any]]:
+        self._track('get_all_records')
+        if not self._values:
+            return []
+        header, rows = self._values[0], self._values[1:]
+        self._read(self._values)
+        return [dict(zip(header, row)) for row in rows]
+
+    def clear(self):
+        self._track('clear')
+        self._values = []
+
+    def update(self, values: List[List[Any]], range_name: Optional[str] = None):
+        self._track('update')
+        self._write(values)
+        start = _row_from_range(range_name) if range_name else 1
+        self._put_rows(start, values)
+
+    def batch_update(self, data: List[Dict[str, Any]]):
+        self._track('batch_update')
+        for entry in data:
+            self._write(entry['values'])
+            self._put_rows(_row_from_range(entry['range']), entry['values'])
+
+    def batch_clear(self, ranges: List[str]):
+        self._track('batch_clear')
+        for range_name in ranges:
+            start = _row_from_range(range_name)
+            end = _row_from_range(range_name.split(':')[-1])
+            for row in range(start, min(end, len(self._values)) + 1):
+                self._values[row - 1] = []
+        while self._values and not self._values[-1]:
+            self._values.pop()
+
+    def delete_rows(self, start_index: int, end_index: Optional[int] = None):
+        self._track('delete_rows')
+        end_index = end_index or start_index
+        del self._values[start_index - 1:end_index]
+
+    def _put_rows(self, start: int, values: List[List[Any]]):
+        while len(self._values) < start - 1 + len(values):
+            self._values.append([])
+        for offset, row in enumerate(values):
+            self._values[start - 1 + offset] = list(row)
+
+    def reset_counters(self):
+        self.calls = {}
+        self.cells_read = self.cells_written = 0
+        self.bytes_read = self.bytes_written = 0
+
+
+def _row_from_range(range_name: str) -> int:
+    """Return the first row of an A1 range such as ``A5`` or ``A5:E9``."""
+    first = range_name.split(':')[0].split('!')[-1]
+    digits = ''.join(ch for ch in first if ch.isdigit())
+    return int(digits) if digits else 1
@@ -0,0 +1,334 @@
+"""Benchmark the core template operations against synthetic corpora.
+
+Usage::
+
+    python -m benchmarks.run --sizes 1k,10k,100k --output bench.json
+    python -m benchmarks.run --sizes 1k,10k --compare bench.json --threshold 0.25
+
+Results are written as JSON; ``--compare`` exits with status 1 when any
+operation's median got slower than the baseline by more than ``--threshold``.
+"""
+
+import argparse
+import json
+import platform
+import statistics
+import subprocess
+import sys
+import time
+from datetime import datetime
+from typing import Any, Callable, Dict, List, Optional
+
+import pandas as pd
+
+from benchmarks.corpus import CORPUS_SIZES, generate_templates
+from benchmarks.fake_gspread import FakeWorksheet
+from template_manager.core import (
+    delete_templates,
+    diff_sheet_values,
+    export_to_csv,
+    export_to_json,
+    filter_templates,
+    get_statistics,
+    import_from_csv,
+    import_from_json,
+    set_category,
+    sheet_values
+)
+from template_manager.facets import build_facet_index
+from template_manager.merge import frame_from_values, snapshot_base, three_way_merge
+from template_manager.similarity import SimilarityIndex
+from template_manager.sync import write_worksheet
+from template_manager.workbook import export_to_xlsx, import_from_xlsx
+
+RESULTS_SCHEMA_VERSION = 1
+
+# Modules that must stay out of a plain library import
+HEAVY_MODULES = ['gspread', 'google.auth', 'oauth2client', 'plotly', 'streamlit']
+STARTUP_MODULES = ['template_manager', 'template_manager.sync']
+
+_IMPORT_PROBE = """
+import json, sys, time
+start = time.perf_counter()
+import {module}
+elapsed = time.perf_counter() - start
+print(json.dumps({{'seconds': elapsed, 'heavy': [m for m in {heavy!r} if m in sys.modules]}}))
+"""
+
+
+class Operation:
+    """A named benchmark step with an untimed per-run setup."""
+
+    def __init__(self, name: str, run: Callable[[Any], Any], setup: Optional[Callable[[], Any]] = None):
+        self.name = name
+        self.run = run
+        self.setup = setup or (lambda: None)
+
+
+def build_operations(df: pd.DataFrame) -> List[Operation]:
+    """Return the operations to time for one corpus."""
+    json_payload = export_to_json(df)
+    csv_payload = export_to_csv(df)
+    selection = df.index[::10].tolist()
+
+    def fresh_worksheet():
+        return FakeWorksheet(sheet_values(df))
+
+    def push_full(worksheet: FakeWorksheet):
+        worksheet.clear()
+        worksheet.update(sheet_values(df))
+        return worksheet
+
+    # One percent of rows edited locally since the worksheet was last written
+    remote_values = FakeWorksheet(sheet_values(df)).get_all_values()
+    edited = df.copy()
+    edited.loc[edited.index[::100], 'Title'] = edited.loc[edited.index[::100], 'Title'] + " (edited)"
+
+    def push_incremental(worksheet: FakeWorksheet):
+        write_worksheet(worksheet, edited, worksheet.get_all_values())
+        return worksheet
+
+    # Another session edited a different one percent of rows in the meantime
+    base = snapshot_base(df)
+    concurrent = df.copy()
+    concurrent.loc[concurrent.index[50::100], 'Description'] = "changed remotely"
+    concurrent_remote = frame_from_values(FakeWorksheet(sheet_values(concurrent)).get_all_values())
+
+    facet_index = build_facet_index(df)
+    facet_selections = {'Category': ['Python', 'React'], 'Lines': ['11–50 lines'], 'Description': ['Has description']}
+
+    def facet_filter(_):
+        return facet_index.match(facet_selections), facet_index.counts(facet_selections)
+
+    # Built on first use (untimed) so unselected runs skip the workbook and tokenizing cost
+    xlsx_payload: Dict[str, bytes] = {}
+    similarity_index = SimilarityIndex()
+
+    def xlsx_setup():
+        if 'workbook' not in xlsx_payload:
+            xlsx_payload['workbook'] = export_to_xlsx(df)
+        return xlsx_payload['workbook']
+
+    def similarity_setup():
+        if not len(similarity_index):
+            similarity_index.sync(df)
+        return similarity_index
+
+    return [
+        Operation('search', lambda _: filter_templates(df, 'fetch', sort_by='Number')),
+        Operation('category_filter_sort', lambda _: filter_templates(df, '', 'Python', 'Title')),
+        Operation('facet_build', lambda _: build_facet_index(df)),
+        Operation('facet_filter', facet_filter),
+        Operation('similarity_query', lambda index: index.similar(df.index[len(df) // 2], 5), setup=similarity_setup),
+        Operation('statistics', lambda _: get_statistics(df)),
+        Operation('export_json', lambda _: export_to_json(df)),
+        Operation('export_csv', lambda _: export_to_csv(df)),
+        Operation('import_json', lambda _: import_from_json(json_payload)),
+        Operation('import_csv', lambda _: import_from_csv(csv_payload)),
+        Operation('export_xlsx', lambda _: export_to_xlsx(df)),
+        Operation('import_xlsx', import_from_xlsx, setup=xlsx_setup),
+        Operation('bulk_set_category', lambda frame: set_category(frame, selection, 'Other'), setup=df.copy),
+        Operation('bulk_delete', lambda _: delete_templates(df, selection)),
+        Operation('push_full', push_full, setup=fresh_worksheet),
+        Operation('push_diff', lambda _: diff_sheet_values(remote_values, sheet_values(edited))),
+        Operation('push_incremental', push_incremental, setup=fresh_worksheet),
+        Operation('push_merge', lambda _: three_way_merge(base, edited, concurrent_remote))
+    ]
+
+
+def time_operation(operation: Operation, repeat: int, budget_seconds: float) -> Dict[str, Any]:
+    """Run an operation up to ``repeat`` times and summarise the timings."""
+    timings = []
+    extra: Dict[str, Any] = {}
+    for _ in range(repeat):
+        state = operation.setup()
+        start = time.perf_counter()
+        result = operation.run(state)
+        timings.append(time.perf_counter() - start)
+        if isinstance(result, FakeWorksheet):
+            extra = {
+                'api_calls': sum(result.calls.values()),
+                'cells_written': result.cells_written,
+                'bytes_written': result.bytes_written
+            }
+        elif isinstance(result, dict) and 'changed_rows' in result:
+            extra = {'changed_rows': len(result['changed_rows'])}
+        elif isinstance(result, dict) and 'conflicts' in result:
+            extra = {
+                'conflicts': len(result['conflicts']),
+                'remote_changes': result['remote_changes'],
+                'rows_compared': result['compared']
+            }
+        if sum(timings) > budget_seconds:
+            break
+
+    return {
+        'operation': operation.name,
+        'runs': len(timings),
+        'min_seconds': min(timings),
+        'median_seconds': statistics.median(timings),
+        'mean_seconds': statistics.fmean(timings),
+        'max_seconds': max(timings),
+        'extra': extra
+    }
+
+
+def time_cold_imports(repeat: int) -> List[Dict[str, Any]]:
+    """Time importing each library entry point in a fresh interpreter."""
+    results = []
+    for module in STARTUP_MODULES:
+        probe = _IMPORT_PROBE.format(module=module, heavy=HEAVY_MODULES)
+        timings = []
+        heavy: List[str] = []
+        for _ in range(repeat):
+            completed = subprocess.run(
+                [sys.executable, '-c', probe], capture_output=True, text=True, check=True
+            )
+            sample = json.loads(completed.stdout.strip().splitlines()[-1])
+            timings.append(sample['seconds'])
+            heavy = sample['heavy']
+        results.append({
+            'operation': f'cold_import.{module}',
+            'rows': 0,
+            'runs': len(timings),
+            'min_seconds': min(timings),
+            'median_seconds': statistics.median(timings),
+            'mean_seconds': statistics.fmean(timings),
+            'max_seconds': max(timings),
+            'extra': {'heavy_modules_loaded': heavy}
+        })
+    return results
+
+
+def environment_info() -> Dict[str, Any]:
+    """Describe the interpreter and checkout the numbers were taken on."""
+    try:
+        commit = subprocess.run(
+            ['git', 'rev-parse', 'HEAD'], capture_output=True, text=True, check=True
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        commit = None
+    return {
+        'python': platform.python_version(),
+        'pandas': pd.__version__,
+        'platform': platform.platform(),
+        'machine': platform.machine(),
+        'git_commit': commit
+    }
+
+
+def parse_sizes(value: str) -> List[int]:
+    """Parse ``1k,10k,100k,1m`` (or plain integers) into row counts."""
+    sizes = []
+    for token in value.split(','):
+        token = token.strip().lower()
+        if not token:
+            continue
+        sizes.append(CORPUS_SIZES[token] if token in CORPUS_SIZES else int(token))
+    return sizes
+
+
+def run_benchmarks(
+    sizes: List[int],
+    operations: Optional[List[str]] = None,
+    repeat: int = 3,
+    budget_seconds: float = 10.0,
+    seed: int = 0,
+    startup: bool = True,
+    log: Callable[[str], None] = print
+) -> Dict[str, Any]:
+    """Time library cold start and every operation on a corpus of each size."""
+    results = []
+    if startup:
+        for result in time_cold_imports(repeat):
+            results.append(result)
+            log(f"{result['operation']:<40} median {result['median_seconds'] * 1000:10.2f} ms")
+            if result['extra']['heavy_modules_loaded']:
+                log(f"  heavy modules loaded eagerly: {', '.join(result['extra']['heavy_modules_loaded'])}")
+
+    for size in sizes:
+        start = time.perf_counter()
+        df = generate_templates(size, seed=seed)
+        log(f"corpus {size:>9,} rows generated in {time.perf_counter() - start:.2f}s")
+        for operation in build_operations(df):
+            if operations and operation.name not in operations:
+                continue
+            result = time_operation(operation, repeat, budget_seconds)
+            result['rows'] = size
+            results.append(result)
+            log(f"  {operation.name:<22} median {result['median_seconds'] * 1000:10.2f} ms ({result['runs']} runs)")
+
+    return {
+        'schema': RESULTS_SCHEMA_VERSION,
+        'created': datetime.now().isoformat(timespec='seconds'),
+        'seed': seed,
+        'environment': environment_info(),
+        'results': results
+    }
+
+
+def compare_results(
+    current: Dict[str, Any],
+    baseline: Dict[str, Any],
+    threshold: float,
+    min_delta_seconds: float = 0.001
+) -> List[Dict[str, Any]]:
+    """Return operations whose median regressed beyond ``threshold``."""
+    previous = {(r['rows'], r['operation']): r for r in baseline.get('results', [])}
+    regressions = []
+    for result in current['results']:
+        before = previous.get((result['rows'], result['operation']))
+        if before is None or before['median_seconds'] <= 0:
+            continue
+        ratio = result['median_seconds'] / before['median_seconds']
+        delta = result['median_seconds'] - before['median_seconds']
+        if ratio > 1 + threshold and delta > min_delta_seconds:
+            regressions.append({
+                'rows': result['rows'],
+                'operation': result['operation'],
+                'baseline_seconds': before['median_seconds'],
+                'current_seconds': result['median_seconds'],
+                'ratio': ratio
+            })
+    return regressions
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    parser = argparse.ArgumentParser(description=__doc__.split('\n')[0])
+    parser.add_argument('--sizes', default='1k,10k,100k', help="Comma separated corpus sizes: 1k,10k,100k,1m or row counts")
+    parser.add_argument('--operations', default='', help="Comma separated subset of operations to run")
+    parser.add_argument('--repeat', type=int, default=3, help="Maximum runs per operation")
+    parser.add_argument('--budget', type=float, default=10.0, help="Stop repeating an operation after this many seconds")
+    parser.add_argument('--seed', type=int, default=0, help="Corpus generator seed")
+    parser.add_argument('--skip-startup', action='store_true', help="Do not time cold imports of the library")
+    parser.add_argument('--output', default='benchmark_results.json', help="Where to write the JSON results")
+    parser.add_argument('--compare', help="Baseline results file to check for regressions")
+    parser.add_argument('--threshold', type=float, default=0.25, help="Allowed slowdown ratio before flagging a regression")
+    args = parser.parse_args(argv)
+
+    operations = [name.strip() for name in args.operations.split(',') if name.strip()]
+    current = run_benchmarks(
+        parse_sizes(args.sizes), operations, args.repeat, args.budget, args.seed, startup=not args.skip_startup
+    )
+
+    with open(args.output, 'w', encoding='utf-8') as handle:
+        json.dump(current, handle, indent=2)
+    print(f"results written to {args.output}")
+
+    if args.compare:
+        with open(args.compare, encoding='utf-8') as handle:
+            baseline = json.load(handle)
+        regressions = compare_results(current, baseline, args.threshold)
+        for r in regressions:
+            print(
+                f"REGRESSION {r['operation']} @ {r['rows']:,} rows: "
+                f"{r['baseline_seconds'] * 1000:.2f} ms -> {r['current_seconds'] * 1000:.2f} ms (x{r['ratio']:.2f})"
+            )
+        if regressions:
+            return 1
+        print("no regressions")
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
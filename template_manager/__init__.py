@@ -0,0 +1,80 @@
+"""Core, UI-free building blocks for the Code Template Manager.
+
+Importing the package only pulls in pandas; Google Sheets and plotting
+dependencies are imported by the functions that need them.
+"""
+
+from template_manager.analysis import AnalysisCache, analyze_code, analyze_templates
+from template_manager.blobstore import BlobStore, dehydrate, hydrate
+from template_manager.core import (
+    ID_COLUMN,
+    TEMPLATE_COLUMNS,
+    create_sample_data,
+    delete_templates,
+    diff_sheet_values,
+    ensure_template_ids,
+    export_to_csv,
+    export_to_json,
+    filter_templates,
+    format_code_for_display,
+    get_statistics,
+    import_from_csv,
+    import_from_json,
+    new_template_id,
+    search_mask,
+    set_category,
+    sheet_values
+)
+from template_manager.credentials import CredentialsError, ServiceAccount, load_service_account
+from template_manager.facets import FacetIndex, build_facet_index
+from template_manager.merge import resolve_conflicts, snapshot_base, three_way_merge
+from template_manager.perf import PerfLease, PerfRecorder, get_recorder
+from template_manager.similarity import SimilarityIndex
+from template_manager.sync import SyncError, fetch_templates, push_templates
+from template_manager.telemetry import SyncLog, summarize
+from template_manager.workbook import export_to_xlsx, import_from_xlsx
+
+__all__ = [
+    'ID_COLUMN',
+    'TEMPLATE_COLUMNS',
+    'AnalysisCache',
+    'BlobStore',
+    'CredentialsError',
+    'FacetIndex',
+    'PerfLease',
+    'PerfRecorder',
+    'ServiceAccount',
+    'SimilarityIndex',
+    'SyncError',
+    'SyncLog',
+    'analyze_code',
+    'analyze_templates',
+    'build_facet_index',
+    'create_sample_data',
+    'dehydrate',
+    'delete_templates',
+    'diff_sheet_values',
+    'ensure_template_ids',
+    'export_to_csv',
+    'export_to_json',
+    'export_to_xlsx',
+    'fetch_templates',
+    'filter_templates',
+    'format_code_for_display',
+    'get_recorder',
+    'get_statistics',
+    'hydrate',
+    'import_from_csv',
+    'import_from_json',
+    'import_from_xlsx',
+    'load_service_account',
+    'new_template_id',
+    'push_templates',
+    'resolve_conflicts',
+    'search_mask',
+    'set_category',
+    'sheet_values',
+    'snapshot_base',
+    'summarize',
+    'three_way_merge'
+]
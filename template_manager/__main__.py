@@ -0,0 +1,5 @@
+import sys
+
+from template_manager.cli import main
+
+sys.exit(main())
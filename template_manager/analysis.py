@@ -0,0 +1,542 @@
+"""Static analysis of template code, parallelised across processes.
+
+For each template this detects the language, checks syntax (``ast`` for
+Python, a bracket/string/regex/comment scanner that follows JSX elements for
+JavaScript and JSX, an HTML tag balancer that knows HTML5's optional end
+tags), estimates cyclomatic complexity and lists imports. Results are cached
+by content hash, so re-running over a library only analyses bodies that
+changed.
+"""
+
+import ast
+import hashlib
+import json
+import os
+import re
+from collections import OrderedDict
+from concurrent.futures import ProcessPoolExecutor
+from html.parser import HTMLParser
+from typing import Any, Dict, Iterable, List, Optional, Tuple
+
+import pandas as pd
+
+from template_manager.blobstore import CODE_HASH_COLUMN, BlobStore, content_hash
+from template_manager.perf import get_recorder
+
+perf = get_recorder()
+
+ANALYSIS_CACHE_PATH_ENV_VAR = 'TEMPLATE_MANAGER_ANALYSIS_CACHE'
+# Bump whenever analyzer output or cache keys change so cached results are recomputed
+ANALYZER_VERSION = 3
+PARALLEL_THRESHOLD = 200
+ANALYSIS_CACHE_MAX_ENTRIES = 50000
+ANALYSIS_COLUMNS = ['Language', 'SyntaxOK', 'SyntaxError', 'Complexity', 'Imports']
+
+CATEGORY_LANGUAGES = {
+    'Python': 'python',
+    'JavaScript': 'javascript',
+    'React': 'jsx',
+    'Vue': 'html',
+    'HTML/CSS': 'html'
+}
+
+_HTML_VOID_TAGS = {
+    'area', 'base', 'br', 'col', 'embed', 'hr', 'img', 'input', 'link', 'meta',
+    'param', 'source', 'track', 'wbr', '!doctype'
+}
+_HTML_P_CLOSERS = {
+    'address', 'article', 'aside', 'blockquote', 'details', 'dialog', 'div', 'dl',
+    'fieldset', 'figcaption', 'figure', 'footer', 'form', 'h1', 'h2', 'h3', 'h4',
+    'h5', 'h6', 'header', 'hgroup', 'hr', 'main', 'menu', 'nav', 'ol', 'p', 'pre',
+    'section', 'table', 'ul'
+}
+# HTML5 optional end tags: an open element is implicitly closed by these start tags
+_HTML_IMPLIED_END = {
+    'p': _HTML_P_CLOSERS,
+    'li': {'li'},
+    'dt': {'dt', 'dd'},
+    'dd': {'dt', 'dd'},
+    'option': {'option', 'optgroup'},
+    'optgroup': {'optgroup'},
+    'rt': {'rt', 'rp'},
+    'rp': {'rt', 'rp'},
+    'tr': {'tr', 'tbody', 'tfoot'},
+    'td': {'td', 'th', 'tr', 'tbody', 'tfoot'},
+    'th': {'td', 'th', 'tr', 'tbody', 'tfoot'},
+    'thead': {'tbody', 'tfoot'},
+    'tbody': {'tbody', 'tfoot'},
+    'colgroup': {'thead', 'tbody', 'tfoot', 'tr'},
+    'head': {'body'}
+}
+# Elements whose end tag may be left out entirely
+_HTML_OPTIONAL_END = set(_HTML_IMPLIED_END) | {'html', 'body', 'tfoot'}
+_JS_DECISION = re.compile(r'\b(?:if|for|while|case|catch)\b|&&|\|\||\?(?![?.])')
+_JS_IMPORT = re.compile(r'''\bimport\s+(?:[\w*{}\s,]+\s+from\s+)?['"]([^'"]+)['"]|\brequire\(\s*['"]([^'"]+)['"]\s*\)''')
+_PYTHON_HINT = re.compile(r'^\s*(?:def |class |import \w|from [\w.]+ import |@\w)', re.MULTILINE)
+_JS_HINT = re.compile(r'\b(?:const|let|var|function)\b|=>|console\.')
+_JSX_HINT = re.compile(r'<[A-Z]\w*|className=|React')
+
+
+def detect_language(code: str, category: Optional[str] = None) -> str:
+    """Guess the template's language from its category, then its content."""
+    if category in CATEGORY_LANGUAGES:
+        return CATEGORY_LANGUAGES[category]
+    stripped = code.lstrip()
+    if stripped.startswith('<') and not _JS_HINT.search(code):
+        return 'html'
+    if _PYTHON_HINT.search(code) and not _JS_HINT.search(code):
+        return 'python'
+    if _JS_HINT.search(code):
+        return 'jsx' if _JSX_HINT.search(code) else 'javascript'
+    if re.match(r'(?is)\s*(select|insert|update|delete|create)\b', code):
+        return 'sql'
+    return 'text'
+
+
+def _analyze_python(code: str) -> Dict[str, Any]:
+    try:
+        tree = ast.parse(code)
+    except SyntaxError as e:
+        return {'syntax_ok': False, 'syntax_error': f"line {e.lineno}: {e.msg}", 'complexity': None, 'imports': []}
+
+    complexity = 1
+    imports: List[str] = []
+    for node in ast.walk(tree):
+        if isinstance(node, (ast.If, ast.For, ast.AsyncFor, ast.While, ast.IfExp, ast.ExceptHandler, ast.Assert)):
+            complexity += 1
+        elif isinstance(node, ast.BoolOp):
+            complexity += len(node.values) - 1
+        elif isinstance(node, ast.comprehension):
+            complexity += 1 + len(node.ifs)
+        elif isinstance(node, ast.match_case):
+            complexity += 1
+        elif isinstance(node, ast.Import):
+            imports.extend(alias.name for alias in node.names)
+        elif isinstance(node, ast.ImportFrom):
+            imports.append('.' * node.level + (node.module or ''))
+    return {'syntax_ok': True, 'syntax_error': None, 'complexity': complexity, 'imports': imports}
+
+
+_JS_NAME = re.compile(r'[A-Za-z_$][\w$.:-]*')
+# Keywords after which '/' starts a regex and '<' a JSX element
+_JS_EXPRESSION_KEYWORDS = {
+    'return', 'typeof', 'instanceof', 'in', 'of', 'new', 'delete', 'void',
+    'throw', 'case', 'do', 'else', 'yield', 'await'
+}
+
+
+def _expression_expected(stripped: List[str]) -> bool:
+    """Whether the next token starts an expression (so '/' is a regex, '<' JSX)."""
+    i = len(stripped) - 1
+    while i >= 0 and stripped[i].isspace():
+        i -= 1
+    if i < 0:
+        return True
+    last = stripped[i]
+    if last in '(,=:[!&|?{};+-*%<>~^':
+        return True
+    if last.isalnum() or last in '_$':
+        end = i + 1
+        while i >= 0 and (stripped[i].isalnum() or stripped[i] in '_$'):
+            i -= 1
+        return ''.join(stripped[i + 1:end]) in _JS_EXPRESSION_KEYWORDS
+    return False
+
+
+def _scan_js(code: str) -> Tuple[Optional[str], str]:
+    """Check bracket balance outside strings, regex literals, comments and JSX.
+
+    JSX elements are followed tag by tag, so quotes in element text
+    (``<p>Don't</p>``) are plain characters while ``{...}`` children and
+    attribute values are scanned as code again.
+
+    Returns the first error (or None) and the code with strings, comments and
+    JSX text blanked out, for the keyword counts.
+    """
+    pairs = {')': '(', ']': '[', '}': '{'}
+    stack: List[Tuple[str, int]] = []
+    stripped: List[str] = []
+    # ('code',) at the top level, ('expr', depth) inside a JSX {...},
+    # ('tag', name, closing) inside <...> and ('text', name) between tags
+    modes: List[tuple] = [('code',)]
+    i, line, length = 0, 1, len(code)
+
+    def open_tag(start: int) -> int:
+        match = _JS_NAME.match(code, start)
+        name = match.group(0) if match else ''
+        modes.append(('tag', name, False))
+        return match.end() if match else start
+
+    while i < length:
+        ch = code[i]
+        mode = modes[-1]
+
+        if mode[0] == 'tag':
+            if ch in '"\'':
+                end = code.find(ch, i + 1)
+                if end == -1:
+                    return f"line {line}: unterminated string", ''.join(stripped)
+                line += code.count('\n', i, end)
+                i = end + 1
+            elif ch == '{':
+                stack.append(('{', line))
+                modes.append(('expr', len(stack)))
+                i += 1
+            elif ch == '/' and code.startswith('/>', i) and not mode[2]:
+                modes.pop()
+                i += 2
+            elif ch == '>':
+                modes.pop()
+                if mode[2]:
+                    modes.pop()
+                else:
+                    modes.append(('text', mode[1]))
+                i += 1
+            else:
+                line += ch == '\n'
+                i += 1
+            continue
+
+        if mode[0] == 'text':
+            if ch == '{':
+                stack.append(('{', line))
+                modes.append(('expr', len(stack)))
+                i += 1
+            elif ch == '<' and code.startswith('</', i):
+                match = _JS_NAME.match(code, i + 2)
+                name = match.group(0) if match else ''
+                if name != mode[1]:
+                    return f"line {line}: unexpected </{name}>", ''.join(stripped)
+                modes.append(('tag', name, True))
+                i = match.end() if match else i + 2
+            elif ch == '<':
+                i = open_tag(i + 1)
+            else:
+                line += ch == '\n'
+                i += 1
+            continue
+
+        if ch == '\n':
+            line += 1
+        if code.startswith('//', i):
+            end = code.find('\n', i)
+            i = length if end == -1 else end
+            continue
+        if code.startswith('/*', i):
+            end = code.find('*/', i + 2)
+            if end == -1:
+                return f"line {line}: unterminated comment", ''.join(stripped)
+            line += code.count('\n', i, end)
+            i = end + 2
+            continue
+        if ch in '"\'`':
+            j = i + 1
+            while j < length and code[j] != ch:
+                if code[j] == '\\':
+                    j += 1
+                elif code[j] == '\n' and ch != '`':
+                    break
+                j += 1
+            if j >= length or code[j] != ch:
+                return f"line {line}: unterminated string", ''.join(stripped)
+            line += code.count('\n', i, j)
+            stripped.append('""')
+            i = j + 1
+            continue
+        if ch == '/' and _expression_expected(stripped):
+            # Regex literal: ends at the first unescaped '/' outside a [class]
+            j, in_class = i + 1, False
+            while j < length and code[j] != '\n' and (in_class or code[j] != '/'):
+                if code[j] == '\\':
+                    j += 1
+                elif code[j] == '[':
+                    in_class = True
+                elif code[j] == ']':
+                    in_class = False
+                j += 1
+            if j < length and code[j] == '/':
+                j += 1
+                while j < length and code[j].isalpha():
+                    j += 1
+                stripped.append('""')
+                i = j
+                continue
+        if ch == '<' and i + 1 < length and (code[i + 1].isalpha() or code[i + 1] == '>') and _expression_expected(stripped):
+            stripped.append('""')
+            i = open_tag(i + 1)
+            continue
+        if ch in '([{':
+            stack.append((ch, line))
+        elif ch in ')]}':
+            if not stack or stack[-1][0] != pairs[ch]:
+                return f"line {line}: unexpected '{ch}'", ''.join(stripped)
+            stack.pop()
+            if ch == '}' and mode[0] == 'expr' and len(stack) == mode[1] - 1:
+                modes.pop()
+                i += 1
+                continue
+        stripped.append(ch)
+        i += 1
+    if len(modes) > 1:
+        name = next(mode[1] for mode in reversed(modes) if mode[0] in ('tag', 'text'))
+        return f"line {line}: unclosed <{name}>", ''.join(stripped)
+    if stack:
+        return f"line {stack[-1][1]}: unclosed '{stack[-1][0]}'", ''.join(stripped)
+    return None, ''.join(stripped)
+
+
+def _analyze_javascript(code: str) -> Dict[str, Any]:
+    error, stripped = _scan_js(code)
+    imports = [match[0] or match[1] for match in _JS_IMPORT.findall(code)]
+    return {
+        'syntax_ok': error is None,
+        'syntax_error': error,
+        'complexity': 1 + len(_JS_DECISION.findall(stripped)),
+        'imports': imports
+    }
+
+
+class _TagBalancer(HTMLParser):
+    def __init__(self):
+        super().__init__(convert_charrefs=True)
+        self.stack: List[Tuple[str, int]] = []
+        self.error: Optional[str] = None
+        self.imports: List[str] = []
+        self.scripts: List[str] = []
+        self._in_script = False
+
+    def handle_starttag(self, tag, attrs):
+        attrs = dict(attrs)
+        if tag == 'script':
+            self._in_script = True
+            if attrs.get('src'):
+                self.imports.append(attrs['src'])
+        elif tag == 'link' and attrs.get('href'):
+            self.imports.append(attrs['href'])
+        if tag in _HTML_VOID_TAGS:
+            return
+        while self.stack and tag in _HTML_IMPLIED_END.get(self.stack[-1][0], ()):
+            self.stack.pop()
+        self.stack.append((tag, self.getpos()[0]))
+
+    def handle_startendtag(self, tag, attrs):
+        if tag == 'link':
+            href = dict(attrs).get('href')
+            if href:
+                self.imports.append(href)
+
+    def handle_endtag(self, tag):
+        if tag == 'script':
+            self._in_script = False
+        if tag in _HTML_VOID_TAGS or self.error:
+            return
+        open_tags = [name for name, _ in self.stack]
+        if tag not in open_tags:
+            # A stray </p> is valid HTML: it stands for an empty paragraph
+            if tag != 'p':
+                self.error = f"line {self.getpos()[0]}: unexpected </{tag}>"
+            return
+        # Close the element and any open children whose end tags are optional
+        while self.stack[-1][0] != tag:
+            if self.stack[-1][0] not in _HTML_OPTIONAL_END:
+                self.error = f"line {self.getpos()[0]}: unexpected </{tag}>"
+                return
+            self.stack.pop()
+        self.stack.pop()
+
+    def handle_data(self, data):
+        if self._in_script:
+            self.scripts.append(data)
+
+
+def _analyze_html(code: str) -> Dict[str, Any]:
+    parser = _TagBalancer()
+    parser.feed(code)
+    parser.close()
+    error = parser.error
+    unclosed = [(tag, line) for tag, line in parser.stack if tag not in _HTML_OPTIONAL_END]
+    if error is None and unclosed:
+        tag, line = unclosed[-1]
+        error = f"line {line}: unclosed <{tag}>"
+    complexity = 1
+    for script in parser.scripts:
+        complexity += _analyze_javascript(script)['complexity'] - 1
+    return {'syntax_ok': error is None, 'syntax_error': error, 'complexity': complexity, 'imports': parser.imports}
+
+
+def analyze_code(code: str, category: Optional[str] = None) -> Dict[str, Any]:
+    """Analyse one code body."""
+    language = detect_language(code, category)
+    if language == 'python':
+        result = _analyze_python(code)
+    elif language in ('javascript', 'jsx'):
+        result = _analyze_javascript(code)
+    elif language == 'html':
+        result = _analyze_html(code)
+    else:
+        result = {'syntax_ok': None, 'syntax_error': None, 'complexity': None, 'imports': []}
+    result['language'] = language
+    return result
+
+
+def _analyze_task(task: Tuple[str, str, Optional[str]]) -> Tuple[str, Dict[str, Any]]:
+    key, code, category = task
+    return key, analyze_code(code, category)
+
+
+def analysis_key(code: str, category: Optional[str]) -> str:
+    """Cache key for a body analysed under a category."""
+    return digest_analysis_key(content_hash(code), category)
+
+
+def digest_analysis_key(digest: str, category: Optional[str]) -> str:
+    """Cache key for a body, given its blob digest, analysed under a category."""
+    text = f"{ANALYZER_VERSION}\x1f{category or ''}\x1f{digest}"
+    return hashlib.sha256(text.encode('utf-8')).hexdigest()
+
+
+class AnalysisCache:
+    """Analysis results keyed by content hash, optionally persisted as JSON lines.
+
+    At most ``max_entries`` results are kept, least recently used first out.
+    ``save`` appends only results added since the last save; the file is
+    rewritten from the live entries once it holds twice ``max_entries`` lines,
+    or when it was written by another analyzer version.
+    """
+
+    def __init__(self, path: Optional[str] = None, max_entries: int = ANALYSIS_CACHE_MAX_ENTRIES):
+        self.path = path
+        self.max_entries = max(1, max_entries)
+        self.results: 'OrderedDict[str, Dict[str, Any]]' = OrderedDict()
+        self._unsaved: Dict[str, Dict[str, Any]] = {}
+        self._file_lines = 0
+        self._rewrite = bool(path)
+        if path and os.path.exists(path):
+            self._load()
+
+    def _load(self):
+        with open(self.path, encoding='utf-8') as handle:
+            header = handle.readline()
+            try:
+                version = json.loads(header).get('version') if header.strip() else None
+            except ValueError:
+                version = None
+            if version != ANALYZER_VERSION:
+                return
+            self._rewrite = False
+            self._file_lines = 1
+            for line in handle:
+                self._file_lines += 1
+                try:
+                    record = json.loads(line)
+                except ValueError:
+                    # Torn final line from an interrupted save
+                    continue
+                self.results[record['key']] = record['result']
+                self.results.move_to_end(record['key'])
+                if len(self.results) > self.max_entries:
+                    self.results.popitem(last=False)
+
+    def get(self, key: str) -> Optional[Dict[str, Any]]:
+        """Return a cached result, marking it recently used."""
+        result = self.results.get(key)
+        if result is not None:
+            self.results.move_to_end(key)
+        return result
+
+    def update(self, items: Iterable[Tuple[str, Dict[str, Any]]]):
+        """Add results, evicting the least recently used beyond ``max_entries``."""
+        for key, result in items:
+            self.results[key] = result
+            self.results.move_to_end(key)
+            self._unsaved[key] = result
+        while len(self.results) > self.max_entries:
+            key, _ = self.results.popitem(last=False)
+            self._unsaved.pop(key, None)
+
+    def save(self):
+        if not self.path:
+            return
+        if self._rewrite or self._file_lines + len(self._unsaved) > 2 * self.max_entries:
+            tmp_path = f"{self.path}.tmp"
+            with open(tmp_path, 'w', encoding='utf-8') as handle:
+                handle.write(json.dumps({'version': ANALYZER_VERSION}) + '\n')
+                for key, result in self.results.items():
+                    handle.write(json.dumps({'key': key, 'result': result}) + '\n')
+            os.replace(tmp_path, self.path)
+            self._file_lines = len(self.results) + 1
+            self._rewrite = False
+        elif self._unsaved:
+            with open(self.path, 'a', encoding='utf-8') as handle:
+                handle.write(''.join(
+                    json.dumps({'key': key, 'result': result}) + '\n' for key, result in self._unsaved.items()
+                ))
+            self._file_lines += len(self._unsaved)
+        self._unsaved = {}
+
+
+def analyze_templates(
+    df: pd.DataFrame,
+    cache: Optional[AnalysisCache] = None,
+    max_workers: Optional[int] = None,
+    parallel_threshold: int = PARALLEL_THRESHOLD,
+    blob_store: Optional[BlobStore] = None
+) -> pd.DataFrame:
+    """Analyse every template, returning ANALYSIS_COLUMNS aligned to ``df.index``.
+
+    Only bodies missing from ``cache`` are analysed; when there are at least
+    ``parallel_threshold`` of them they are spread over a process pool. A
+    frame holding CodeHash references is analysed through ``blob_store``,
+    which is read only for bodies not in the cache.
+    """
+    cache = cache if cache is not None else AnalysisCache()
+    dehydrated = 'Code' not in df.columns and CODE_HASH_COLUMN in df.columns and blob_store is not None
+    if not (dehydrated or 'Code' in df.columns) or len(df) == 0:
+        return pd.DataFrame(columns=ANALYSIS_COLUMNS, index=df.index)
+
+    if dehydrated:
+        codes = None
+        digests = df[CODE_HASH_COLUMN].tolist()
+    else:
+        codes = df['Code'].astype(str).tolist()
+        digests = [content_hash(code) for code in codes]
+    categories = df['Category'].astype(str).tolist() if 'Category' in df.columns else [None] * len(df)
+
+    with perf.span('analysis'):
+        keys: List[str] = []
+        found: Dict[str, Dict[str, Any]] = {}
+        pending: Dict[str, Tuple[str, str, Optional[str]]] = {}
+        for position, (digest, category) in enumerate(zip(digests, categories)):
+            key = digest_analysis_key(digest, category)
+            keys.append(key)
+            if key in found or key in pending:
+                continue
+            cached = cache.get(key)
+            if cached is None:
+                code = codes[position] if codes is not None else blob_store.get(digest)
+                pending[key] = (key, code, category)
+            else:
+                found[key] = cached
+
+        if pending:
+            tasks: Iterable[Tuple[str, str, Optional[str]]] = pending.values()
+            if len(pending) >= parallel_threshold and (max_workers or os.cpu_count() or 1) > 1:
+                with ProcessPoolExecutor(max_workers=max_workers) as pool:
+                    chunksize = max(1, len(pending) // ((max_workers or os.cpu_count() or 1) * 4))
+                    completed = list(pool.map(_analyze_task, tasks, chunksize=chunksize))
+            else:
+                completed = [_analyze_task(task) for task in tasks]
+            found.update(completed)
+            cache.update(completed)
+            cache.save()
+            perf.count('analysis_templates', len(pending), result='analysed')
+        perf.count('analysis_templates', len(keys) - len(pending), result='cached')
+
+        results = [found[key] for key in keys]
+        return pd.DataFrame({
+            'Language': [r['language'] for r in results],
+            'SyntaxOK': [r['syntax_ok'] for r in results],
+            'SyntaxError': [r['syntax_error'] for r in results],
+            'Complexity': [r['complexity'] for r in results],
+            'Imports': [', '.join(r['imports']) for r in results]
+        }, index=df.index)
@@ -0,0 +1,325 @@
+"""Read-only HTTP API over a local template cache.
+
+Serves the JSON file written by ``python -m template_manager fetch`` so
+request latency never depends on the Sheets API::
+
+    python -m template_manager serve --data templates.json --port 8080
+
+Endpoints (all GET, JSON):
+
+- ``/templates?page=&per_page=&q=&category=&sort=&include_code=``; without
+  ``category`` every category is listed
+- ``/templates/search?q=...`` (same parameters, ``q`` required)
+- ``/templates/<Number>``
+- ``/categories`` and ``/categories/<name>/templates``
+- ``/health`` and ``/metrics`` (Prometheus text; set ``TEMPLATE_MANAGER_PERF=1``)
+
+Every response carries an ETag derived from the cache file's content hash;
+``If-None-Match`` yields ``304 Not Modified``. Bodies are gzip-compressed
+when the client accepts it.
+
+With ``--blob-store`` the cache may hold CodeHash references instead of
+inline Code; bodies are then read from the store only for responses that
+include code, and for the first search that has to look inside code.
+"""
+
+import gzip
+import hashlib
+import json
+import os
+import threading
+import traceback
+from http import HTTPStatus
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Any, Dict, List, Optional, Tuple
+from urllib.parse import parse_qs, unquote, urlsplit
+
+import pandas as pd
+
+from template_manager.blobstore import CODE_HASH_COLUMN, BlobStore, hydrate
+from template_manager.core import filter_templates, import_from_json
+from template_manager.perf import get_recorder
+
+perf = get_recorder()
+
+DEFAULT_PER_PAGE = 50
+MAX_PER_PAGE = 500
+GZIP_MIN_BYTES = 1024
+QUERY_CACHE_MAX_ENTRIES = 256
+
+
+class ApiError(Exception):
+    """An error turned into a JSON error response."""
+
+    def __init__(self, status: HTTPStatus, message: str):
+        super().__init__(message)
+        self.status = status
+
+
+class TemplateSnapshot:
+    """An immutable, indexed view of one version of the cache file."""
+
+    def __init__(self, df: pd.DataFrame, version: str, blob_store: Optional[BlobStore] = None):
+        self.version = version
+        self.df = df.reset_index(drop=True)
+        self.blob_store = blob_store if CODE_HASH_COLUMN in self.df.columns else None
+        self._search_df: Optional[pd.DataFrame] = None if self.blob_store else self.df
+        clean = self.df.astype(object).where(self.df.notna(), None)
+        self.records: List[Dict[str, Any]] = clean.to_dict(orient='records')
+        self.by_number: Dict[str, int] = {}
+        if 'Number' in self.df.columns:
+            for position, number in enumerate(self.df['Number'].tolist()):
+                self.by_number.setdefault(str(number), position)
+        self.categories: List[Dict[str, Any]] = []
+        if 'Category' in self.df.columns:
+            counts = self.df['Category'].value_counts(sort=False)
+            self.categories = [
+                {'name': name, 'count': int(count)} for name, count in sorted(counts.items(), key=lambda item: str(item[0]))
+            ]
+        self._query_cache: Dict[Tuple[str, Optional[str], str], List[int]] = {}
+        self._lock = threading.Lock()
+
+    def positions(self, search_query: str, category: Optional[str], sort_by: str) -> List[int]:
+        """Return row positions matching a query, memoised for this version.
+
+        ``category=None`` applies no category filter.
+        """
+        key = (search_query, category, sort_by)
+        with self._lock:
+            cached = self._query_cache.get(key)
+        if cached is not None:
+            return cached
+        if not search_query and category is None and not sort_by:
+            positions = list(range(len(self.records)))
+        else:
+            frame = self.search_frame() if search_query else self.df
+            try:
+                positions = filter_templates(frame, search_query, category, sort_by or None).index.tolist()
+            except TypeError as e:
+                # Mixed types in the sort column (e.g. numbers and text)
+                raise ApiError(HTTPStatus.BAD_REQUEST, f"Cannot sort by '{sort_by}': its values are not comparable") from e
+        with self._lock:
+            if len(self._query_cache) >= QUERY_CACHE_MAX_ENTRIES:
+                self._query_cache.clear()
+            self._query_cache[key] = positions
+        return positions
+
+    def search_frame(self) -> pd.DataFrame:
+        """Return the frame searched by ``q``, resolving code references once."""
+        if self._search_df is None:
+            with perf.span('api.hydrate'):
+                frame = hydrate(self.df, self.blob_store)
+            with self._lock:
+                self._search_df = frame
+        return self._search_df
+
+    def record(self, position: int, include_code: bool = True) -> Dict[str, Any]:
+        """Return one row, with its code loaded lazily from the blob store."""
+        record = self.records[position]
+        if include_code and self.blob_store is not None and record.get(CODE_HASH_COLUMN):
+            record = dict(record)
+            try:
+                record['Code'] = self.blob_store.get(record[CODE_HASH_COLUMN])
+            except KeyError:
+                raise ApiError(HTTPStatus.INTERNAL_SERVER_ERROR, f"Code blob {record[CODE_HASH_COLUMN]} is missing")
+        elif not include_code and 'Code' in record:
+            record = {key: value for key, value in record.items() if key != 'Code'}
+        return record
+
+
+class TemplateStore:
+    """Loads the cache file and reloads it when it changes on disk."""
+
+    def __init__(self, path: str, blob_store: Optional[BlobStore] = None):
+        self.path = path
+        self.blob_store = blob_store
+        self._stat: Optional[Tuple[int, int]] = None
+        self._snapshot: Optional[TemplateSnapshot] = None
+        self._lock = threading.Lock()
+
+    def snapshot(self) -> TemplateSnapshot:
+        """Return the current snapshot, reloading if the file changed."""
+        try:
+            stat = os.stat(self.path)
+        except OSError as e:
+            raise ApiError(HTTPStatus.SERVICE_UNAVAILABLE, f"Template cache unavailable: {e.strerror}") from e
+        key = (stat.st_mtime_ns, stat.st_size)
+        with self._lock:
+            if self._snapshot is None or key != self._stat:
+                with perf.span('api.reload'):
+                    with open(self.path, 'rb') as handle:
+                        raw = handle.read()
+                    try:
+                        df = import_from_json(raw.decode('utf-8'))
+                    except ValueError as e:
+                        raise ApiError(HTTPStatus.SERVICE_UNAVAILABLE, f"Template cache is invalid: {e}") from e
+                    self._snapshot = TemplateSnapshot(df, hashlib.sha256(raw).hexdigest()[:16], self.blob_store)
+                    self._stat = key
+            return self._snapshot
+
+
+def _int_param(params: Dict[str, List[str]], name: str, default: int, minimum: int, maximum: int) -> int:
+    values = params.get(name)
+    if not values:
+        return default
+    try:
+        value = int(values[0])
+    except ValueError:
+        raise ApiError(HTTPStatus.BAD_REQUEST, f"'{name}' must be an integer")
+    if not minimum <= value <= maximum:
+        raise ApiError(HTTPStatus.BAD_REQUEST, f"'{name}' must be between {minimum} and {maximum}")
+    return value
+
+
+def _param(params: Dict[str, List[str]], name: str, default: Optional[str] = '') -> Optional[str]:
+    values = params.get(name)
+    return values[0] if values else default
+
+
+def paginate(snapshot: TemplateSnapshot, params: Dict[str, List[str]], category: Optional[str] = None, require_query: bool = False) -> Dict[str, Any]:
+    """Build one page of list or search results."""
+    search_query = _param(params, 'q')
+    if require_query and not search_query:
+        raise ApiError(HTTPStatus.BAD_REQUEST, "'q' is required")
+    category = _param(params, 'category', category)
+    sort_by = _param(params, 'sort')
+    if sort_by and sort_by not in snapshot.df.columns:
+        raise ApiError(HTTPStatus.BAD_REQUEST, f"Cannot sort by '{sort_by}'")
+    page = _int_param(params, 'page', 1, 1, 10 ** 9)
+    per_page = _int_param(params, 'per_page', DEFAULT_PER_PAGE, 1, MAX_PER_PAGE)
+    include_code = _param(params, 'include_code').lower() in ('1', 'true', 'yes')
+
+    positions = snapshot.positions(search_query, category, sort_by)
+    start = (page - 1) * per_page
+    items = []
+    for position in positions[start:start + per_page]:
+        items.append(snapshot.record(position, include_code))
+
+    return {
+        'items': items,
+        'page': page,
+        'per_page': per_page,
+        'total': len(positions),
+        'pages': (len(positions) + per_page - 1) // per_page
+    }
+
+
+def route(snapshot: TemplateSnapshot, path: str, params: Dict[str, List[str]]) -> Any:
+    """Resolve a request path to a JSON-serialisable payload."""
+    parts = [unquote(part) for part in path.strip('/').split('/') if part]
+
+    if parts == ['templates']:
+        return paginate(snapshot, params)
+    if parts == ['templates', 'search']:
+        return paginate(snapshot, params, require_query=True)
+    if len(parts) == 2 and parts[0] == 'templates':
+        position = snapshot.by_number.get(parts[1])
+        if position is None:
+            raise ApiError(HTTPStatus.NOT_FOUND, f"Template {parts[1]} not found")
+        return snapshot.record(position)
+    if parts == ['categories']:
+        return {'items': snapshot.categories}
+    if len(parts) == 3 and parts[0] == 'categories' and parts[2] == 'templates':
+        if not any(category['name'] == parts[1] for category in snapshot.categories):
+            raise ApiError(HTTPStatus.NOT_FOUND, f"Category {parts[1]} not found")
+        return paginate(snapshot, params, category=parts[1])
+    if parts == ['health']:
+        return {'status': 'ok', 'version': snapshot.version, 'templates': len(snapshot.records)}
+    raise ApiError(HTTPStatus.NOT_FOUND, f"No route for /{'/'.join(parts)}")
+
+
+class TemplateRequestHandler(BaseHTTPRequestHandler):
+    """Serves the routes above from ``server.store``."""
+
+    server_version = 'TemplateManagerAPI/1.0'
+    protocol_version = 'HTTP/1.1'
+
+    def do_GET(self):
+        url = urlsplit(self.path)
+        with perf.span('api.request'):
+            if url.path == '/metrics':
+                self._send(HTTPStatus.OK, get_recorder().to_prometheus().encode('utf-8'), 'text/plain; version=0.0.4')
+                return
+            try:
+                snapshot = self.server.store.snapshot()
+                etag = f'"{snapshot.version}"'
+                if self._etag_matches(snapshot.version):
+                    self._send(HTTPStatus.NOT_MODIFIED, b'', etag=etag)
+                    return
+                payload = route(snapshot, url.path, parse_qs(url.query))
+            except ApiError as e:
+                self._send_error(e.status, str(e))
+                return
+            except Exception:
+                self.log_error("Unhandled error serving %s:\n%s", self.path, traceback.format_exc())
+                self._send_error(HTTPStatus.INTERNAL_SERVER_ERROR, "Internal server error")
+                return
+            body = json.dumps(payload, default=str, separators=(',', ':')).encode('utf-8')
+            self._send(HTTPStatus.OK, body, 'application/json', etag=etag)
+
+    def _send_error(self, status: HTTPStatus, message: str):
+        self._send(status, json.dumps({'error': message}).encode('utf-8'), 'application/json')
+
+    def _etag_matches(self, version: str) -> bool:
+        header = self.headers.get('If-None-Match')
+        if not header:
+            return False
+        if header.strip() == '*':
+            return True
+        for tag in header.split(','):
+            tag = tag.strip()
+            if tag.startswith('W/'):
+                tag = tag[2:]
+            if tag.strip('"').removesuffix('-gzip') == version:
+                return True
+        return False
+
+    def _send(self, status: HTTPStatus, body: bytes, content_type: Optional[str] = None, etag: Optional[str] = None):
+        gzipped = (
+            status == HTTPStatus.OK
+            and len(body) >= GZIP_MIN_BYTES
+            and 'gzip' in self.headers.get('Accept-Encoding', '')
+        )
+        if gzipped:
+            body = gzip.compress(body, compresslevel=5)
+            if etag:
+                etag = f'{etag[:-1]}-gzip"'
+
+        self.send_response(status)
+        if content_type:
+            self.send_header('Content-Type', content_type)
+        if etag:
+            self.send_header('ETag', etag)
+            self.send_header('Cache-Control', 'no-cache')
+        self.send_header('Vary', 'Accept-Encoding')
+        if gzipped:
+            self.send_header('Content-Encoding', 'gzip')
+        self.send_header('Content-Length', str(len(body)))
+        self.end_headers()
+        if body and self.command != 'HEAD':
+            self.wfile.write(body)
+
+    def do_HEAD(self):
+        self.do_GET()
+
+    def log_message(self, format: str, *args):
+        if not getattr(self.server, 'quiet', False):
+            super().log_message(format, *args)
+
+    def log_error(self, format: str, *args):
+        # Errors are logged even with --quiet
+        super().log_message(format, *args)
+
+
+def create_server(
+    data_path: str,
+    host: str = '127.0.0.1',
+    port: int = 8080,
+    quiet: bool = False,
+    blob_store: Optional[BlobStore] = None
+) -> ThreadingHTTPServer:
+    """Create (but do not start) an API server over ``data_path``."""
+    server = ThreadingHTTPServer((host, port), TemplateRequestHandler)
+    server.store = TemplateStore(data_path, blob_store)
+    server.quiet = quiet
+    return server
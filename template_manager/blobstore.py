@@ -0,0 +1,203 @@
+"""Content-addressed storage for template code bodies.
+
+Bodies are keyed by the SHA-256 of their UTF-8 text and stored once under
+``<root>/<first two hex chars>/<digest>[.zst|.gz]``. Rows then carry only the
+digest in a ``CodeHash`` column, so identical bodies are shared, unchanged
+bodies are never rewritten, and a body is read only when something actually
+needs it. Blobs no cache file references any more are removed with
+``python -m template_manager gc-blobs``.
+
+The dashboard keeps its session frames dehydrated against the store from
+``open_blob_store`` and loads bodies only where code is shown, searched or
+exported. That store is referenced by live sessions rather than cache files,
+so do not point ``gc-blobs`` at it.
+
+zstd compression uses the optional ``zstandard`` package and falls back to
+gzip when it is not installed.
+"""
+
+import gzip
+import hashlib
+import os
+import re
+import tempfile
+from functools import lru_cache
+from typing import Dict, Iterable, Optional
+
+import pandas as pd
+
+CODE_HASH_COLUMN = 'CodeHash'
+COMPRESSIONS = ('auto', 'zstd', 'gzip', 'none')
+BLOB_STORE_PATH_ENV_VAR = 'TEMPLATE_MANAGER_BLOB_STORE'
+DEFAULT_BLOB_STORE_PATH = os.path.join(os.path.expanduser('~'), '.template_manager', 'blobs')
+LENGTH_CACHE_MAX_ENTRIES = 65536
+_SUFFIXES = {'zstd': '.zst', 'gzip': '.gz', 'none': ''}
+_PREFIX_PATTERN = re.compile(r'[0-9a-f]{2}')
+_BLOB_PATTERN = re.compile(r'([0-9a-f]{64})(?:\.zst|\.gz)?')
+
+try:
+    import zstandard
+except ImportError:
+    zstandard = None
+
+
+def content_hash(text: str) -> str:
+    """Return the blob key for a code body."""
+    return hashlib.sha256(text.encode('utf-8')).hexdigest()
+
+
+class BlobStore:
+    """A directory of immutable, content-addressed code bodies."""
+
+    def __init__(self, root: str, compression: str = 'auto', cache_size: int = 1024):
+        if compression not in COMPRESSIONS:
+            raise ValueError(f"Unknown compression: {compression}")
+        if compression == 'auto':
+            compression = 'zstd' if zstandard is not None else 'gzip'
+        elif compression == 'zstd' and zstandard is None:
+            raise ValueError("zstd compression requires the 'zstandard' package")
+        self.root = root
+        self.compression = compression
+        self.get = lru_cache(maxsize=cache_size)(self._read)
+        self._lengths: Dict[str, int] = {}
+
+    def _path(self, digest: str, compression: str) -> str:
+        return os.path.join(self.root, digest[:2], digest + _SUFFIXES[compression])
+
+    def _find(self, digest: str) -> Optional[str]:
+        """Locate a blob whatever compression it was written with."""
+        for compression in (self.compression, 'zstd', 'gzip', 'none'):
+            path = self._path(digest, compression)
+            if os.path.exists(path):
+                return path
+        return None
+
+    def __contains__(self, digest: str) -> bool:
+        return self._find(digest) is not None
+
+    def put(self, text: str, digest: Optional[str] = None) -> str:
+        """Store a body if it is not stored yet and return its digest."""
+        digest = digest or content_hash(text)
+        self._remember_length(digest, len(text))
+        if digest in self:
+            return digest
+
+        data = text.encode('utf-8')
+        if self.compression == 'zstd':
+            data = zstandard.ZstdCompressor(level=10).compress(data)
+        elif self.compression == 'gzip':
+            data = gzip.compress(data, compresslevel=6)
+
+        path = self._path(digest, self.compression)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        fd, tmp_path = tempfile.mkstemp(dir=os.path.dirname(path), suffix='.tmp')
+        with os.fdopen(fd, 'wb') as handle:
+            handle.write(data)
+        os.replace(tmp_path, path)
+        return digest
+
+    def _remember_length(self, digest: str, length: int):
+        if len(self._lengths) >= LENGTH_CACHE_MAX_ENTRIES:
+            self._lengths.clear()
+        self._lengths[digest] = length
+
+    def length(self, digest: str) -> int:
+        """Character count of a body, read only if it was not stored or read here before."""
+        length = self._lengths.get(digest)
+        if length is None:
+            length = len(self.get(digest))
+        return length
+
+    def _read(self, digest: str) -> str:
+        path = self._find(digest)
+        if path is None:
+            raise KeyError(digest)
+        if path.endswith('.zst'):
+            if zstandard is None:
+                raise ValueError("Reading zstd blobs requires the 'zstandard' package")
+            with open(path, 'rb') as handle:
+                text = zstandard.ZstdDecompressor().decompress(handle.read()).decode('utf-8')
+        elif path.endswith('.gz'):
+            with gzip.open(path, 'rb') as handle:
+                text = handle.read().decode('utf-8')
+        else:
+            with open(path, 'rb') as handle:
+                text = handle.read().decode('utf-8')
+        self._remember_length(digest, len(text))
+        return text
+
+    def garbage_collect(self, live: Iterable[str]) -> int:
+        """Delete blobs not in ``live``; returns the number removed.
+
+        Only files laid out as blobs (``<root>/<xx>/<digest>[.zst|.gz]`` with
+        ``xx`` the digest's first two characters) are considered, so anything
+        else sharing the directory is left alone.
+        """
+        live = set(live)
+        removed = 0
+        with os.scandir(self.root) as prefixes:
+            for prefix in prefixes:
+                if not _PREFIX_PATTERN.fullmatch(prefix.name) or not prefix.is_dir(follow_symlinks=False):
+                    continue
+                with os.scandir(prefix.path) as entries:
+                    for entry in entries:
+                        match = _BLOB_PATTERN.fullmatch(entry.name)
+                        if match is None or not entry.is_file(follow_symlinks=False):
+                            continue
+                        digest = match.group(1)
+                        if digest[:2] == prefix.name and digest not in live:
+                            os.remove(entry.path)
+                            removed += 1
+        self.get.cache_clear()
+        self._lengths.clear()
+        return removed
+
+
+def dehydrate(df: pd.DataFrame, store: BlobStore) -> pd.DataFrame:
+    """Return a copy of ``df`` with Code replaced by a CodeHash reference.
+
+    Each distinct body is hashed and written at most once, and bodies already
+    in the store are not rewritten. Missing code is stored as an empty body.
+    """
+    if 'Code' not in df.columns:
+        return df
+    digests: Dict[str, str] = {}
+    hashes = []
+    for code in df['Code'].tolist():
+        code = '' if pd.isna(code) else str(code)
+        digest = digests.get(code)
+        if digest is None:
+            digest = digests[code] = store.put(code)
+        hashes.append(digest)
+    result = df.drop(columns=['Code'])
+    result.insert(min(df.columns.get_loc('Code'), len(result.columns)), CODE_HASH_COLUMN, hashes)
+    return result
+
+
+def hydrate(df: pd.DataFrame, store: BlobStore) -> pd.DataFrame:
+    """Return a copy of ``df`` with CodeHash references resolved back to Code."""
+    if CODE_HASH_COLUMN not in df.columns:
+        return df
+    position = df.columns.get_loc(CODE_HASH_COLUMN)
+    codes = [store.get(digest) for digest in df[CODE_HASH_COLUMN].tolist()]
+    result = df.drop(columns=[CODE_HASH_COLUMN])
+    result.insert(position, 'Code', codes)
+    return result
+
+
+def code_search_mask(df: pd.DataFrame, store: BlobStore, query: str) -> pd.Series:
+    """Mask of rows whose referenced body contains ``query`` (case-insensitive).
+
+    Each distinct body is read once, through the store's cache.
+    """
+    if CODE_HASH_COLUMN not in df.columns:
+        return pd.Series(False, index=df.index)
+    pattern = query.upper()
+    digests = df[CODE_HASH_COLUMN]
+    hits = {digest: pattern in store.get(digest).upper() for digest in digests.unique().tolist()}
+    return digests.map(hits).astype(bool)
+
+
+def open_blob_store(cache_size: int = 1024) -> BlobStore:
+    """The store at $TEMPLATE_MANAGER_BLOB_STORE, or the default path under the home directory."""
+    return BlobStore(os.environ.get(BLOB_STORE_PATH_ENV_VAR) or DEFAULT_BLOB_STORE_PATH, cache_size=cache_size)
@@ -0,0 +1,322 @@
+"""Headless command-line interface for batch jobs and CI.
+
+Examples::
+
+    python -m template_manager fetch --credentials key.json -o templates.json
+    python -m template_manager import a.json b.csv --renumber -o merged.json
+    python -m template_manager export templates.json --format csv -o -
+    python -m template_manager export templates.json -o templates.xlsx
+    cat templates.json | python -m template_manager stats -
+    python -m template_manager push merged.json --credentials key.json
+    python -m template_manager serve --data templates.json --port 8080
+    python -m template_manager gc-blobs templates.json --blob-store blobs
+    python -m template_manager sync-health --since-hours 24
+
+Exit codes: 0 on success, 1 when an operation fails, 2 for usage errors.
+"""
+
+import argparse
+import functools
+import json
+import os
+import sys
+from concurrent.futures import ProcessPoolExecutor
+from datetime import datetime, timedelta, timezone
+from typing import Any, Callable, Dict, List, Optional
+
+import pandas as pd
+
+from template_manager.blobstore import CODE_HASH_COLUMN, COMPRESSIONS, BlobStore
+from template_manager.core import get_statistics
+from template_manager.credentials import (
+    CREDENTIALS_ENV_VAR,
+    CredentialsError,
+    ServiceAccount,
+    load_service_account_file
+)
+from template_manager.files import FORMATS, STDIO_PATH, read_templates, write_templates
+from template_manager.sync import (
+    GOOGLE_SHEETS_ID,
+    GOOGLE_SHEETS_SHEET_NAME,
+    SyncError,
+    fetch_templates,
+    push_templates
+)
+from template_manager.telemetry import (
+    SYNC_LOG_PATH_ENV_VAR,
+    SyncLog,
+    open_sync_log,
+    quota_usage,
+    summarize
+)
+
+EXIT_OK = 0
+EXIT_FAILURE = 1
+EXIT_USAGE = 2
+
+
+class CommandError(Exception):
+    """A failure reported to the user with a non-zero exit code."""
+
+
+def load_credentials(path: Optional[str]) -> ServiceAccount:
+    """Load a service-account key from a path or $GOOGLE_APPLICATION_CREDENTIALS."""
+    path = path or os.environ.get(CREDENTIALS_ENV_VAR)
+    if not path:
+        raise CommandError(f"No credentials given; pass --credentials or set {CREDENTIALS_ENV_VAR}")
+    try:
+        return load_service_account_file(path)
+    except CredentialsError as e:
+        raise CommandError(str(e)) from e
+
+
+def open_blob_store(args: argparse.Namespace) -> Optional[BlobStore]:
+    """Open the --blob-store directory, if one was given."""
+    if not getattr(args, 'blob_store', None):
+        return None
+    try:
+        return BlobStore(args.blob_store, args.compression)
+    except (OSError, ValueError) as e:
+        raise CommandError(f"Cannot open blob store {args.blob_store}: {e}") from e
+
+
+def open_log(args: argparse.Namespace) -> SyncLog:
+    """Open the --sync-log file, else $TEMPLATE_MANAGER_SYNC_LOG or the default log."""
+    return SyncLog(args.sync_log) if args.sync_log else open_sync_log()
+
+
+def _read_input(path: str, fmt: Optional[str], blob_dir: Optional[str] = None, compression: str = 'auto') -> pd.DataFrame:
+    # Worker processes get the store directory rather than a BlobStore instance
+    return read_templates(path, fmt, BlobStore(blob_dir, compression) if blob_dir else None)
+
+
+def _file_statistics(path: str, fmt: Optional[str], blob_dir: Optional[str] = None, compression: str = 'auto') -> Dict[str, Any]:
+    return get_statistics(_read_input(path, fmt, blob_dir, compression))
+
+
+def input_reader(args: argparse.Namespace, func: Callable = _read_input) -> Callable[[str, Optional[str]], Any]:
+    """Bind the blob-store options to a picklable per-input function."""
+    return functools.partial(func, blob_dir=getattr(args, 'blob_store', None), compression=getattr(args, 'compression', 'auto'))
+
+
+def map_inputs(func: Callable[[str, Optional[str]], Any], paths: List[str], fmt: Optional[str], jobs: int) -> List[Any]:
+    """Apply ``func(path, fmt)`` to every input, in parallel across processes when jobs > 1.
+
+    Standard input is always handled in this process; results keep input order.
+    """
+    if paths.count(STDIO_PATH) > 1:
+        raise CommandError("Standard input can only be read once")
+
+    results: Dict[int, Any] = {}
+    file_inputs = [(i, path) for i, path in enumerate(paths) if path != STDIO_PATH]
+    try:
+        if jobs > 1 and len(file_inputs) > 1:
+            with ProcessPoolExecutor(max_workers=min(jobs, len(file_inputs))) as pool:
+                futures = {i: pool.submit(func, path, fmt) for i, path in file_inputs}
+                for i, path in file_inputs:
+                    results[i] = futures[i].result()
+        else:
+            for i, path in file_inputs:
+                results[i] = func(path, fmt)
+        if STDIO_PATH in paths:
+            results[paths.index(STDIO_PATH)] = func(STDIO_PATH, fmt)
+    except ValueError as e:
+        raise CommandError(str(e)) from e
+
+    return [results[i] for i in range(len(paths))]
+
+
+def combine_templates(frames: List[pd.DataFrame], renumber: bool = False) -> pd.DataFrame:
+    """Concatenate template tables, optionally renumbering from 1."""
+    df = pd.concat(frames, ignore_index=True) if frames else pd.DataFrame()
+    if renumber and len(df):
+        df['Number'] = range(1, len(df) + 1)
+    return df
+
+
+def _write(df: pd.DataFrame, args: argparse.Namespace):
+    blob_store = open_blob_store(args)
+    try:
+        write_templates(df, args.output, args.format, blob_store)
+    except (OSError, ValueError) as e:
+        raise CommandError(f"Cannot write {args.output}: {e}") from e
+
+
+def cmd_fetch(args: argparse.Namespace) -> int:
+    credentials = load_credentials(args.credentials)
+    try:
+        df = fetch_templates(credentials, args.sheet_id, args.sheet_name, sync_log=open_log(args))
+    except SyncError as e:
+        raise CommandError(str(e)) from e
+    if df is None:
+        raise CommandError("The worksheet is empty")
+    _write(df, args)
+    print(f"Fetched {len(df)} templates", file=sys.stderr)
+    return EXIT_OK
+
+
+def cmd_push(args: argparse.Namespace) -> int:
+    df = combine_templates(map_inputs(input_reader(args), args.inputs, args.input_format, args.jobs), args.renumber)
+    if args.dry_run:
+        print(f"Would push {len(df)} templates", file=sys.stderr)
+        return EXIT_OK
+    credentials = load_credentials(args.credentials)
+    try:
+        push_templates(credentials, df, args.sheet_id, args.sheet_name, sync_log=open_log(args))
+    except SyncError as e:
+        raise CommandError(str(e)) from e
+    print(f"Pushed {len(df)} templates", file=sys.stderr)
+    return EXIT_OK
+
+
+def cmd_import(args: argparse.Namespace) -> int:
+    frames = map_inputs(input_reader(args), args.inputs, args.input_format, args.jobs)
+    df = combine_templates(frames, args.renumber)
+    _write(df, args)
+    verb = 'Exported' if args.command == 'export' else 'Imported'
+    print(f"{verb} {len(df)} templates from {len(frames)} file(s)", file=sys.stderr)
+    return EXIT_OK
+
+
+def cmd_stats(args: argparse.Namespace) -> int:
+    if args.combined:
+        frames = map_inputs(input_reader(args), args.inputs, args.input_format, args.jobs)
+        report: Any = get_statistics(combine_templates(frames))
+    else:
+        results = map_inputs(input_reader(args, _file_statistics), args.inputs, args.input_format, args.jobs)
+        report = dict(zip(args.inputs, results)) if len(args.inputs) > 1 else results[0]
+    json.dump(report, sys.stdout, indent=2, default=str)
+    sys.stdout.write('\n')
+    return EXIT_OK
+
+
+def cmd_sync_health(args: argparse.Namespace) -> int:
+    since = datetime.now(timezone.utc) - timedelta(hours=args.since_hours) if args.since_hours else None
+    try:
+        records = open_log(args).records(since)
+    except (OSError, ValueError) as e:
+        raise CommandError(f"Cannot read sync log: {e}") from e
+    json.dump({'syncs': summarize(records), 'quota': quota_usage(records)}, sys.stdout, indent=2)
+    sys.stdout.write('\n')
+    return EXIT_OK
+
+
+def _code_hashes(path: str, fmt: Optional[str]) -> List[str]:
+    df = read_templates(path, fmt)
+    return df[CODE_HASH_COLUMN].dropna().astype(str).tolist() if CODE_HASH_COLUMN in df.columns else []
+
+
+def cmd_gc_blobs(args: argparse.Namespace) -> int:
+    blob_store = open_blob_store(args)
+    if blob_store is None:
+        raise CommandError("gc-blobs needs --blob-store")
+    live = set()
+    for hashes in map_inputs(_code_hashes, args.inputs, args.input_format, args.jobs):
+        live.update(hashes)
+    try:
+        removed = blob_store.garbage_collect(live)
+    except OSError as e:
+        raise CommandError(f"Cannot clean blob store {args.blob_store}: {e}") from e
+    print(f"Removed {removed} unreferenced blob(s); {len(live)} referenced", file=sys.stderr)
+    return EXIT_OK
+
+
+def cmd_serve(args: argparse.Namespace) -> int:
+    from template_manager.api import create_server
+
+    if not os.path.exists(args.data):
+        raise CommandError(f"Template cache {args.data} does not exist; create it with 'fetch -o {args.data}'")
+    blob_store = open_blob_store(args)
+    try:
+        server = create_server(args.data, args.host, args.port, quiet=args.quiet, blob_store=blob_store)
+    except OSError as e:
+        raise CommandError(f"Cannot listen on {args.host}:{args.port}: {e.strerror}") from e
+    print(f"Serving {args.data} on http://{args.host}:{server.server_address[1]}", file=sys.stderr)
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.server_close()
+    return EXIT_OK
+
+
+def build_parser() -> argparse.ArgumentParser:
+    parser = argparse.ArgumentParser(
+        prog='template_manager',
+        description="Sync, import, export and inspect code templates without the dashboard."
+    )
+    subparsers = parser.add_subparsers(dest='command', required=True)
+
+    sheets = argparse.ArgumentParser(add_help=False)
+    sheets.add_argument('--credentials', help=f"Service-account JSON key (default: ${CREDENTIALS_ENV_VAR})")
+    sheets.add_argument('--sheet-id', default=GOOGLE_SHEETS_ID)
+    sheets.add_argument('--sheet-name', default=GOOGLE_SHEETS_SHEET_NAME)
+
+    telemetry = argparse.ArgumentParser(add_help=False)
+    telemetry.add_argument('--sync-log', help=f"Sync telemetry log (default: ${SYNC_LOG_PATH_ENV_VAR} or ~/.template_manager/sync_log.jsonl)")
+
+    inputs = argparse.ArgumentParser(add_help=False)
+    inputs.add_argument('inputs', nargs='+', help="Input files; '-' reads standard input")
+    inputs.add_argument('--input-format', choices=FORMATS, help="Input format (default: from extension, else json)")
+    inputs.add_argument('-j', '--jobs', type=int, default=os.cpu_count() or 1, help="Parallel worker processes")
+
+    output = argparse.ArgumentParser(add_help=False)
+    output.add_argument('-o', '--output', default=STDIO_PATH, help="Output file; '-' writes standard output")
+    output.add_argument('--format', choices=FORMATS, help="Output format (default: from extension, else json)")
+
+    blobs = argparse.ArgumentParser(add_help=False)
+    blobs.add_argument('--blob-store', help="Directory of content-addressed code bodies referenced by CodeHash")
+    blobs.add_argument('--compression', choices=COMPRESSIONS, default='auto', help="Compression for newly stored bodies")
+
+    renumber = argparse.ArgumentParser(add_help=False)
+    renumber.add_argument('--renumber', action='store_true', help="Renumber templates sequentially from 1")
+
+    fetch = subparsers.add_parser('fetch', parents=[sheets, telemetry, output, blobs], help="Download templates from Google Sheets")
+    fetch.set_defaults(handler=cmd_fetch)
+
+    push = subparsers.add_parser('push', parents=[sheets, telemetry, inputs, blobs, renumber], help="Replace the worksheet with local templates")
+    push.add_argument('--dry-run', action='store_true', help="Validate the inputs without pushing")
+    push.set_defaults(handler=cmd_push)
+
+    import_ = subparsers.add_parser('import', parents=[inputs, output, blobs, renumber], help="Merge template files into one")
+    import_.set_defaults(handler=cmd_import)
+
+    export = subparsers.add_parser('export', parents=[inputs, output, blobs, renumber], help="Convert template files between formats")
+    export.set_defaults(handler=cmd_import)
+
+    stats = subparsers.add_parser('stats', parents=[inputs, blobs], help="Print template statistics as JSON")
+    stats.add_argument('--combined', action='store_true', help="Report one set of statistics over all inputs")
+    stats.set_defaults(handler=cmd_stats)
+
+    health = subparsers.add_parser('sync-health', parents=[telemetry], help="Print sync latency percentiles and quota usage as JSON")
+    health.add_argument('--since-hours', type=float, help="Only include syncs from the last N hours")
+    health.set_defaults(handler=cmd_sync_health)
+
+    gc_blobs = subparsers.add_parser('gc-blobs', parents=[inputs, blobs], help="Delete blobs not referenced by any of the given cache files")
+    gc_blobs.set_defaults(handler=cmd_gc_blobs)
+
+    serve = subparsers.add_parser('serve', parents=[blobs], help="Serve a local template cache over a read-only HTTP API")
+    serve.add_argument('--data', default='templates.json', help="Template cache written by 'fetch'")
+    serve.add_argument('--host', default='127.0.0.1')
+    serve.add_argument('--port', type=int, default=8080)
+    serve.add_argument('--quiet', action='store_true', help="Do not log requests")
+    serve.set_defaults(handler=cmd_serve)
+
+    return parser
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    parser = build_parser()
+    args = parser.parse_args(argv)
+    if getattr(args, 'jobs', 1) < 1:
+        parser.error("--jobs must be at least 1")
+    try:
+        return args.handler(args)
+    except CommandError as e:
+        print(f"error: {e}", file=sys.stderr)
+        return EXIT_FAILURE
+    except BrokenPipeError:
+        # Downstream consumer (e.g. `head`) closed the pipe
+        sys.stderr.close()
+        return EXIT_FAILURE
@@ -0,0 +1,245 @@
+"""Template table operations shared by the dashboard, benchmarks and tooling."""
+
+import io
+import json
+import math
+import uuid
+from collections import Counter
+from typing import Any, Dict, Iterable, List, Optional
+
+import pandas as pd
+
+from template_manager.blobstore import CODE_HASH_COLUMN
+from template_manager.perf import get_recorder
+
+perf = get_recorder()
+
+TEMPLATE_COLUMNS = ['Number', 'Title', 'Category', 'Description', 'Code', 'Id']
+# Stable identity that survives renumbering; Number is only the display order
+ID_COLUMN = 'Id'
+
+
+def format_code_for_display(code: str, max_lines: int = 20) -> str:
+    """Format code for preview display."""
+    total_lines = code.count('\n') + 1
+    if total_lines <= max_lines:
+        return code
+    # Only walk the first max_lines lines instead of splitting the whole body
+    end = -1
+    for _ in range(max_lines):
+        end = code.find('\n', end + 1)
+    return code[:end] + f"\n\n... ({total_lines - max_lines} more lines)"
+
+
+@perf.timed('export.json')
+def export_to_json(df: pd.DataFrame) -> str:
+    """Export DataFrame to JSON string."""
+    return df.to_json(orient='records', indent=2)
+
+
+@perf.timed('export.csv')
+def export_to_csv(df: pd.DataFrame) -> str:
+    """Export DataFrame to CSV string."""
+    return df.to_csv(index=False)
+
+
+@perf.timed('import.json')
+def import_from_json(json_str: str) -> pd.DataFrame:
+    """Import DataFrame from JSON string; raises ValueError on malformed input."""
+    try:
+        data = json.loads(json_str)
+        return pd.DataFrame(data)
+    except (TypeError, ValueError) as e:
+        raise ValueError(str(e)) from e
+
+
+@perf.timed('import.csv')
+def import_from_csv(csv_str: str) -> pd.DataFrame:
+    """Import DataFrame from CSV string; raises ValueError on malformed input."""
+    try:
+        return pd.read_csv(io.StringIO(csv_str), keep_default_na=False)
+    except (pd.errors.ParserError, pd.errors.EmptyDataError) as e:
+        raise ValueError(str(e)) from e
+
+
+@perf.timed('stats')
+def get_statistics(df: pd.DataFrame, code_lengths: Optional[pd.Series] = None) -> Dict[str, Any]:
+    """Calculate statistics from template data.
+
+    ``code_lengths`` stands in for the Code column of a dehydrated frame.
+    """
+    if df is None or len(df) == 0:
+        return {
+            'total_templates': 0,
+            'categories': {},
+            'avg_code_length': 0,
+            'total_code_length': 0,
+            'most_common_category': None
+        }
+
+    categories = Counter(df['Category'].tolist()) if 'Category' in df.columns else {}
+    if code_lengths is None:
+        code_lengths = code_length_series(df) if 'Code' in df.columns else pd.Series([0])
+    total_code_length = int(code_lengths.sum())
+
+    return {
+        'total_templates': len(df),
+        'categories': dict(categories),
+        'avg_code_length': total_code_length / len(code_lengths) if len(code_lengths) else 0,
+        'total_code_length': total_code_length,
+        'most_common_category': categories.most_common(1)[0][0] if categories else None
+    }
+
+
+def code_length_series(df: pd.DataFrame) -> pd.Series:
+    """Return the character count of every template's code."""
+    return df['Code'].astype(str).str.len()
+
+
+def new_template_id() -> str:
+    """Return a fresh stable template id."""
+    return uuid.uuid4().hex[:12]
+
+
+def ensure_template_ids(df: pd.DataFrame) -> pd.DataFrame:
+    """Give every row a unique Id in place, keeping existing ones, and return the frame.
+
+    Rows without an Id, and later copies of a duplicated Id, get fresh ones.
+    """
+    if ID_COLUMN not in df.columns:
+        df[ID_COLUMN] = [new_template_id() for _ in range(len(df))]
+        return df
+    ids = df[ID_COLUMN].map(cell_text)
+    missing = (ids == '') | ids.duplicated()
+    if missing.any():
+        ids[missing] = [new_template_id() for _ in range(int(missing.sum()))]
+        df[ID_COLUMN] = ids
+    return df
+
+
+def search_mask(df: pd.DataFrame, search_query: str) -> pd.Series:
+    """Return a mask of rows where any column contains the query (case-insensitive).
+
+    The Id and CodeHash columns are skipped: random hex ids would match short
+    queries. Referenced bodies are searched with ``blobstore.code_search_mask``.
+    """
+    mask = pd.Series(False, index=df.index)
+    for column in df.columns:
+        if column in (ID_COLUMN, CODE_HASH_COLUMN):
+            continue
+        mask |= df[column].astype(str).str.contains(search_query, case=False, regex=False)
+    return mask
+
+
+def filter_templates(
+    df: pd.DataFrame,
+    search_query: str = "",
+    category: Optional[str] = None,
+    sort_by: Optional[str] = None
+) -> pd.DataFrame:
+    """Apply the Sheet View search, category filter and sort.
+
+    ``category=None`` means no category filter; any string, including
+    ``"All"``, matches that category exactly.
+
+    The input frame is returned unchanged (not copied) when nothing applies,
+    so callers must treat the result as read-only.
+    """
+    filtered_df = df
+
+    if search_query:
+        with perf.span('search'):
+            filtered_df = filtered_df[search_mask(filtered_df, search_query)]
+
+    if category is not None and 'Category' in filtered_df.columns:
+        filtered_df = filtered_df[filtered_df['Category'] == category]
+
+    if sort_by in filtered_df.columns:
+        filtered_df = filtered_df.sort_values(sort_by)
+
+    return filtered_df
+
+
+def set_category(df: pd.DataFrame, indices: Iterable[Any], category: str) -> pd.DataFrame:
+    """Assign a category to the given rows in place and return the frame."""
+    df.loc[list(indices), 'Category'] = category
+    return df
+
+
+def delete_templates(df: pd.DataFrame, indices: Iterable[Any]) -> pd.DataFrame:
+    """Return a copy of the frame without the given rows."""
+    return df.drop(list(indices)).reset_index(drop=True)
+
+
+def sheet_values(df: pd.DataFrame) -> List[List[Any]]:
+    """Return the header plus row values as written to the worksheet."""
+    return [df.columns.values.tolist()] + df.values.tolist()
+
+
+def cell_text(value: Any) -> str:
+    """Render a value the way it reads back from the worksheet."""
+    if value is None:
+        return ''
+    if isinstance(value, float):
+        if math.isnan(value):
+            return ''
+        if value.is_integer():
+            return str(int(value))
+    return str(value)
+
+
+def diff_sheet_values(remote: List[List[Any]], local: List[List[Any]]) -> Dict[str, Any]:
+    """Compare worksheet values against local values row by row.
+
+    Cells are compared as strings since Sheets returns formatted values.
+    Row numbers in the result are 1-based worksheet rows (the header is row 1).
+    """
+    def normalize(row: List[Any]) -> List[str]:
+        cells = [cell_text(value) for value in row]
+        while cells and cells[-1] == '':
+            cells.pop()
+        return cells
+
+    header_changed = not remote or normalize(remote[0]) != normalize(local[0])
+    changed_rows = []
+    shared = min(len(remote), len(local))
+    for i in range(1, shared):
+        if normalize(remote[i]) != normalize(local[i]):
+            changed_rows.append(i + 1)
+
+    return {
+        'header_changed': header_changed,
+        'changed_rows': changed_rows,
+        'appended_rows': list(range(shared + 1, len(local) + 1)),
+        'removed_rows': list(range(len(local) + 1, len(remote) + 1))
+    }
+
+
+def create_sample_data() -> pd.DataFrame:
+    """Create sample template data for demonstration."""
+    sample_data = {
+        'Number': [1, 2, 3, 4, 5],
+        'Title': [
+            'Login Form',
+            'Dashboard Layout',
+            'API Endpoint',
+            'Data Visualization',
+            'Contact Form'
+        ],
+        'Category': ['HTML/CSS', 'React', 'Python', 'JavaScript', 'HTML/CSS'],
+        'Description': [
+            'Modern login form with validation',
+            'Responsive dashboard with sidebar',
+            'RESTful API endpoint with authentication',
+            'Interactive chart using D3.js',
+            'Contact form with email integration'
+        ],
+        'Code': [
+            '<form class="login-form">\n  <input type="email" placeholder="Email">\n  <input type="password" placeholder="Password">\n  <button type="submit">Login</button>\n</form>',
+            'import React from "react";\n\nconst Dashboard = () => {\n  return <div className="dashboard">...</div>;\n};',
+            'from flask import Flask, jsonify\n\napp = Flask(__name__)\n\n@app.route("/api/data")\ndef get_data():\n    return jsonify({"status": "success"})',
+            'const data = [10, 20, 30, 40, 50];\nd3.select("svg")\n  .selectAll("rect")\n  .data(data)\n  .enter()\n  .append("rect");',
+            '<form class="contact-form">\n  <input type="text" placeholder="Name">\n  <input type="email" placeholder="Email">\n  <textarea placeholder="Message"></textarea>\n  <button type="submit">Send</button>\n</form>'
+        ]
+    }
+    return pd.DataFrame(sample_data)
@@ -0,0 +1,214 @@
+"""Service-account credentials shared across reruns, sessions and commands.
+
+A key is identified by the SHA-256 fingerprint of its raw JSON, parsed once
+and kept in a process-wide registry, so re-uploading (or re-reading) the same
+file reuses the signed credentials and the authorized gspread client built
+from them. Access tokens are refreshed by a background thread shortly before
+they expire, so a sync never waits on a token exchange. A key unused for
+``IDLE_TIMEOUT_SECONDS`` stops refreshing (the next use restarts it) and is
+dropped from the registry.
+
+google-auth and gspread are imported only when credentials are first used.
+"""
+
+import hashlib
+import json
+import os
+import threading
+import time
+from datetime import datetime, timezone
+from typing import Any, Dict, Optional
+
+from template_manager.perf import get_recorder
+
+perf = get_recorder()
+
+CREDENTIALS_ENV_VAR = 'GOOGLE_APPLICATION_CREDENTIALS'
+CREDENTIALS_JSON_ENV_VAR = 'TEMPLATE_MANAGER_CREDENTIALS_JSON'
+REFRESH_MARGIN_SECONDS = 300
+REFRESH_RETRY_SECONDS = 60
+IDLE_TIMEOUT_SECONDS = 3600
+REQUIRED_KEY_FIELDS = ('client_email', 'private_key', 'token_uri')
+
+_registry: Dict[str, 'ServiceAccount'] = {}
+_registry_lock = threading.Lock()
+
+
+class CredentialsError(Exception):
+    """Raised for a missing, unreadable or malformed service-account key."""
+
+
+def fingerprint(raw: bytes) -> str:
+    """SHA-256 hex digest identifying a key file's contents."""
+    return hashlib.sha256(raw).hexdigest()
+
+
+def parse_key(raw: bytes) -> Dict[str, Any]:
+    """Parse and validate a service-account key."""
+    try:
+        info = json.loads(raw)
+    except ValueError as e:
+        raise CredentialsError(f"Invalid JSON file: {e}") from e
+    if not isinstance(info, dict):
+        raise CredentialsError("Invalid key file: expected a JSON object")
+    missing = [field for field in REQUIRED_KEY_FIELDS if not info.get(field)]
+    if missing:
+        raise CredentialsError(f"Not a service-account key; missing {', '.join(missing)}")
+    return info
+
+
+class ServiceAccount:
+    """One parsed key with its lazily built credentials and gspread client."""
+
+    def __init__(self, info: Dict[str, Any], key_fingerprint: str):
+        self.info = info
+        self.fingerprint = key_fingerprint
+        self._credentials = None
+        self._client = None
+        self._lock = threading.Lock()
+        # Held only while exchanging a token, so callers never wait on the network
+        self._refresh_lock = threading.Lock()
+        self._refresher: Optional[threading.Thread] = None
+        self._stop = threading.Event()
+        self.last_used = time.monotonic()
+
+    @property
+    def client_email(self) -> str:
+        return self.info.get('client_email', 'Unknown')
+
+    def idle_seconds(self) -> float:
+        """Time since the credentials or client were last requested."""
+        return time.monotonic() - self.last_used
+
+    def credentials(self):
+        """Signed google-auth credentials, built on first use."""
+        self.last_used = time.monotonic()
+        with self._lock:
+            if self._credentials is None:
+                from google.oauth2.service_account import Credentials
+
+                from template_manager.sync import GOOGLE_SHEETS_SCOPE
+
+                self._credentials = Credentials.from_service_account_info(self.info, scopes=GOOGLE_SHEETS_SCOPE)
+            return self._credentials
+
+    def client(self):
+        """An authorized gspread client, shared by every caller of this key."""
+        credentials = self.credentials()
+        with self._lock:
+            if self._client is None:
+                import gspread
+
+                self._client = gspread.authorize(credentials)
+                perf.count('credential_clients')
+        self.start_refresh()
+        return self._client
+
+    def refresh(self):
+        """Fetch a new access token now."""
+        from google.auth.transport.requests import Request
+
+        credentials = self.credentials()
+        with perf.span('credentials.refresh'), self._refresh_lock:
+            credentials.refresh(Request())
+        perf.count('credential_refreshes')
+
+    def seconds_until_expiry(self) -> Optional[float]:
+        """Remaining token lifetime, or None before the first token."""
+        expiry = getattr(self._credentials, 'expiry', None)
+        if expiry is None:
+            return None
+        # google-auth keeps naive UTC expiry times
+        now = datetime.now(timezone.utc).replace(tzinfo=None)
+        return (expiry - now).total_seconds()
+
+    def start_refresh(self, margin: float = REFRESH_MARGIN_SECONDS, idle_timeout: float = IDLE_TIMEOUT_SECONDS):
+        """Keep the token fresh from a daemon thread until ``stop`` or ``idle_timeout`` without use."""
+        with self._lock:
+            if self._refresher is not None and not self._stop.is_set():
+                return
+            # Each thread gets its own event, so a stopped thread that has not
+            # woken up yet cannot be revived alongside its replacement
+            self._stop = threading.Event()
+            self._refresher = threading.Thread(
+                target=self._refresh_loop,
+                args=(self._stop, margin, idle_timeout),
+                name=f"credentials-refresh-{self.fingerprint[:8]}",
+                daemon=True
+            )
+            self._refresher.start()
+
+    def stop(self):
+        """Stop background refreshes."""
+        with self._lock:
+            self._stop.set()
+
+    def _refresh_loop(self, stop: threading.Event, margin: float, idle_timeout: float):
+        while not stop.is_set():
+            with self._lock:
+                idle = self.idle_seconds()
+                if idle >= idle_timeout:
+                    # Stopped under the lock so a concurrent start_refresh starts a new thread
+                    stop.set()
+                    perf.count('credential_refresh_idle_stops')
+                    return
+            remaining = self.seconds_until_expiry()
+            if remaining is not None and remaining > margin:
+                stop.wait(min(remaining - margin, idle_timeout - idle))
+                continue
+            try:
+                self.refresh()
+            except Exception:
+                perf.count('credential_refresh_failures')
+                stop.wait(REFRESH_RETRY_SECONDS)
+
+
+def evict_idle(idle_timeout: float = IDLE_TIMEOUT_SECONDS) -> int:
+    """Drop registry entries unused for ``idle_timeout``; returns how many."""
+    with _registry_lock:
+        idle = [key for key, account in _registry.items() if account.idle_seconds() >= idle_timeout]
+        for key in idle:
+            _registry.pop(key).stop()
+    return len(idle)
+
+
+def load_service_account(raw: bytes) -> ServiceAccount:
+    """Return the shared ServiceAccount for a key, parsing it only once."""
+    key_fingerprint = fingerprint(raw)
+    evict_idle()
+    with _registry_lock:
+        account = _registry.get(key_fingerprint)
+        if account is None:
+            account = ServiceAccount(parse_key(raw), key_fingerprint)
+            _registry[key_fingerprint] = account
+        account.last_used = time.monotonic()
+        return account
+
+
+def service_account_from_info(info: Dict[str, Any]) -> ServiceAccount:
+    """Shared ServiceAccount for an already parsed key dict."""
+    return load_service_account(json.dumps(info, sort_keys=True).encode('utf-8'))
+
+
+def load_service_account_file(path: str) -> ServiceAccount:
+    """Shared ServiceAccount for a key file."""
+    try:
+        with open(path, 'rb') as handle:
+            raw = handle.read()
+    except OSError as e:
+        raise CredentialsError(f"Cannot read credentials from {path}: {e.strerror or e}") from e
+    try:
+        return load_service_account(raw)
+    except CredentialsError as e:
+        raise CredentialsError(f"{path}: {e}") from e
+
+
+def service_account_from_env() -> Optional[ServiceAccount]:
+    """Key from $TEMPLATE_MANAGER_CREDENTIALS_JSON or $GOOGLE_APPLICATION_CREDENTIALS, if set."""
+    inline = os.environ.get(CREDENTIALS_JSON_ENV_VAR)
+    if inline:
+        return load_service_account(inline.encode('utf-8'))
+    path = os.environ.get(CREDENTIALS_ENV_VAR)
+    if path:
+        return load_service_account_file(path)
+    return None
@@ -0,0 +1,113 @@
+"""Precomputed bitmap indexes for faceted template filtering.
+
+Each facet value maps to a Python int used as a bitset over row positions
+(bit ``i`` set means row ``i`` has that value). Combining filters is then a
+handful of big-int ``&``/``|`` operations, and a facet count is a
+``bit_count()``, instead of a scan over the frame.
+"""
+
+from typing import Any, Dict, Iterable, List, Optional
+
+import numpy as np
+import pandas as pd
+
+from template_manager.perf import get_recorder
+
+perf = get_recorder()
+
+LINE_BUCKETS = [(10, '1–10 lines'), (50, '11–50 lines'), (200, '51–200 lines'), (None, '200+ lines')]
+SOURCE_COLUMNS = ('Sheet', 'Source')
+
+
+def bits_from_mask(mask: Any) -> int:
+    """Pack a boolean array into a bitset (bit ``i`` is ``mask[i]``)."""
+    packed = np.packbits(np.asarray(mask, dtype=bool), bitorder='little')
+    return int.from_bytes(packed.tobytes(), 'little')
+
+
+def mask_from_bits(bits: int, size: int) -> np.ndarray:
+    """Unpack a bitset into a boolean array of ``size`` rows."""
+    raw = np.frombuffer(bits.to_bytes((size + 7) // 8, 'little'), dtype=np.uint8)
+    return np.unpackbits(raw, count=size, bitorder='little').astype(bool)
+
+
+def line_bucket(lines: pd.Series) -> pd.Series:
+    """Label each line count with its LINE_BUCKETS bucket."""
+    labels = pd.Series(LINE_BUCKETS[-1][1], index=lines.index, dtype=object)
+    for upper, label in reversed(LINE_BUCKETS[:-1]):
+        labels[lines <= upper] = label
+    return labels
+
+
+def _bitmaps(values: pd.Series) -> Dict[str, int]:
+    values = values.fillna('N/A').astype(str).to_numpy()
+    return {value: bits_from_mask(values == value) for value in pd.unique(values)}
+
+
+class FacetIndex:
+    """Bitmaps for each facet value of one version of the templates frame."""
+
+    def __init__(self, facets: Dict[str, Dict[str, int]], size: int):
+        self.facets = facets
+        self.size = size
+        self.all_bits = (1 << size) - 1
+
+    def values(self, facet: str) -> List[str]:
+        """Facet values in display order."""
+        bitmaps = self.facets.get(facet, {})
+        if facet == 'Lines':
+            return [label for _, label in LINE_BUCKETS if label in bitmaps]
+        return sorted(bitmaps)
+
+    def _facet_bits(self, facet: str, selected: Iterable[str]) -> int:
+        bitmaps = self.facets[facet]
+        bits = 0
+        for value in selected:
+            bits |= bitmaps.get(value, 0)
+        return bits
+
+    def match(self, selections: Dict[str, Iterable[str]], base: Optional[int] = None) -> int:
+        """Rows matching every facet (values within a facet are OR-ed)."""
+        bits = self.all_bits if base is None else base
+        for facet, selected in selections.items():
+            selected = list(selected)
+            if selected and facet in self.facets:
+                bits &= self._facet_bits(facet, selected)
+        return bits
+
+    def counts(self, selections: Dict[str, Iterable[str]], base: Optional[int] = None) -> Dict[str, Dict[str, int]]:
+        """Per-value counts, each facet filtered by every *other* facet's selection.
+
+        Excluding a facet's own selection keeps its alternatives visible with
+        the count they would add if selected.
+        """
+        selections = {facet: list(selected) for facet, selected in selections.items()}
+        counts: Dict[str, Dict[str, int]] = {}
+        for facet, bitmaps in self.facets.items():
+            others = {name: selected for name, selected in selections.items() if name != facet}
+            bits = self.match(others, base)
+            counts[facet] = {value: (bits & bitmap).bit_count() for value, bitmap in bitmaps.items()}
+        return counts
+
+
+def build_facet_index(df: pd.DataFrame, analysis: Optional[pd.DataFrame] = None) -> FacetIndex:
+    """Build bitmaps for category, language, line count, description, syntax and source sheet."""
+    with perf.span('facets.build'):
+        facets: Dict[str, Dict[str, int]] = {}
+        if 'Category' in df.columns:
+            facets['Category'] = _bitmaps(df['Category'])
+        if analysis is not None:
+            facets['Language'] = _bitmaps(analysis['Language'])
+            syntax = analysis['SyntaxOK'].map({True: 'Valid', False: 'Errors'}).fillna('Unchecked')
+            facets['Syntax'] = _bitmaps(syntax)
+        if 'Code' in df.columns:
+            lines = df['Code'].astype(str).str.count('\n') + 1
+            facets['Lines'] = _bitmaps(line_bucket(lines))
+        if 'Description' in df.columns:
+            has_description = df['Description'].fillna('').astype(str).str.strip().ne('')
+            facets['Description'] = _bitmaps(has_description.map({True: 'Has description', False: 'No description'}))
+        for column in SOURCE_COLUMNS:
+            if column in df.columns:
+                facets['Sheet'] = _bitmaps(df[column])
+                break
+        return FacetIndex(facets, len(df))
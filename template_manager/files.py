@@ -0,0 +1,92 @@
+"""Reading and writing template tables from files or standard streams.
+
+JSON and CSV are text; XLSX workbooks are read and written as binary
+streams (see ``template_manager.workbook``).
+"""
+
+import os
+import sys
+from typing import Optional
+
+import pandas as pd
+
+from template_manager.blobstore import BlobStore, dehydrate, hydrate
+from template_manager.core import export_to_csv, export_to_json, import_from_csv, import_from_json
+from template_manager.workbook import export_to_xlsx, import_from_xlsx
+
+STDIO_PATH = '-'
+FORMATS = ('json', 'csv', 'xlsx')
+
+
+def detect_format(path: str, default: str = 'json') -> str:
+    """Guess the file format from the extension."""
+    extension = os.path.splitext(path)[1].lower().lstrip('.')
+    return extension if extension in FORMATS else default
+
+
+def read_templates(path: str, fmt: Optional[str] = None, blob_store: Optional[BlobStore] = None) -> pd.DataFrame:
+    """Read templates from a path, or from stdin when path is ``-``.
+
+    CodeHash references are resolved through ``blob_store`` when given.
+    Raises ValueError for unreadable or malformed input.
+    """
+    fmt = fmt or detect_format(path)
+    if fmt not in FORMATS:
+        raise ValueError(f"Unsupported format: {fmt}")
+    try:
+        if fmt == 'xlsx':
+            df = import_from_xlsx(sys.stdin.buffer.read() if path == STDIO_PATH else path)
+        else:
+            if path == STDIO_PATH:
+                text = sys.stdin.read()
+            else:
+                with open(path, encoding='utf-8') as handle:
+                    text = handle.read()
+            df = import_from_csv(text) if fmt == 'csv' else import_from_json(text)
+    except OSError as e:
+        raise ValueError(f"Cannot read {path}: {e.strerror}") from e
+
+    if blob_store is not None:
+        try:
+            df = hydrate(df, blob_store)
+        except KeyError as e:
+            raise ValueError(f"{path} references code blob {e.args[0]} missing from {blob_store.root}") from e
+    return df
+
+
+def write_templates(df: pd.DataFrame, path: str, fmt: Optional[str] = None, blob_store: Optional[BlobStore] = None) -> None:
+    """Write templates to a path, or to stdout when path is ``-``.
+
+    With ``blob_store`` the Code column is written as CodeHash references and
+    only bodies not already in the store are stored.
+    """
+    fmt = fmt or detect_format(path)
+    if fmt not in FORMATS:
+        raise ValueError(f"Unsupported format: {fmt}")
+    if blob_store is not None:
+        df = dehydrate(df, blob_store)
+
+    if fmt == 'xlsx':
+        if path == STDIO_PATH:
+            export_to_xlsx(df, sys.stdout.buffer)
+            sys.stdout.flush()
+            return
+        # Stream straight into the temporary file rather than building the workbook in memory
+        tmp_path = f"{path}.tmp"
+        export_to_xlsx(df, tmp_path)
+        os.replace(tmp_path, path)
+        return
+
+    payload = export_to_csv(df) if fmt == 'csv' else export_to_json(df)
+
+    if path == STDIO_PATH:
+        sys.stdout.write(payload)
+        if not payload.endswith('\n'):
+            sys.stdout.write('\n')
+        sys.stdout.flush()
+        return
+
+    tmp_path = f"{path}.tmp"
+    with open(tmp_path, 'w', encoding='utf-8', newline='') as handle:
+        handle.write(payload)
+    os.replace(tmp_path, path)
@@ -0,0 +1,281 @@
+"""Per-template version history stored as line-based deltas.
+
+Every revision of a template's code is stored as a delta against the
+previous revision, with a full snapshot every ``snapshot_interval``
+revisions so any revision is rebuilt from at most that many deltas. Only the
+newest ``max_revisions`` revisions per template are kept; when the oldest is
+dropped, the next one is turned into a snapshot. History lives outside the
+template table, keyed by the template's stable ``Id``, and is persisted to an
+append-only JSON-lines file.
+
+Several processes may share one file: writers hold an exclusive lock on
+``<path>.lock`` and first read whatever other writers appended (or reload
+after another writer compacted the file), so revisions are never lost or
+interleaved.
+"""
+
+import contextlib
+import difflib
+import json
+import os
+import threading
+from datetime import datetime
+from typing import Any, Dict, Iterator, List, Optional
+
+try:
+    import fcntl
+except ImportError:
+    fcntl = None
+
+HISTORY_PATH_ENV_VAR = 'TEMPLATE_MANAGER_HISTORY_PATH'
+DEFAULT_HISTORY_PATH = os.path.join(os.path.expanduser('~'), '.template_manager', 'history.jsonl')
+SNAPSHOT_INTERVAL = 10
+MAX_REVISIONS = 50
+
+
+def make_delta(old: str, new: str) -> List[list]:
+    """Encode ``new`` as line operations against ``old``.
+
+    Operations are ``['=', n]`` (keep n lines), ``['-', n]`` (skip n lines) and
+    ``['+', [lines...]]`` (insert lines); line endings are preserved.
+    """
+    old_lines = old.splitlines(keepends=True)
+    new_lines = new.splitlines(keepends=True)
+    ops: List[list] = []
+    matcher = difflib.SequenceMatcher(a=old_lines, b=new_lines, autojunk=False)
+    for tag, i1, i2, j1, j2 in matcher.get_opcodes():
+        if tag == 'equal':
+            ops.append(['=', i2 - i1])
+            continue
+        if tag in ('delete', 'replace'):
+            ops.append(['-', i2 - i1])
+        if tag in ('insert', 'replace'):
+            ops.append(['+', new_lines[j1:j2]])
+    return ops
+
+
+def apply_delta(old: str, ops: List[list]) -> str:
+    """Rebuild the new text from ``old`` and a delta from ``make_delta``."""
+    old_lines = old.splitlines(keepends=True)
+    result: List[str] = []
+    position = 0
+    for op, arg in ops:
+        if op == '=':
+            result.extend(old_lines[position:position + arg])
+            position += arg
+        elif op == '-':
+            position += arg
+        else:
+            result.extend(arg)
+    return ''.join(result)
+
+
+class TemplateHistory:
+    """Revision store keyed by template (its stable Id)."""
+
+    def __init__(
+        self,
+        path: Optional[str] = None,
+        snapshot_interval: int = SNAPSHOT_INTERVAL,
+        max_revisions: int = MAX_REVISIONS
+    ):
+        self.path = path
+        self.snapshot_interval = max(1, snapshot_interval)
+        self.max_revisions = max(1, max_revisions)
+        self._entries: Dict[str, List[Dict[str, Any]]] = {}
+        self._heads: Dict[str, str] = {}
+        self._dropped = 0
+        self._offset = 0
+        self._file_id = None
+        self._lock = threading.RLock()
+        self._refresh()
+
+    @contextlib.contextmanager
+    def _file_lock(self) -> Iterator[None]:
+        """Hold the cross-process writer lock (a no-op without fcntl)."""
+        os.makedirs(os.path.dirname(os.path.abspath(self.path)), exist_ok=True)
+        with open(f"{self.path}.lock", 'a') as handle:
+            if fcntl is not None:
+                fcntl.flock(handle, fcntl.LOCK_EX)
+            try:
+                yield
+            finally:
+                if fcntl is not None:
+                    fcntl.flock(handle, fcntl.LOCK_UN)
+
+    def _refresh(self):
+        """Apply records other writers appended since the last read.
+
+        A file replaced by compaction (or truncated) is reloaded from scratch.
+        Only complete lines are consumed, so a concurrent append in progress is
+        picked up on a later refresh.
+        """
+        if not self.path:
+            return
+        try:
+            handle = open(self.path, 'rb')
+        except FileNotFoundError:
+            return
+
+        changed = set()
+        with handle:
+            stat = os.fstat(handle.fileno())
+            file_id = (stat.st_dev, stat.st_ino)
+            if file_id != self._file_id or stat.st_size < self._offset:
+                self._entries.clear()
+                self._heads.clear()
+                self._dropped = 0
+                self._offset = 0
+                self._file_id = file_id
+            if stat.st_size == self._offset:
+                return
+            handle.seek(self._offset)
+            for line in handle:
+                if not line.endswith(b'\n'):
+                    break
+                self._offset += len(line)
+                if not line.strip():
+                    continue
+                record = json.loads(line)
+                if record.get('compact'):
+                    self._entries.clear()
+                    self._heads.clear()
+                    changed.clear()
+                    continue
+                self._append(record['key'], record['entry'])
+                changed.add(record['key'])
+        for key in changed:
+            self._heads[key] = self._rebuild(key, len(self._entries[key]) - 1)
+
+    def _append(self, key: str, entry: Dict[str, Any]):
+        entries = self._entries.setdefault(key, [])
+        entries.append(entry)
+        while len(entries) > self.max_revisions:
+            self._drop_oldest(key)
+
+    def _drop_oldest(self, key: str):
+        entries = self._entries[key]
+        if len(entries) > 1 and entries[1].get('snapshot') is None:
+            entries[1] = dict(entries[1], snapshot=self._rebuild(key, 1), delta=None)
+        entries.pop(0)
+        self._dropped += 1
+
+    def _rebuild(self, key: str, position: int) -> str:
+        entries = self._entries[key]
+        start = position
+        while entries[start].get('snapshot') is None:
+            start -= 1
+        code = entries[start]['snapshot']
+        for entry in entries[start + 1:position + 1]:
+            code = apply_delta(code, entry['delta'])
+        return code
+
+    def record(
+        self,
+        key: Any,
+        code: str,
+        fields: Optional[Dict[str, Any]] = None,
+        author: Optional[str] = None
+    ) -> Optional[int]:
+        """Store a new revision; returns its number, or None if nothing changed."""
+        key = str(key)
+        fields = {name: '' if value is None else str(value) for name, value in (fields or {}).items()}
+        with self._lock, (self._file_lock() if self.path else contextlib.nullcontext()):
+            self._refresh()
+            entries = self._entries.get(key, [])
+            if entries and self._heads[key] == code and entries[-1]['fields'] == fields:
+                return None
+
+            rev = entries[-1]['rev'] + 1 if entries else 1
+            entry: Dict[str, Any] = {
+                'rev': rev,
+                'timestamp': datetime.now().isoformat(timespec='seconds'),
+                'author': author,
+                'fields': fields,
+                'size': len(code),
+                'snapshot': None,
+                'delta': None
+            }
+            if not entries or (rev - 1) % self.snapshot_interval == 0:
+                entry['snapshot'] = code
+            else:
+                entry['delta'] = make_delta(self._heads[key], code)
+
+            dropped_before = self._dropped
+            self._append(key, entry)
+            self._heads[key] = code
+            self._persist(key, entry, compact=self._dropped != dropped_before)
+            return rev
+
+    def _persist(self, key: str, entry: Dict[str, Any], compact: bool):
+        """Append one record, or compact the file; the caller holds the file lock."""
+        if not self.path:
+            return
+        live = sum(len(entries) for entries in self._entries.values())
+        if compact and self._dropped > live:
+            self._rewrite()
+            return
+        with open(self.path, 'ab') as handle:
+            handle.write((json.dumps({'key': key, 'entry': entry}) + '\n').encode('utf-8'))
+            self._offset = handle.tell()
+            stat = os.fstat(handle.fileno())
+            self._file_id = (stat.st_dev, stat.st_ino)
+
+    def _rewrite(self):
+        tmp_path = f"{self.path}.tmp"
+        with open(tmp_path, 'wb') as handle:
+            handle.write(b'{"compact": true}\n')
+            for key, entries in self._entries.items():
+                for entry in entries:
+                    handle.write((json.dumps({'key': key, 'entry': entry}) + '\n').encode('utf-8'))
+            self._offset = handle.tell()
+        os.replace(tmp_path, self.path)
+        stat = os.stat(self.path)
+        self._file_id = (stat.st_dev, stat.st_ino)
+        self._dropped = 0
+
+    def has_history(self, key: Any) -> bool:
+        with self._lock:
+            self._refresh()
+            return str(key) in self._entries
+
+    def revisions(self, key: Any) -> List[Dict[str, Any]]:
+        """Return revision metadata, newest first."""
+        with self._lock:
+            self._refresh()
+            return [
+                {name: entry[name] for name in ('rev', 'timestamp', 'author', 'fields', 'size')}
+                for entry in reversed(self._entries.get(str(key), []))
+            ]
+
+    def get(self, key: Any, rev: Optional[int] = None) -> str:
+        """Return the code of a revision (the latest when ``rev`` is None)."""
+        key = str(key)
+        with self._lock:
+            self._refresh()
+            entries = self._entries.get(key)
+            if not entries:
+                raise KeyError(key)
+            if rev is None:
+                return self._heads[key]
+            position = rev - entries[0]['rev']
+            if not 0 <= position < len(entries) or entries[position]['rev'] != rev:
+                raise KeyError(f"{key}@{rev}")
+            return self._rebuild(key, position)
+
+    def diff(self, key: Any, old_rev: int, new_rev: int, context: int = 3) -> str:
+        """Return a unified diff between two revisions."""
+        old = self.get(key, old_rev).splitlines(keepends=True)
+        new = self.get(key, new_rev).splitlines(keepends=True)
+        lines = difflib.unified_diff(old, new, f"r{old_rev}", f"r{new_rev}", n=context)
+        return ''.join(line if line.endswith('\n') else line + '\n' for line in lines)
+
+    def stored_bytes(self, key: Any) -> int:
+        """Approximate storage used by a template's history."""
+        with self._lock:
+            return sum(len(json.dumps(entry)) for entry in self._entries.get(str(key), []))
+
+
+def open_template_history() -> TemplateHistory:
+    """The history at $TEMPLATE_MANAGER_HISTORY_PATH, or the default path under the home directory."""
+    return TemplateHistory(os.environ.get(HISTORY_PATH_ENV_VAR) or DEFAULT_HISTORY_PATH)
@@ -0,0 +1,299 @@
+"""Three-way merge of local templates against concurrent sheet edits.
+
+A *base* records field fingerprints of every template as of the last fetch
+or push. On push, the worksheet's current rows are matched to it by their
+stable Id (by Number for rows without one) and compared with it: rows whose
+fingerprint is unchanged on both sides are skipped outright, and for the
+rest each field is taken from whichever side changed it. Only fields changed
+differently on both sides, and edits racing a deletion, are reported as
+conflicts.
+
+The Id identifies a row rather than being part of its content, and a column
+one side lacks reads as blank, so assigning Ids to a sheet that had none
+does not make every row look edited.
+"""
+
+import hashlib
+from typing import Any, Dict, List, Optional, Tuple
+
+import pandas as pd
+
+from template_manager.core import ID_COLUMN
+from template_manager.core import cell_text as _cell
+
+ROW_KEY = '__row__'
+NUMBER_KEY = '__number__'
+KEY_COLUMN = 'Number'
+
+
+def _fingerprint(text: str) -> str:
+    return hashlib.blake2b(text.encode('utf-8'), digest_size=8).hexdigest()
+
+
+_BLANK_FINGERPRINT = _fingerprint('')
+
+
+def _records(df: pd.DataFrame) -> List[Tuple[str, str, Dict[str, str]]]:
+    """Each row's Id, Number key and cells as strings, in frame order.
+
+    The Number key disambiguates duplicate Numbers by occurrence. A repeated
+    Id only identifies its first row; later copies count as unidentified.
+    """
+    columns = list(df.columns)
+    records = []
+    seen_numbers: Dict[str, int] = {}
+    seen_ids = set()
+    numbers = df[KEY_COLUMN].tolist() if KEY_COLUMN in columns else list(range(len(df)))
+    ids = df[ID_COLUMN].tolist() if ID_COLUMN in columns else [''] * len(df)
+    for number, row_id, values in zip(numbers, ids, df.itertuples(index=False, name=None)):
+        number = _cell(number)
+        occurrence = seen_numbers.get(number, 0)
+        seen_numbers[number] = occurrence + 1
+        row_id = _cell(row_id)
+        if row_id in seen_ids:
+            row_id = ''
+        seen_ids.add(row_id)
+        cells = {column: _cell(value) for column, value in zip(columns, values)}
+        records.append((row_id, f"#{number}/{occurrence}" if occurrence else f"#{number}", cells))
+    return records
+
+
+def _match(df: pd.DataFrame, base: Dict[str, Dict[str, str]]) -> List[Tuple[str, Dict[str, str]]]:
+    """Key each row of ``df`` by the base row it descends from.
+
+    Rows match on Id first. A row whose Id the base has not seen (assigned
+    since, or missing) falls back to the base row with its Number key, as
+    long as that base row had no Id of its own. Other rows keep their Id,
+    else their Number key.
+    """
+    by_number = {fingerprints.get(NUMBER_KEY, key): key for key, fingerprints in base.items()}
+    records = _records(df)
+    claimed = {row_id for row_id, _, _ in records if row_id and row_id in base}
+    keyed = []
+    for row_id, number_key, cells in records:
+        if row_id in claimed:
+            keyed.append((row_id, cells))
+            continue
+        base_key = by_number.get(number_key)
+        if base_key is not None and base_key not in claimed and (not row_id or base_key == number_key):
+            claimed.add(base_key)
+            keyed.append((base_key, cells))
+        else:
+            keyed.append((row_id or number_key, cells))
+    return keyed
+
+
+def _row_fingerprint(cells: Dict[str, str]) -> str:
+    # Blank cells are left out so a missing column matches a blank one
+    return _fingerprint('\x1f'.join(
+        f"{column}\x1e{value}" for column, value in sorted(cells.items()) if value and column != ID_COLUMN
+    ))
+
+
+def snapshot_base(df: pd.DataFrame) -> Dict[str, Dict[str, str]]:
+    """Fingerprint every field of every template as the merge base."""
+    base = {}
+    for row_id, number_key, cells in _records(df):
+        fingerprints = {column: _fingerprint(value) for column, value in cells.items()}
+        fingerprints[ROW_KEY] = _row_fingerprint(cells)
+        fingerprints[NUMBER_KEY] = number_key
+        base[row_id or number_key] = fingerprints
+    return base
+
+
+def frame_from_values(values: List[List[Any]], numeric: bool = False) -> pd.DataFrame:
+    """Build a frame from ``worksheet.get_all_values()`` output.
+
+    With ``numeric``, columns whose every cell reads back unchanged as a
+    number become numeric; anything else ('007', '1.0', blanks) stays text,
+    so the frame fingerprints exactly like the raw values.
+    """
+    if not values:
+        return pd.DataFrame()
+    header = [str(column) for column in values[0]]
+    width = len(header)
+    rows = [list(row[:width]) + [''] * (width - len(row)) for row in values[1:] if any(_cell(v) for v in row)]
+    df = pd.DataFrame(rows, columns=header)
+    if numeric:
+        for position in range(width):
+            column = df.iloc[:, position]
+            try:
+                converted = pd.to_numeric(column)
+            except (TypeError, ValueError):
+                continue
+            if len(column) and converted.map(_cell).tolist() == column.map(_cell).tolist():
+                df.isetitem(position, converted)
+    return df
+
+
+def three_way_merge(
+    base: Dict[str, Dict[str, str]],
+    local_df: pd.DataFrame,
+    remote_df: pd.DataFrame
+) -> Dict[str, Any]:
+    """Merge local and remote templates against their common base.
+
+    Rows are matched on their Id (see ``_match``), so templates added on both
+    sides are both kept; a local addition whose Number is taken by a remote
+    one is renumbered after the highest Number.
+
+    Returns a dict with the merged ``df`` (conflicting fields keep the local
+    value), the ``conflicts`` found, the merged row ``keys``, and counts of
+    ``remote_changes`` merged in and rows ``compared`` field by field.
+    """
+    local_rows = dict(_match(local_df, base))
+    remote_rows = dict(_match(remote_df, base))
+    columns = list(local_df.columns) + [c for c in remote_df.columns if c not in local_df.columns]
+
+    merged: List[Tuple[str, Dict[str, str]]] = []
+    conflicts: List[Dict[str, Any]] = []
+    added_locally = set()
+    remote_changes = 0
+    compared = 0
+
+    def conflict(key: str, kind: str, field: Optional[str], local: Any, remote: Any):
+        conflicts.append({
+            'id': f"{key}:{field or kind}",
+            'key': key,
+            'number': (local_rows.get(key) or remote_rows[key]).get(KEY_COLUMN, ''),
+            'kind': kind,
+            'field': field,
+            'local': local,
+            'remote': remote
+        })
+
+    for key, local in local_rows.items():
+        remote = remote_rows.get(key)
+        base_row = base.get(key)
+
+        if base_row is None:
+            # Added locally; a remote row with the same key was added concurrently
+            if remote is not None and _row_fingerprint(remote) != _row_fingerprint(local):
+                conflict(key, 'add', None, local, remote)
+            elif remote is None:
+                added_locally.add(key)
+            merged.append((key, local))
+            continue
+
+        local_changed = _row_fingerprint(local) != base_row[ROW_KEY]
+        if remote is None:
+            if local_changed:
+                conflict(key, 'deleted_remotely', None, local, None)
+                merged.append((key, local))
+            else:
+                remote_changes += 1
+            continue
+
+        remote_changed = _row_fingerprint(remote) != base_row[ROW_KEY]
+        if not remote_changed:
+            merged.append((key, _with_id(dict(local), local, remote)))
+            continue
+        if not local_changed:
+            merged.append((key, _with_id(dict(remote), local, remote)))
+            remote_changes += 1
+            continue
+
+        compared += 1
+        row = dict(local)
+        for field in columns:
+            local_value = local.get(field, '')
+            remote_value = remote.get(field, '')
+            if field == ID_COLUMN or local_value == remote_value:
+                continue
+            # A column missing from the base was blank then
+            base_fp = base_row.get(field, _BLANK_FINGERPRINT)
+            local_field_changed = _fingerprint(local_value) != base_fp
+            remote_field_changed = _fingerprint(remote_value) != base_fp
+            if remote_field_changed and not local_field_changed:
+                row[field] = remote_value
+                remote_changes += 1
+            elif remote_field_changed and local_field_changed:
+                conflict(key, 'edit', field, local_value, remote_value)
+        merged.append((key, _with_id(row, local, remote)))
+
+    for key, remote in remote_rows.items():
+        if key in local_rows:
+            continue
+        base_row = base.get(key)
+        if base_row is None:
+            merged.append((key, remote))
+            remote_changes += 1
+        elif _row_fingerprint(remote) != base_row[ROW_KEY]:
+            # Deleted here but edited remotely: keep it until resolved
+            conflict(key, 'deleted_locally', None, None, remote)
+            merged.append((key, remote))
+
+    _renumber(merged, added_locally)
+    merged_df = _frame(merged, columns, local_df)
+    return {
+        'df': merged_df,
+        'conflicts': conflicts,
+        'keys': [key for key, _ in merged],
+        'remote_changes': remote_changes,
+        'compared': compared
+    }
+
+
+def _with_id(row: Dict[str, str], local: Dict[str, str], remote: Dict[str, str]) -> Dict[str, str]:
+    """Give a merged row its Id; one already in the sheet wins over a local one."""
+    row_id = remote.get(ID_COLUMN) or local.get(ID_COLUMN)
+    if row_id:
+        row[ID_COLUMN] = row_id
+    return row
+
+
+def _renumber(rows: List[Tuple[str, Dict[str, str]]], added: set):
+    """Move local additions whose Number another row also uses past the highest Number."""
+    if not added:
+        return
+    counts: Dict[str, int] = {}
+    highest = 0
+    for _, cells in rows:
+        number = cells.get(KEY_COLUMN, '')
+        counts[number] = counts.get(number, 0) + 1
+        if number.isdigit():
+            highest = max(highest, int(number))
+    for key, cells in rows:
+        number = cells.get(KEY_COLUMN)
+        if key in added and number and counts[number] > 1 and number.isdigit():
+            counts[number] -= 1
+            highest += 1
+            cells[KEY_COLUMN] = str(highest)
+
+
+def _frame(rows: List[Tuple[str, Dict[str, str]]], columns: List[str], local_df: pd.DataFrame) -> pd.DataFrame:
+    """Rebuild a frame, restoring local dtypes where the values allow it."""
+    df = pd.DataFrame([[cells.get(column, '') for column in columns] for _, cells in rows], columns=columns)
+    for column in local_df.columns:
+        if pd.api.types.is_numeric_dtype(local_df[column].dtype):
+            converted = pd.to_numeric(df[column], errors='coerce')
+            if converted.notna().all():
+                df[column] = converted.astype(local_df[column].dtype) if len(df) else converted
+    return df
+
+
+def resolve_conflicts(result: Dict[str, Any], choices: Dict[str, str]) -> pd.DataFrame:
+    """Apply 'local' / 'remote' choices (by conflict id) to a merge result.
+
+    Unresolved conflicts keep the local side.
+    """
+    df = result['df'].copy()
+    positions = {key: i for i, key in enumerate(result['keys'])}
+    drop = []
+    for item in result['conflicts']:
+        if choices.get(item['id'], 'local') != 'remote':
+            if item['kind'] == 'deleted_locally':
+                drop.append(positions[item['key']])
+            continue
+        position = positions.get(item['key'])
+        if item['kind'] == 'edit':
+            df.iat[position, df.columns.get_loc(item['field'])] = item['remote']
+        elif item['kind'] == 'deleted_remotely':
+            drop.append(position)
+        elif item['kind'] == 'add':
+            for field, value in item['remote'].items():
+                if field in df.columns:
+                    df.iat[position, df.columns.get_loc(field)] = value
+    if drop:
+        df = df.drop(df.index[drop])
+    return df.reset_index(drop=True)
@@ -0,0 +1,297 @@
+"""Lightweight timing and allocation instrumentation for hot paths.
+
+Spans are recorded per named stage (``sync.fetch``, ``search``, ``stats``...)
+and counters track things like gspread calls and bytes transferred. While the
+recorder is disabled ``span`` hands back a shared no-op context manager, so
+instrumented code pays a single attribute check.
+
+The recorder is shared by the whole process. It is switched on either globally
+(``enable``, e.g. from ``TEMPLATE_MANAGER_PERF``) or through leases handed out
+by ``acquire``: each dashboard session holds its own lease, so one session
+turning its toggle off never stops recording for the others.
+"""
+
+import functools
+import json
+import os
+import threading
+import time
+import tracemalloc
+import weakref
+from typing import Any, Callable, Dict, Optional, Tuple
+
+PERF_ENV_VAR = "TEMPLATE_MANAGER_PERF"
+METRICS_PATH_ENV_VAR = "TEMPLATE_MANAGER_METRICS_PATH"
+
+
+class _NullSpan:
+    """No-op span handed out while instrumentation is disabled."""
+
+    __slots__ = ()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        return False
+
+
+_NULL_SPAN = _NullSpan()
+
+
+class _Span:
+    """Times a single stage and optionally tracks its peak allocation.
+
+    tracemalloc keeps a single peak per process, so a span resets it on entry
+    and, on exit, hands the peak it displaced (and its own) back to the span
+    it is nested in.
+    """
+
+    __slots__ = ('recorder', 'name', 'start', 'alloc_base', 'outer_peak', 'inner_peak')
+
+    def __init__(self, recorder: 'PerfRecorder', name: str):
+        self.recorder = recorder
+        self.name = name
+        self.start = 0.0
+        self.alloc_base = None
+        self.outer_peak = 0
+        self.inner_peak = 0
+
+    def __enter__(self):
+        if self.recorder.trace_allocations:
+            if not tracemalloc.is_tracing():
+                tracemalloc.start()
+            current, self.outer_peak = tracemalloc.get_traced_memory()
+            tracemalloc.reset_peak()
+            self.alloc_base = current
+            _span_stack().append(self)
+        self.start = time.perf_counter()
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        elapsed = time.perf_counter() - self.start
+        alloc = None
+        if self.alloc_base is not None:
+            stack = _span_stack()
+            if stack and stack[-1] is self:
+                stack.pop()
+            if tracemalloc.is_tracing():
+                peak = max(tracemalloc.get_traced_memory()[1], self.inner_peak)
+                alloc = max(peak - self.alloc_base, 0)
+                if stack:
+                    outer = stack[-1]
+                    outer.inner_peak = max(outer.inner_peak, self.outer_peak, peak)
+        self.recorder._record(self.name, elapsed, alloc, exc_type is not None)
+        return False
+
+
+_local = threading.local()
+
+
+def _span_stack() -> list:
+    stack = getattr(_local, 'spans', None)
+    if stack is None:
+        stack = _local.spans = []
+    return stack
+
+
+class PerfLease:
+    """Keeps the recorder enabled while held; see ``PerfRecorder.acquire``."""
+
+    __slots__ = ('recorder', 'trace_allocations', '__weakref__')
+
+    def __init__(self, recorder: 'PerfRecorder', trace_allocations: bool):
+        self.recorder = recorder
+        self.trace_allocations = trace_allocations
+
+    def release(self):
+        """Drop this lease; the recorder stays on while others remain."""
+        self.recorder._release(self)
+
+
+class PerfRecorder:
+    """Collects stage timings and counters for the running process."""
+
+    def __init__(self, enabled: bool = False, trace_allocations: bool = False):
+        self.enabled = enabled
+        self.trace_allocations = trace_allocations
+        self._global = (enabled, trace_allocations)
+        self._leases: 'weakref.WeakSet[PerfLease]' = weakref.WeakSet()
+        # Re-entrant: lease finalizers may fire while the lock is already held
+        self._lock = threading.RLock()
+        self._stages: Dict[str, Dict[str, Any]] = {}
+        self._counters: Dict[Tuple[str, Tuple[Tuple[str, str], ...]], float] = {}
+
+    def enable(self, trace_allocations: bool = False):
+        """Start recording spans and counters for the whole process."""
+        with self._lock:
+            self._global = (True, trace_allocations)
+        self._update()
+
+    def disable(self):
+        """Stop process-wide recording; leases keep it on and data is kept."""
+        with self._lock:
+            self._global = (False, False)
+        self._update()
+
+    def acquire(self, trace_allocations: bool = False) -> PerfLease:
+        """Return a lease keeping the recorder enabled until it is released or collected."""
+        lease = PerfLease(self, trace_allocations)
+        with self._lock:
+            self._leases.add(lease)
+        weakref.finalize(lease, self._update)
+        self._update()
+        return lease
+
+    def _release(self, lease: PerfLease):
+        with self._lock:
+            self._leases.discard(lease)
+        self._update()
+
+    def _update(self):
+        with self._lock:
+            leases = list(self._leases)
+            enabled, trace = self._global
+            self.enabled = enabled or bool(leases)
+            self.trace_allocations = trace or any(lease.trace_allocations for lease in leases)
+        if not self.trace_allocations and tracemalloc.is_tracing():
+            tracemalloc.stop()
+
+    def reset(self):
+        """Drop all collected spans and counters."""
+        with self._lock:
+            self._stages.clear()
+            self._counters.clear()
+
+    def span(self, name: str):
+        """Return a context manager timing the named stage."""
+        if not self.enabled:
+            return _NULL_SPAN
+        return _Span(self, name)
+
+    def timed(self, name: str) -> Callable:
+        """Decorator recording every call of the wrapped function as a span."""
+        def decorator(func: Callable) -> Callable:
+            @functools.wraps(func)
+            def wrapper(*args, **kwargs):
+                if not self.enabled:
+                    return func(*args, **kwargs)
+                with _Span(self, name):
+                    return func(*args, **kwargs)
+            return wrapper
+        return decorator
+
+    def count(self, name: str, value: float = 1, **labels: str):
+        """Increment a counter, e.g. ``count('gspread_calls', method='update')``."""
+        if not self.enabled:
+            return
+        key = (name, tuple(sorted((k, str(v)) for k, v in labels.items())))
+        with self._lock:
+            self._counters[key] = self._counters.get(key, 0) + value
+
+    def _record(self, name: str, elapsed: float, alloc: Optional[int], failed: bool):
+        with self._lock:
+            stage = self._stages.get(name)
+            if stage is None:
+                stage = self._stages[name] = {
+                    'count': 0,
+                    'errors': 0,
+                    'total_seconds': 0.0,
+                    'max_seconds': 0.0,
+                    'last_seconds': 0.0,
+                    'peak_alloc_bytes': None
+                }
+            stage['count'] += 1
+            stage['errors'] += int(failed)
+            stage['total_seconds'] += elapsed
+            stage['max_seconds'] = max(stage['max_seconds'], elapsed)
+            stage['last_seconds'] = elapsed
+            if alloc is not None:
+                stage['peak_alloc_bytes'] = max(stage['peak_alloc_bytes'] or 0, alloc)
+
+    def snapshot(self) -> Dict[str, Any]:
+        """Return a JSON-serialisable copy of everything recorded so far."""
+        with self._lock:
+            stages = {name: dict(stats) for name, stats in self._stages.items()}
+            counters = [
+                {'name': name, 'labels': dict(labels), 'value': value}
+                for (name, labels), value in self._counters.items()
+            ]
+        for stats in stages.values():
+            stats['avg_seconds'] = stats['total_seconds'] / stats['count'] if stats['count'] else 0.0
+        return {
+            'enabled': self.enabled,
+            'trace_allocations': self.trace_allocations,
+            'stages': stages,
+            'counters': counters
+        }
+
+    def to_json(self) -> str:
+        """Dump the snapshot as JSON."""
+        return json.dumps(self.snapshot(), indent=2, sort_keys=True)
+
+    def to_prometheus(self, prefix: str = "template_manager") -> str:
+        """Dump the snapshot in the Prometheus text exposition format."""
+        snap = self.snapshot()
+        lines = []
+
+        stage_metrics = [
+            ('stage_calls_total', 'count', 'counter', 'Number of times the stage ran'),
+            ('stage_errors_total', 'errors', 'counter', 'Number of stage runs that raised'),
+            ('stage_seconds_total', 'total_seconds', 'counter', 'Total time spent in the stage'),
+            ('stage_seconds_max', 'max_seconds', 'gauge', 'Slowest observed run of the stage'),
+            ('stage_alloc_peak_bytes', 'peak_alloc_bytes', 'gauge', 'Peak allocation observed in the stage')
+        ]
+        for metric, field, kind, help_text in stage_metrics:
+            samples = [
+                (name, stats[field]) for name, stats in sorted(snap['stages'].items())
+                if stats[field] is not None
+            ]
+            if not samples:
+                continue
+            full_name = f"{prefix}_{metric}"
+            lines.append(f"# HELP {full_name} {help_text}")
+            lines.append(f"# TYPE {full_name} {kind}")
+            for name, value in samples:
+                lines.append(f'{full_name}{{stage="{_escape_label(name)}"}} {value}')
+
+        counters: Dict[str, list] = {}
+        for counter in snap['counters']:
+            counters.setdefault(counter['name'], []).append(counter)
+        for name in sorted(counters):
+            full_name = f"{prefix}_{_sanitize_metric_name(name)}_total"
+            lines.append(f"# TYPE {full_name} counter")
+            for counter in counters[name]:
+                labels = ','.join(
+                    f'{key}="{_escape_label(value)}"' for key, value in counter['labels'].items()
+                )
+                lines.append(f"{full_name}{{{labels}}} {counter['value']}" if labels else f"{full_name} {counter['value']}")
+
+        return '\n'.join(lines) + '\n' if lines else ''
+
+    def write_metrics_file(self, path: Optional[str] = None) -> bool:
+        """Atomically write the Prometheus dump for a textfile collector to scrape."""
+        path = path or os.environ.get(METRICS_PATH_ENV_VAR)
+        if not path or not self.enabled:
+            return False
+        tmp_path = f"{path}.tmp"
+        with open(tmp_path, 'w', encoding='utf-8') as handle:
+            handle.write(self.to_prometheus())
+        os.replace(tmp_path, path)
+        return True
+
+
+def _sanitize_metric_name(name: str) -> str:
+    return ''.join(ch if ch.isalnum() or ch == '_' else '_' for ch in name)
+
+
+def _escape_label(value: str) -> str:
+    return str(value).replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n')
+
+
+_recorder = PerfRecorder(enabled=os.environ.get(PERF_ENV_VAR, '') not in ('', '0', 'false'))
+
+
+def get_recorder() -> PerfRecorder:
+    """Return the process-wide recorder."""
+    return _recorder
@@ -0,0 +1,283 @@
+"""Find similar templates with hashed TF-IDF vectors and an LSH index.
+
+Title, description and code are tokenized (camelCase and snake_case split
+into words), hashed into a fixed number of signed dimensions and weighted by
+inverse document frequency, giving every template a small dense unit vector.
+Random-hyperplane LSH tables narrow a query down to a few candidate rows,
+which are then ranked by exact cosine similarity. Everything is NumPy and
+runs locally; no model download or external service is involved.
+"""
+
+import os
+import re
+import zlib
+from collections import Counter
+from concurrent.futures import ProcessPoolExecutor
+from functools import lru_cache
+from typing import Any, Dict, List, Optional, Tuple
+
+import numpy as np
+import pandas as pd
+
+from template_manager.blobstore import CODE_HASH_COLUMN, BlobStore, hydrate
+from template_manager.core import ID_COLUMN
+from template_manager.perf import get_recorder
+
+perf = get_recorder()
+
+DIMENSIONS = 256
+IDF_BUCKETS = 1 << 18
+LSH_TABLES = 8
+LSH_BITS = 12
+FIELD_WEIGHTS = {'Title': 3.0, 'Description': 2.0, 'Code': 1.0}
+# Rebuild (refreshing IDF weights) once this share of rows changed incrementally
+REBUILD_FRACTION = 0.25
+PARALLEL_THRESHOLD = 20000
+PARALLEL_CHUNK_ROWS = 5000
+
+_TOKEN = re.compile(r'[A-Z]+(?![a-z])|[A-Z]?[a-z]+')
+
+
+@lru_cache(maxsize=1 << 16)
+def _token_hash(token: str) -> int:
+    return zlib.crc32(token.encode('utf-8'))
+
+
+def tokenize(text: str) -> List[str]:
+    """Lower-cased word tokens of at least two letters."""
+    return [token.lower() for token in _TOKEN.findall(text) if len(token) > 1]
+
+
+def _term_counts(fields: Dict[str, str]) -> Tuple[np.ndarray, np.ndarray]:
+    counts: Dict[int, float] = {}
+    for field, text in fields.items():
+        weight = FIELD_WEIGHTS.get(field, 1.0)
+        # Count raw tokens first so lower-casing and hashing run once per distinct token
+        for token, occurrences in Counter(_TOKEN.findall(text)).items():
+            if len(token) > 1:
+                term = _token_hash(token.lower())
+                counts[term] = counts.get(term, 0.0) + weight * occurrences
+    hashes = np.fromiter(counts.keys(), dtype=np.uint32, count=len(counts))
+    weights = np.fromiter(counts.values(), dtype=np.float32, count=len(counts))
+    return hashes, 1.0 + np.log(weights, where=weights > 1.0, out=np.zeros_like(weights))
+
+
+def _fields(row: Tuple[Any, ...], columns: List[str]) -> Dict[str, str]:
+    return {column: '' if pd.isna(value) else str(value) for column, value in zip(columns, row)}
+
+
+def _chunk_terms(task: Tuple[List[str], List[Tuple[Any, ...]]]) -> List[Tuple[np.ndarray, np.ndarray]]:
+    columns, rows = task
+    return [_term_counts(_fields(row, columns)) for row in rows]
+
+
+def _row_hashes(df: pd.DataFrame, columns: List[str]) -> np.ndarray:
+    return pd.util.hash_pandas_object(df[columns], index=False).to_numpy()
+
+
+def template_keys(df: pd.DataFrame) -> List[Any]:
+    """Index keys for ``df``: the stable Id column, else the index labels."""
+    return df[ID_COLUMN].tolist() if ID_COLUMN in df.columns else list(df.index)
+
+
+class SimilarityIndex:
+    """Unit vectors per template key plus LSH buckets over them.
+
+    ``sync`` brings the index in line with a frame, re-vectorising only rows
+    whose text changed. Keys are the templates' Ids (index labels for frames
+    without an Id column), so deleting or reordering rows does not force a
+    rebuild. With a ``blob_store``, frames holding CodeHash references are
+    indexed by reading only the bodies of rows that changed.
+    """
+
+    def __init__(
+        self,
+        dimensions: int = DIMENSIONS,
+        tables: int = LSH_TABLES,
+        bits: int = LSH_BITS,
+        seed: int = 0,
+        blob_store: Optional[BlobStore] = None
+    ):
+        rng = np.random.default_rng(seed)
+        self.blob_store = blob_store
+        self.dimensions = dimensions
+        self.tables = tables
+        self.bits = bits
+        self.planes = rng.standard_normal((dimensions, tables * bits)).astype(np.float32)
+        self._bit_values = (1 << np.arange(bits)).astype(np.int64)
+        self._reset()
+
+    def _reset(self):
+        self.vectors = np.zeros((0, self.dimensions), dtype=np.float32)
+        self.codes = np.zeros((0, self.tables), dtype=np.int64)
+        self.keys: List[Any] = []
+        self.slots: Dict[Any, int] = {}
+        self.hashes: Dict[Any, Optional[int]] = {}
+        self.free: List[int] = []
+        self.buckets: List[Dict[int, List[int]]] = [{} for _ in range(self.tables)]
+        self.doc_freq = np.zeros(IDF_BUCKETS, dtype=np.int32)
+        self.documents = 0
+        self.stale = 0
+
+    def __len__(self) -> int:
+        return len(self.slots)
+
+    def _idf(self, buckets: np.ndarray) -> np.ndarray:
+        return np.log((1.0 + self.documents) / (1.0 + self.doc_freq[buckets])) + 1.0
+
+    def _vector(self, hashes: np.ndarray, weights: np.ndarray) -> np.ndarray:
+        dims = (hashes >> 18) % self.dimensions
+        signs = np.where(hashes >> 31, -1.0, 1.0)
+        values = weights * signs * self._idf(hashes % IDF_BUCKETS)
+        vector = np.bincount(dims, weights=values, minlength=self.dimensions).astype(np.float32)
+        norm = np.linalg.norm(vector)
+        return vector / norm if norm else vector
+
+    def _codes(self, vectors: np.ndarray) -> np.ndarray:
+        projected = (vectors @ self.planes) > 0
+        return projected.reshape(len(vectors), self.tables, self.bits) @ self._bit_values
+
+    def _allocate(self) -> int:
+        if self.free:
+            return self.free.pop()
+        slot = len(self.keys)
+        if slot == len(self.vectors):
+            capacity = max(16, 2 * slot)
+            self.vectors = np.resize(self.vectors, (capacity, self.dimensions))
+            self.codes = np.resize(self.codes, (capacity, self.tables))
+        self.keys.append(None)
+        return slot
+
+    def _unbucket(self, slot: int):
+        for table, code in enumerate(self.codes[slot].tolist()):
+            bucket = self.buckets[table].get(code)
+            if bucket:
+                bucket.remove(slot)
+
+    def remove(self, key: Any):
+        """Drop a template from the index."""
+        slot = self.slots.pop(key, None)
+        if slot is None:
+            return
+        self._unbucket(slot)
+        self.vectors[slot] = 0
+        self.keys[slot] = None
+        self.hashes.pop(key, None)
+        self.free.append(slot)
+        self.stale += 1
+
+    def upsert(self, key: Any, fields: Dict[str, str], content_hash: Optional[int] = None):
+        """Add or re-vectorise one template using the current IDF weights."""
+        hashes, weights = _term_counts(fields)
+        if key in self.slots:
+            slot = self.slots[key]
+            self._unbucket(slot)
+        else:
+            slot = self._allocate()
+            self.slots[key] = slot
+            self.keys[slot] = key
+            self.documents += 1
+            self.doc_freq[np.unique(hashes % IDF_BUCKETS)] += 1
+        self.vectors[slot] = self._vector(hashes, weights)
+        self.codes[slot] = self._codes(self.vectors[slot:slot + 1])[0]
+        for table, code in enumerate(self.codes[slot].tolist()):
+            self.buckets[table].setdefault(code, []).append(slot)
+        self.hashes[key] = content_hash
+        self.stale += 1
+
+    def _columns(self, df: pd.DataFrame) -> List[str]:
+        """Text columns of ``df``, with CodeHash standing in for Code when bodies live in the store."""
+        columns = [column for column in FIELD_WEIGHTS if column in df.columns]
+        if 'Code' not in df.columns and CODE_HASH_COLUMN in df.columns and self.blob_store is not None:
+            columns.append(CODE_HASH_COLUMN)
+        return columns
+
+    def _text(self, df: pd.DataFrame) -> pd.DataFrame:
+        return hydrate(df, self.blob_store) if self.blob_store is not None else df
+
+    def rebuild(self, df: pd.DataFrame, max_workers: Optional[int] = None):
+        """Re-vectorise every row of ``df`` with fresh IDF weights.
+
+        Tokenizing dominates, so large frames are split over a process pool.
+        """
+        with perf.span('similarity.rebuild'):
+            self._reset()
+            columns = self._columns(df)
+            text = self._text(df[columns])
+            text_columns = list(text.columns)
+            rows = list(text.itertuples(index=False, name=None))
+            if len(rows) >= PARALLEL_THRESHOLD and (max_workers or os.cpu_count() or 1) > 1:
+                chunks = [(text_columns, rows[i:i + PARALLEL_CHUNK_ROWS]) for i in range(0, len(rows), PARALLEL_CHUNK_ROWS)]
+                with ProcessPoolExecutor(max_workers=max_workers) as pool:
+                    terms = [term for chunk in pool.map(_chunk_terms, chunks) for term in chunk]
+            else:
+                terms = _chunk_terms((text_columns, rows))
+            for hashes, _ in terms:
+                self.doc_freq[np.unique(hashes % IDF_BUCKETS)] += 1
+            self.documents = len(terms)
+            self.vectors = np.array([self._vector(*term) for term in terms], dtype=np.float32).reshape(-1, self.dimensions)
+            self.codes = self._codes(self.vectors)
+            self.keys = template_keys(df)
+            self.slots = {key: slot for slot, key in enumerate(self.keys)}
+            self.hashes = dict(zip(self.keys, _row_hashes(df, columns).tolist()))
+            for table in range(self.tables):
+                codes = self.codes[:, table]
+                order = np.argsort(codes, kind='stable')
+                unique, starts = np.unique(codes[order], return_index=True)
+                for code, group in zip(unique.tolist(), np.split(order, starts[1:])):
+                    self.buckets[table][code] = group.tolist()
+
+    def sync(self, df: pd.DataFrame) -> int:
+        """Match the index to ``df``; returns how many rows were (re)vectorised."""
+        columns = self._columns(df)
+        with perf.span('similarity.sync'):
+            hashes = _row_hashes(df, columns).tolist()
+            frame_keys = template_keys(df)
+            changed = [
+                position for position, (key, content_hash) in enumerate(zip(frame_keys, hashes))
+                if self.hashes.get(key) != content_hash
+            ]
+            keys = set(frame_keys)
+            removed = [key for key in self.slots if key not in keys]
+            if not changed and not removed:
+                return 0
+            if not self.slots or self.stale + len(changed) + len(removed) > REBUILD_FRACTION * len(df):
+                self.rebuild(df)
+                return len(df)
+            for key in removed:
+                self.remove(key)
+            subset = self._text(df[columns].iloc[changed])
+            text_columns = list(subset.columns)
+            for position, row in zip(changed, subset.itertuples(index=False, name=None)):
+                self.upsert(frame_keys[position], _fields(row, text_columns), hashes[position])
+            perf.count('similarity_updates', len(changed) + len(removed))
+            return len(changed)
+
+    def _candidates(self, slot: int, k: int) -> np.ndarray:
+        codes = self.codes[slot].tolist()
+        candidates = set()
+        for table, code in enumerate(codes):
+            candidates.update(self.buckets[table].get(code, ()))
+        if len(candidates) <= k:
+            # Multi-probe: neighbouring buckets one hyperplane away
+            for table, code in enumerate(codes):
+                for bit in range(self.bits):
+                    candidates.update(self.buckets[table].get(code ^ (1 << bit), ()))
+        candidates.discard(slot)
+        if len(candidates) < k:
+            return np.array([s for s, key in enumerate(self.keys) if key is not None and s != slot], dtype=np.int64)
+        return np.fromiter(candidates, dtype=np.int64, count=len(candidates))
+
+    def similar(self, key: Any, k: int = 5) -> List[Tuple[Any, float]]:
+        """The ``k`` most similar templates to ``key`` as (key, cosine) pairs."""
+        slot = self.slots.get(key)
+        if slot is None:
+            return []
+        with perf.span('similarity.query'):
+            candidates = self._candidates(slot, k)
+            if len(candidates) == 0:
+                return []
+            scores = self.vectors[candidates] @ self.vectors[slot]
+            top = np.argsort(-scores)[:k] if len(scores) <= k else np.argpartition(-scores, k)[:k]
+            top = top[np.argsort(-scores[top])]
+            return [(self.keys[candidates[i]], float(scores[i])) for i in top]
@@ -0,0 +1,248 @@
+"""Google Sheets synchronisation.
+
+gspread and google-auth are only imported when a sync actually runs, so the
+rest of the library (and the dashboard's cold start) does not pay for them.
+Clients are shared per service-account key (see ``template_manager.credentials``).
+Pushes merge concurrent sheet edits (see ``template_manager.merge``) and
+upload only the rows that differ from the worksheet. API calls are retried
+with exponential backoff on rate limits and transient errors, and each sync
+can be recorded in a ``template_manager.telemetry.SyncLog``.
+"""
+
+import random
+import time
+from typing import Any, Dict, List, Optional, Tuple, Union
+
+import pandas as pd
+
+from template_manager.core import diff_sheet_values, sheet_values
+from template_manager.credentials import ServiceAccount, service_account_from_info
+from template_manager.merge import frame_from_values, snapshot_base, three_way_merge
+from template_manager.perf import get_recorder
+from template_manager.telemetry import SyncLog, SyncMeter
+
+perf = get_recorder()
+
+# Google Sheets configuration
+GOOGLE_SHEETS_ID = "1eFZcnDoGT2NJHaEQSgxW5psN5kvlkYx1vtuXGRFTGTk"
+GOOGLE_SHEETS_SHEET_NAME = "demo_examples"
+GOOGLE_SHEETS_SCOPE = [
+    'https://spreadsheets.google.com/feeds',
+    'https://www.googleapis.com/auth/drive'
+]
+
+# Retry policy for rate limits (429) and transient server or network errors
+RETRY_ATTEMPTS = 5
+RETRY_BASE_SECONDS = 1.0
+RETRY_MAX_SECONDS = 32.0
+RETRYABLE_STATUS_CODES = {429, 500, 502, 503, 504}
+
+
+class SyncError(Exception):
+    """Raised when talking to Google Sheets fails."""
+
+
+Credentials = Union[ServiceAccount, Dict[str, Any]]
+
+
+def _is_retryable(error: Exception) -> bool:
+    status = getattr(getattr(error, 'response', None), 'status_code', None)
+    if status is not None:
+        return status in RETRYABLE_STATUS_CODES
+    from requests.exceptions import ConnectionError as RequestsConnectionError, Timeout
+
+    return isinstance(error, (RequestsConnectionError, Timeout, ConnectionError, TimeoutError))
+
+
+def _call(meter: SyncMeter, func, *args, **kwargs):
+    """Run one Sheets API call, metering it and retrying transient failures."""
+    for attempt in range(RETRY_ATTEMPTS):
+        start = time.perf_counter()
+        try:
+            return func(*args, **kwargs)
+        except Exception as e:
+            if attempt == RETRY_ATTEMPTS - 1 or not _is_retryable(e):
+                raise
+            meter.retries += 1
+            perf.count('gspread_retries', operation=meter.operation)
+            # Full jitter keeps concurrent sessions from retrying in lockstep
+            time.sleep(random.uniform(0, min(RETRY_MAX_SECONDS, RETRY_BASE_SECONDS * 2 ** attempt)))
+        finally:
+            meter.api_calls += 1
+            meter.api_seconds += time.perf_counter() - start
+            perf.count('gspread_calls', operation=meter.operation)
+
+
+def _downloaded(meter: SyncMeter, values: Any):
+    before = meter.bytes_down
+    meter.downloaded(values)
+    perf.count('gspread_bytes', meter.bytes_down - before, direction='download')
+
+
+def _uploaded(meter: SyncMeter, values: List[List[Any]]):
+    before = meter.bytes_up
+    meter.uploaded(values)
+    perf.count('gspread_bytes', meter.bytes_up - before, direction='upload')
+
+
+def open_worksheet(
+    credentials: Credentials,
+    sheet_id: str = GOOGLE_SHEETS_ID,
+    sheet_name: str = GOOGLE_SHEETS_SHEET_NAME,
+    meter: Optional[SyncMeter] = None
+):
+    """Open the template worksheet with a service account's shared client."""
+    meter = meter or SyncMeter('open', sheet_name)
+    account = credentials if isinstance(credentials, ServiceAccount) else service_account_from_info(credentials)
+    sheet = _call(meter, account.client().open_by_key, sheet_id)
+    return _call(meter, sheet.worksheet, sheet_name)
+
+
+def fetch_templates(
+    credentials: Credentials,
+    sheet_id: str = GOOGLE_SHEETS_ID,
+    sheet_name: str = GOOGLE_SHEETS_SHEET_NAME,
+    sync_log: Optional[SyncLog] = None
+) -> Optional[pd.DataFrame]:
+    """Fetch all templates from the worksheet; returns None for an empty sheet."""
+    meter = SyncMeter('fetch', sheet_name)
+    try:
+        with perf.span('sync.fetch'):
+            worksheet = open_worksheet(credentials, sheet_id, sheet_name, meter)
+
+            # Raw strings, as push reads them, so a base taken from this frame
+            # fingerprints like the worksheet (get_all_records would turn '007' into 7)
+            values = _call(meter, worksheet.get_all_values)
+            _downloaded(meter, values)
+            df = frame_from_values(values, numeric=True)
+            meter.rows = len(df)
+
+            return df if len(df) else None
+    except Exception as e:
+        meter.outcome = 'error'
+        meter.error = str(e)
+        raise SyncError(f"Error fetching Google Sheets data: {str(e)}") from e
+    finally:
+        if sync_log is not None:
+            sync_log.append(meter.record())
+
+
+def push_templates(
+    credentials: Credentials,
+    df: pd.DataFrame,
+    sheet_id: str = GOOGLE_SHEETS_ID,
+    sheet_name: str = GOOGLE_SHEETS_SHEET_NAME,
+    base: Optional[Dict[str, Dict[str, str]]] = None,
+    force: bool = False,
+    sync_log: Optional[SyncLog] = None
+) -> Dict[str, Any]:
+    """Merge the templates with concurrent sheet edits and write the result.
+
+    ``base`` is the ``snapshot_base`` taken at the last fetch or push. With a
+    base, remote edits made since then are merged in and conflicting edits
+    are returned (``status == 'conflicts'``) without writing anything.
+    Without a base, or with ``force``, the worksheet is overwritten. In both
+    cases only rows that differ from the worksheet are uploaded.
+
+    The result holds the merged ``df``, ``conflicts``, ``remote_changes``,
+    and the new ``base`` after a push or the ``remote_base`` to resolve
+    conflicts against.
+    """
+    meter = SyncMeter('push', sheet_name)
+    try:
+        with perf.span('sync.push'):
+            worksheet = open_worksheet(credentials, sheet_id, sheet_name, meter)
+
+            remote_values = _call(meter, worksheet.get_all_values)
+            _downloaded(meter, remote_values)
+
+            if base is None or force:
+                result = {'df': df, 'conflicts': [], 'remote_changes': 0, 'compared': 0}
+            else:
+                with perf.span('sync.merge'):
+                    remote_df = frame_from_values(remote_values)
+                    result = three_way_merge(base, df, remote_df)
+                if result['conflicts']:
+                    meter.outcome = 'conflicts'
+                    result['status'] = 'conflicts'
+                    result['remote_base'] = snapshot_base(remote_df)
+                    return result
+
+            write_worksheet(worksheet, result['df'], remote_values, meter)
+            result['status'] = 'pushed'
+            result['base'] = snapshot_base(result['df'])
+            return result
+    except Exception as e:
+        meter.outcome = 'error'
+        meter.error = str(e)
+        raise SyncError(f"Error pushing to Google Sheets: {str(e)}") from e
+    finally:
+        if sync_log is not None:
+            sync_log.append(meter.record())
+
+
+def write_worksheet(
+    worksheet,
+    df: pd.DataFrame,
+    remote_values: Optional[List[List[Any]]] = None,
+    meter: Optional[SyncMeter] = None
+) -> Dict[str, Any]:
+    """Write templates to an open worksheet.
+
+    With ``remote_values`` (the worksheet's current contents) only changed
+    rows are uploaded and rows beyond the new end are blanked; otherwise the
+    worksheet is cleared and rewritten. Returns the row diff that was applied.
+    """
+    meter = meter or SyncMeter('push', worksheet.title)
+    values = sheet_values(df)
+    diff = diff_sheet_values(remote_values or [], values)
+
+    if remote_values is None or diff['header_changed']:
+        _call(meter, worksheet.clear)
+        _call(meter, worksheet.update, values)
+        _uploaded(meter, values)
+        meter.rows = len(values) - 1
+        return diff
+
+    last_column = column_letter(max(len(values[0]), len(remote_values[0])))
+    updates = []
+    for start, end in _runs(diff['changed_rows'] + diff['appended_rows']):
+        updates.append({
+            'range': f"A{start}:{last_column}{end}",
+            'values': [_pad(values[row - 1], len(remote_values[0])) for row in range(start, end + 1)]
+        })
+    meter.rows = len(diff['changed_rows']) + len(diff['appended_rows'])
+    if updates:
+        _call(meter, worksheet.batch_update, updates)
+        _uploaded(meter, [row for update in updates for row in update['values']])
+
+    if diff['removed_rows']:
+        # Rows were removed: blank the leftover tail of the sheet
+        _call(meter, worksheet.batch_clear, [f"A{diff['removed_rows'][0]}:{last_column}{diff['removed_rows'][-1]}"])
+
+    return diff
+
+
+def _runs(rows: List[int]) -> List[Tuple[int, int]]:
+    """Group sorted row numbers into inclusive (first, last) runs."""
+    runs: List[Tuple[int, int]] = []
+    for row in rows:
+        if runs and runs[-1][1] == row - 1:
+            runs[-1] = (runs[-1][0], row)
+        else:
+            runs.append((row, row))
+    return runs
+
+
+def _pad(row: List[Any], width: int) -> List[Any]:
+    # Blank cells left over from a wider remote row
+    return list(row) + [''] * (width - len(row))
+
+
+def column_letter(index: int) -> str:
+    """Return the A1 column name for a 1-based column index."""
+    letters = ''
+    while index > 0:
+        index, remainder = divmod(index - 1, 26)
+        letters = chr(ord('A') + remainder) + letters
+    return letters
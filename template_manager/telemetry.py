@@ -0,0 +1,276 @@
+"""Persistent audit log and latency telemetry for Google Sheets syncs.
+
+Every fetch and push appends one JSON line recording its duration, the
+time spent inside Sheets API calls, rows and cells moved in each direction,
+bytes, API calls, retries and outcome. Comparing ``api_seconds`` with the
+total tells whether a slow sync was spent waiting on Google or in local
+work (merging, diffing, serialising); per-minute API call counts size usage
+against the Sheets quota.
+
+The log file is rotated to ``<path>.1`` once it reaches ``max_bytes``, and
+records older than ``retention`` are not kept in memory. ``records`` tails
+the file, so syncs run by other sessions or CLI processes show up without
+reopening the log. Writers hold an exclusive lock on ``<path>.lock`` while
+rotating and appending, so concurrent writers never rotate twice.
+"""
+
+import contextlib
+import json
+import math
+import os
+import threading
+import time
+from datetime import datetime, timedelta, timezone
+from typing import Any, Dict, Iterator, List, Optional
+
+try:
+    import fcntl
+except ImportError:
+    fcntl = None
+
+SYNC_LOG_PATH_ENV_VAR = 'TEMPLATE_MANAGER_SYNC_LOG'
+DEFAULT_SYNC_LOG_PATH = os.path.join(os.path.expanduser('~'), '.template_manager', 'sync_log.jsonl')
+# Google Sheets API default: read and write requests per minute per user
+SHEETS_QUOTA_PER_MINUTE = 60
+SYNC_LOG_MAX_BYTES = 5 * 1024 * 1024
+SYNC_LOG_RETENTION = timedelta(days=30)
+
+
+class SyncMeter:
+    """Accumulates the cost of one sync while it runs."""
+
+    def __init__(self, operation: str, sheet: str):
+        self.operation = operation
+        self.sheet = sheet
+        self.started = time.perf_counter()
+        self.api_calls = 0
+        self.api_seconds = 0.0
+        self.retries = 0
+        self.rows = 0
+        self.cells_down = 0
+        self.cells_up = 0
+        self.bytes_down = 0
+        self.bytes_up = 0
+        self.outcome = 'ok'
+        self.error: Optional[str] = None
+
+    def downloaded(self, values: List[List[Any]]):
+        """Account for rows read from the sheet."""
+        self.cells_down += _cell_count(values)
+        self.bytes_down += _payload_bytes(values)
+
+    def uploaded(self, values: List[List[Any]]):
+        """Account for rows written to the sheet."""
+        self.cells_up += _cell_count(values)
+        self.bytes_up += _payload_bytes(values)
+
+    def record(self) -> Dict[str, Any]:
+        """The log record for this sync."""
+        record = {
+            'ts': datetime.now(timezone.utc).isoformat(timespec='milliseconds'),
+            'operation': self.operation,
+            'sheet': self.sheet,
+            'outcome': self.outcome,
+            'duration_seconds': round(time.perf_counter() - self.started, 4),
+            'api_seconds': round(self.api_seconds, 4),
+            'api_calls': self.api_calls,
+            'retries': self.retries,
+            'rows': self.rows,
+            'cells_down': self.cells_down,
+            'cells_up': self.cells_up,
+            'bytes_down': self.bytes_down,
+            'bytes_up': self.bytes_up
+        }
+        if self.error:
+            record['error'] = self.error
+        return record
+
+
+def _cell_count(values: Any) -> int:
+    return sum(len(row) for row in values) if values else 0
+
+
+def _payload_bytes(values: Any) -> int:
+    """Estimate the JSON size of rows from their cell text lengths.
+
+    Counts each cell's characters plus quotes and separator, which tracks the
+    real payload closely without serialising the whole sheet again.
+    """
+    if not values:
+        return 0
+    total = 2
+    for row in values:
+        total += 3 + sum(4 if value is None else len(str(value)) + 3 for value in row)
+    return total
+
+
+class SyncLog:
+    """Append-only JSON-lines log of sync records; in memory only without a path."""
+
+    def __init__(
+        self,
+        path: Optional[str] = None,
+        max_bytes: int = SYNC_LOG_MAX_BYTES,
+        retention: Optional[timedelta] = SYNC_LOG_RETENTION
+    ):
+        self.path = path
+        self.max_bytes = max_bytes
+        self.retention = retention
+        self._records: List[Dict[str, Any]] = []
+        self._offset = 0
+        self._file_id = None
+        self._lock = threading.Lock()
+        with self._lock:
+            self._refresh()
+
+    @contextlib.contextmanager
+    def _file_lock(self) -> Iterator[None]:
+        """Hold the cross-process writer lock (a no-op without fcntl)."""
+        with open(f"{self.path}.lock", 'a') as handle:
+            if fcntl is not None:
+                fcntl.flock(handle, fcntl.LOCK_EX)
+            try:
+                yield
+            finally:
+                if fcntl is not None:
+                    fcntl.flock(handle, fcntl.LOCK_UN)
+
+    def _read_lines(self, handle) -> None:
+        """Parse complete lines from ``handle``'s position, advancing the offset."""
+        for line in handle:
+            if not line.endswith(b'\n'):
+                # Being written right now; picked up by the next refresh
+                break
+            self._offset += len(line)
+            try:
+                self._records.append(json.loads(line))
+            except ValueError:
+                # A torn line from an interrupted write
+                continue
+
+    def _refresh(self):
+        """Read records appended since the last read, reloading after a rotation."""
+        if not self.path:
+            return
+        try:
+            handle = open(self.path, 'rb')
+        except FileNotFoundError:
+            return
+        with handle:
+            stat = os.fstat(handle.fileno())
+            file_id = (stat.st_dev, stat.st_ino)
+            if file_id != self._file_id or stat.st_size < self._offset:
+                self._records = self._rotated_records()
+                self._offset = 0
+                self._file_id = file_id
+            if stat.st_size > self._offset:
+                handle.seek(self._offset)
+                self._read_lines(handle)
+        self._prune()
+
+    def _rotated_records(self) -> List[Dict[str, Any]]:
+        records = []
+        try:
+            with open(f"{self.path}.1", encoding='utf-8') as handle:
+                for line in handle:
+                    try:
+                        records.append(json.loads(line))
+                    except ValueError:
+                        continue
+        except FileNotFoundError:
+            pass
+        return records
+
+    def _prune(self):
+        if self.retention is None or not self._records:
+            return
+        cutoff = (datetime.now(timezone.utc) - self.retention).isoformat(timespec='milliseconds')
+        if self._records[0].get('ts', '') < cutoff:
+            self._records = [record for record in self._records if record.get('ts', '') >= cutoff]
+
+    def append(self, record: Dict[str, Any]):
+        """Add a record, persisting it when the log has a path."""
+        with self._lock:
+            if not self.path:
+                self._records.append(record)
+                self._prune()
+                return
+            directory = os.path.dirname(self.path)
+            if directory:
+                os.makedirs(directory, exist_ok=True)
+            with self._file_lock():
+                # Checked under the lock, so only one writer rotates a full file
+                if self.max_bytes and os.path.exists(self.path) and os.path.getsize(self.path) >= self.max_bytes:
+                    os.replace(self.path, f"{self.path}.1")
+                with open(self.path, 'a', encoding='utf-8') as handle:
+                    handle.write(json.dumps(record) + '\n')
+            self._refresh()
+
+    def records(self, since: Optional[datetime] = None) -> List[Dict[str, Any]]:
+        """Records in chronological order, optionally only those after ``since`` (UTC)."""
+        with self._lock:
+            self._refresh()
+            records = list(self._records)
+        if since is not None:
+            cutoff = since.isoformat(timespec='milliseconds')
+            records = [record for record in records if record.get('ts', '') >= cutoff]
+        return records
+
+
+def percentile(values: List[float], fraction: float) -> Optional[float]:
+    """Nearest-rank percentile of ``values`` (``fraction`` in 0..1)."""
+    if not values:
+        return None
+    ordered = sorted(values)
+    return ordered[max(0, math.ceil(fraction * len(ordered)) - 1)]
+
+
+def summarize(records: List[Dict[str, Any]]) -> Dict[str, Dict[str, Any]]:
+    """Per-operation counts, outcomes, p50/p95 latency and transfer totals."""
+    summary: Dict[str, Dict[str, Any]] = {}
+    for operation in sorted({record['operation'] for record in records}):
+        selected = [record for record in records if record['operation'] == operation]
+        durations = [record['duration_seconds'] for record in selected]
+        api = [record['api_seconds'] for record in selected]
+        summary[operation] = {
+            'count': len(selected),
+            'errors': sum(record['outcome'] == 'error' for record in selected),
+            'conflicts': sum(record['outcome'] == 'conflicts' for record in selected),
+            'p50_seconds': percentile(durations, 0.5),
+            'p95_seconds': percentile(durations, 0.95),
+            'p50_api_seconds': percentile(api, 0.5),
+            'p95_api_seconds': percentile(api, 0.95),
+            'api_calls': sum(record['api_calls'] for record in selected),
+            'retries': sum(record['retries'] for record in selected),
+            'cells': sum(record['cells_down'] + record['cells_up'] for record in selected),
+            'bytes': sum(record['bytes_down'] + record['bytes_up'] for record in selected)
+        }
+    return summary
+
+
+def calls_per_minute(records: List[Dict[str, Any]]) -> Dict[str, int]:
+    """API calls (including retries) bucketed by UTC minute, as ``YYYY-MM-DDTHH:MM`` keys."""
+    buckets: Dict[str, int] = {}
+    for record in records:
+        minute = record['ts'][:16]
+        buckets[minute] = buckets.get(minute, 0) + record['api_calls']
+    return dict(sorted(buckets.items()))
+
+
+def quota_usage(records: List[Dict[str, Any]], quota_per_minute: int = SHEETS_QUOTA_PER_MINUTE) -> Dict[str, Any]:
+    """Peak and last-minute API calls relative to the per-minute quota."""
+    buckets = calls_per_minute(records)
+    peak = max(buckets.values(), default=0)
+    last_minute = (datetime.now(timezone.utc) - timedelta(minutes=1)).isoformat(timespec='milliseconds')
+    recent = sum(record['api_calls'] for record in records if record['ts'] >= last_minute)
+    return {
+        'quota_per_minute': quota_per_minute,
+        'peak_calls_per_minute': peak,
+        'peak_fraction': peak / quota_per_minute if quota_per_minute else None,
+        'calls_last_minute': recent
+    }
+
+
+def open_sync_log() -> SyncLog:
+    """The log at $TEMPLATE_MANAGER_SYNC_LOG, or the default path under the home directory."""
+    return SyncLog(os.environ.get(SYNC_LOG_PATH_ENV_VAR) or DEFAULT_SYNC_LOG_PATH)
@@ -0,0 +1,178 @@
+"""Excel workbook export and import using openpyxl's streaming modes.
+
+Exports use a write-only workbook with one sheet per category: rows are
+streamed to each sheet's temporary file as they are produced, so memory
+stays flat however many templates there are. Imports use a read-only
+workbook, which parses sheets lazily row by row. openpyxl is imported only
+when a workbook is read or written.
+"""
+
+import io
+import re
+import zipfile
+from typing import Any, BinaryIO, Dict, List, Optional, Union
+
+import pandas as pd
+
+from template_manager.perf import get_recorder
+
+perf = get_recorder()
+
+XLSX_MIME = 'application/vnd.openxmlformats-officedocument.spreadsheetml.sheet'
+DEFAULT_SHEET_TITLE = 'Templates'
+COLUMN_WIDTHS = {'Number': 10, 'Title': 40, 'Description': 60, 'Category': 16, 'Code': 100}
+DEFAULT_COLUMN_WIDTH = 20
+WRAPPED_COLUMNS = ('Description', 'Code')
+WRAPPED_STYLE = 'Wrapped text'
+# Excel refuses cells longer than this
+MAX_CELL_CHARACTERS = 32767
+
+_INVALID_TITLE_CHARACTERS = re.compile(r'[\[\]:*?/\\]')
+
+
+def sheet_title(category: Any, used: Dict[str, str]) -> str:
+    """A valid, unique worksheet title (at most 31 characters) for a category."""
+    title = _INVALID_TITLE_CHARACTERS.sub('-', str(category)).strip("' ") or DEFAULT_SHEET_TITLE
+    title = title[:31]
+    candidate, suffix = title, 2
+    while candidate.lower() in used:
+        candidate = f"{title[:31 - len(str(suffix)) - 1]}~{suffix}"
+        suffix += 1
+    used[candidate.lower()] = category
+    return candidate
+
+
+def check_cell_limits(df: pd.DataFrame, code_lengths: Optional[pd.Series] = None) -> None:
+    """Raise ValueError if any text value is too long for an Excel cell.
+
+    ``code_lengths`` stands in for the Code column of a dehydrated frame.
+    """
+    columns = [
+        (column, df[column].astype(str).str.len()) for column in df.columns
+        if pd.api.types.is_object_dtype(df[column]) or pd.api.types.is_string_dtype(df[column])
+    ]
+    if code_lengths is not None:
+        columns.append(('Code', code_lengths))
+    for column, lengths in columns:
+        if len(lengths) and lengths.max() > MAX_CELL_CHARACTERS:
+            number = int(lengths.to_numpy().argmax()) + 1
+            raise ValueError(
+                f"Row {number}: {column} has {int(lengths.max()):,} characters; "
+                f"Excel cells hold at most {MAX_CELL_CHARACTERS:,}"
+            )
+
+
+@perf.timed('export.xlsx')
+def export_to_xlsx(df: pd.DataFrame, target: Union[str, BinaryIO, None] = None) -> Optional[bytes]:
+    """Write templates as a workbook with one sheet per Category.
+
+    ``target`` is a path or binary file; without one the workbook's bytes are
+    returned. Raises ValueError when a value exceeds Excel's cell limit.
+    """
+    from openpyxl import Workbook
+    from openpyxl.cell import WriteOnlyCell
+    from openpyxl.cell.cell import ILLEGAL_CHARACTERS_RE
+    from openpyxl.styles import Alignment, Font, NamedStyle
+    from openpyxl.utils import get_column_letter
+
+    check_cell_limits(df)
+    workbook = Workbook(write_only=True)
+    columns = [str(column) for column in df.columns]
+    header_font = Font(bold=True)
+    # A named style is resolved once per cell by name, far cheaper than per-cell Alignment objects
+    workbook.add_named_style(NamedStyle(WRAPPED_STYLE, alignment=Alignment(wrap_text=True, vertical='top')))
+    wrapped_positions = {position for position, column in enumerate(columns) if column in WRAPPED_COLUMNS}
+    sheets: Dict[Any, Any] = {}
+    used_titles: Dict[str, str] = {}
+
+    def worksheet_for(category: Any):
+        if category not in sheets:
+            worksheet = workbook.create_sheet(sheet_title(category, used_titles))
+            for position, column in enumerate(columns, start=1):
+                width = COLUMN_WIDTHS.get(column, DEFAULT_COLUMN_WIDTH)
+                worksheet.column_dimensions[get_column_letter(position)].width = width
+            worksheet.freeze_panes = 'A2'
+            header = []
+            for column in columns:
+                cell = WriteOnlyCell(worksheet, value=column)
+                cell.font = header_font
+                header.append(cell)
+            worksheet.append(header)
+            sheets[category] = worksheet
+        return sheets[category]
+
+    category_position = columns.index('Category') if 'Category' in columns else None
+    for row in df.itertuples(index=False, name=None):
+        category = DEFAULT_SHEET_TITLE if category_position is None else row[category_position]
+        if category is None or (not isinstance(category, str) and pd.isna(category)):
+            # Blank categories share the default sheet instead of a 'nan' or 'None' one
+            category = DEFAULT_SHEET_TITLE
+        worksheet = worksheet_for(category)
+        cells: List[Any] = []
+        for position, value in enumerate(row):
+            if isinstance(value, str):
+                value = ILLEGAL_CHARACTERS_RE.sub('', value)
+            elif pd.isna(value):
+                value = None
+            if position in wrapped_positions:
+                cell = WriteOnlyCell(worksheet, value=value)
+                cell.style = WRAPPED_STYLE
+                value = cell
+            cells.append(value)
+        worksheet.append(cells)
+
+    if not sheets:
+        worksheet_for(DEFAULT_SHEET_TITLE)
+
+    if target is not None:
+        workbook.save(target)
+        return None
+    buffer = io.BytesIO()
+    workbook.save(buffer)
+    return buffer.getvalue()
+
+
+@perf.timed('import.xlsx')
+def import_from_xlsx(source: Union[str, bytes, BinaryIO]) -> pd.DataFrame:
+    """Read templates from every sheet of a workbook; raises ValueError on malformed input.
+
+    Sheets without a Category column take their title as the category. Rows
+    are returned in Number order when that column is present.
+    """
+    from openpyxl import load_workbook
+    from openpyxl.utils.exceptions import InvalidFileException
+
+    if isinstance(source, bytes):
+        source = io.BytesIO(source)
+    try:
+        workbook = load_workbook(source, read_only=True, data_only=True)
+    except (InvalidFileException, zipfile.BadZipFile, KeyError, OSError) as e:
+        raise ValueError(f"Not a readable workbook: {e}") from e
+
+    records: List[Dict[str, Any]] = []
+    header_columns: List[str] = []
+    try:
+        for worksheet in workbook.worksheets:
+            rows = worksheet.iter_rows(values_only=True)
+            header = next(rows, None)
+            if not header:
+                continue
+            # Keep each header's position so a gap in the header does not shift later columns
+            columns = [(position, str(column)) for position, column in enumerate(header) if column is not None]
+            header_columns = header_columns or [column for _, column in columns]
+            for row in rows:
+                if row is None or all(value is None for value in row):
+                    continue
+                record = {
+                    column: '' if position >= len(row) or row[position] is None else row[position]
+                    for position, column in columns
+                }
+                record.setdefault('Category', worksheet.title)
+                records.append(record)
+    finally:
+        workbook.close()
+
+    df = pd.DataFrame.from_records(records) if records else pd.DataFrame(columns=header_columns)
+    if 'Number' in df.columns and pd.api.types.is_numeric_dtype(df['Number']):
+        df = df.sort_values('Number', kind='stable').reset_index(drop=True)
+    return df
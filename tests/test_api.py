@@ -0,0 +1,61 @@
+"""Tests for the read-only HTTP API's error responses."""
+
+import json
+import threading
+from urllib.error import HTTPError
+from urllib.request import urlopen
+
+import pytest
+
+from template_manager import api
+from template_manager.core import create_sample_data, export_to_json
+
+
+@pytest.fixture
+def serve(tmp_path):
+    servers = []
+
+    def start(df):
+        path = tmp_path / 'templates.json'
+        path.write_text(export_to_json(df), encoding='utf-8')
+        server = api.create_server(str(path), port=0, quiet=True)
+        threading.Thread(target=server.serve_forever, daemon=True).start()
+        servers.append(server)
+        return f"http://127.0.0.1:{server.server_address[1]}"
+
+    yield start
+    for server in servers:
+        server.shutdown()
+        server.server_close()
+
+
+def get(url):
+    try:
+        with urlopen(url, timeout=5) as response:
+            return response.status, json.loads(response.read())
+    except HTTPError as e:
+        return e.code, json.loads(e.read())
+
+
+def test_sort_by_mixed_types_is_a_bad_request(serve):
+    df = create_sample_data()
+    df['Number'] = df['Number'].astype(object)
+    df.at[0, 'Number'] = 'first'
+    base = serve(df)
+
+    status, body = get(f"{base}/templates?sort=Number")
+
+    assert status == 400
+    assert 'Number' in body['error']
+    assert get(f"{base}/templates?sort=Title")[0] == 200
+
+
+def test_unexpected_errors_return_json_500(serve, monkeypatch, capsys):
+    base = serve(create_sample_data())
+    monkeypatch.setattr(api, 'route', lambda *args: 1 / 0)
+
+    status, body = get(f"{base}/health")
+
+    assert status == 500
+    assert body == {'error': 'Internal server error'}
+    assert 'ZeroDivisionError' in capsys.readouterr().err
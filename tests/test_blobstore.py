@@ -0,0 +1,79 @@
+"""Tests for the blob store and the gc-blobs command that prunes it."""
+
+import os
+
+from template_manager import cli
+from template_manager.analysis import analyze_templates
+from template_manager.blobstore import BlobStore, code_search_mask, content_hash, dehydrate
+from template_manager.core import create_sample_data
+from template_manager.files import read_templates, write_templates
+from template_manager.similarity import SimilarityIndex
+
+
+def write_file(path, text=''):
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    with open(path, 'w', encoding='utf-8') as handle:
+        handle.write(text)
+
+
+def test_round_trip_stores_identical_bodies_once(tmp_path):
+    store = BlobStore(str(tmp_path / 'blobs'), 'gzip')
+    df = create_sample_data()
+    df.loc[1, 'Code'] = df.loc[0, 'Code']
+
+    write_templates(df, str(tmp_path / 'cache.json'), blob_store=store)
+
+    stored = [name for _, _, names in os.walk(store.root) for name in names]
+    assert len(stored) == df['Code'].nunique()
+    restored = read_templates(str(tmp_path / 'cache.json'), blob_store=store)
+    assert restored['Code'].tolist() == df['Code'].tolist()
+
+
+def test_dehydrated_frames_search_analyse_and_index_like_inline_ones(tmp_path):
+    store = BlobStore(str(tmp_path / 'blobs'), 'gzip')
+    df = create_sample_data()
+    df.loc[len(df)] = [len(df) + 1, 'Empty', 'Python', 'No code yet', None]
+    slim = dehydrate(df, store)
+
+    assert 'Code' not in slim.columns
+    assert slim['CodeHash'].iloc[-1] == content_hash('')
+    assert code_search_mask(slim, store, 'PLACEHOLDER').tolist() == df['Code'].str.contains('placeholder').fillna(False).tolist()
+    assert analyze_templates(slim, blob_store=store).equals(analyze_templates(df.fillna({'Code': ''})))
+    inline = SimilarityIndex()
+    inline.rebuild(df.fillna({'Code': ''}))
+    stored = SimilarityIndex(blob_store=store)
+    stored.rebuild(slim)
+    assert stored.similar(0) == inline.similar(0)
+
+
+def test_gc_blobs_removes_only_unreferenced_blobs(tmp_path):
+    root = tmp_path / 'store'
+    store = BlobStore(str(root), 'gzip')
+    df = create_sample_data().iloc[:1]
+    write_templates(df, str(root / 'ref.json'), blob_store=store)
+    live = content_hash(df['Code'].iloc[0])
+    stale = store.put('print("stale")')
+    unrelated = [
+        root / 'notes.txt',
+        root / 'sub' / 'keep.py',
+        root / stale[:2] / 'notes.txt',
+        root / 'zz' / ('a' * 64),
+        root / 'ab' / ('cd' + 'e' * 62),
+        root / stale[:2] / (stale + '.tmp')
+    ]
+    for path in unrelated:
+        write_file(str(path))
+
+    assert cli.main(['gc-blobs', str(root / 'ref.json'), '--blob-store', str(root), '-j', '1']) == cli.EXIT_OK
+
+    assert live in store
+    assert stale not in store
+    assert all(path.exists() for path in unrelated)
+    assert (root / 'ref.json').exists()
+
+
+def test_gc_blobs_requires_a_blob_store(tmp_path, capsys):
+    write_templates(create_sample_data(), str(tmp_path / 'cache.json'))
+
+    assert cli.main(['gc-blobs', str(tmp_path / 'cache.json')]) == cli.EXIT_FAILURE
+    assert 'needs --blob-store' in capsys.readouterr().err
@@ -0,0 +1,63 @@
+"""Tests for background token refreshes on shared service accounts."""
+
+import threading
+from datetime import datetime, timedelta, timezone
+
+from template_manager.credentials import ServiceAccount
+
+INFO = {'client_email': 'bot@example.com', 'private_key': 'key', 'token_uri': 'https://example.com/token'}
+
+
+class SlowCredentials:
+    """Credentials whose token exchange blocks until released."""
+
+    def __init__(self):
+        self.expiry = None
+        self.started = threading.Event()
+        self.release = threading.Event()
+
+    def refresh(self, request):
+        self.started.set()
+        self.release.wait(5)
+        self.expiry = datetime.now(timezone.utc).replace(tzinfo=None) + timedelta(hours=1)
+
+
+def account_with(credentials):
+    account = ServiceAccount(INFO, 'f' * 64)
+    account._credentials = credentials
+    return account
+
+
+def test_credentials_do_not_wait_on_a_refresh_in_flight():
+    credentials = SlowCredentials()
+    account = account_with(credentials)
+    refresher = threading.Thread(target=account.refresh)
+    refresher.start()
+    assert credentials.started.wait(5)
+
+    done = threading.Event()
+    threading.Thread(target=lambda: (account.credentials(), done.set())).start()
+
+    assert done.wait(1)
+    credentials.release.set()
+    refresher.join(5)
+
+
+def test_restarting_after_stop_leaves_one_refresh_loop():
+    credentials = SlowCredentials()
+    credentials.release.set()
+    credentials.expiry = datetime.now(timezone.utc).replace(tzinfo=None) + timedelta(hours=1)
+    account = account_with(credentials)
+
+    account.start_refresh()
+    first = account._refresher
+    account.stop()
+    account.start_refresh()
+    second = account._refresher
+
+    first.join(5)
+    assert not first.is_alive()
+    assert second.is_alive()
+    account.stop()
+    second.join(5)
+    assert not second.is_alive()
@@ -0,0 +1,172 @@
+"""Behavioural tests for fetch/push merging against an in-memory worksheet."""
+
+import pytest
+
+from benchmarks.fake_gspread import FakeWorksheet
+from template_manager import sync
+from template_manager.core import ID_COLUMN, ensure_template_ids, sheet_values
+from template_manager.merge import resolve_conflicts, snapshot_base, three_way_merge
+
+HEADER = ['Number', 'Title', 'Category', 'Description', 'Code']
+ID_HEADER = HEADER + [ID_COLUMN]
+
+
+def sheet(*rows, header=HEADER):
+    return FakeWorksheet([header] + [[str(value) for value in row] for row in rows])
+
+
+def add_row(df, **cells):
+    df.loc[len(df)] = [cells.get(column, '') for column in df.columns]
+
+
+def remote_frame(worksheet):
+    return sync.frame_from_values(worksheet.get_all_values())
+
+
+@pytest.fixture
+def worksheet(monkeypatch):
+    ws = sheet(
+        [1, 'Login', 'HTML', 'form', '<form></form>'],
+        [2, '007', 'Python', 'agent', 'print(7)'],
+        [3, 'Chart', 'JS', 'plot', 'draw()']
+    )
+    monkeypatch.setattr(sync, 'open_worksheet', lambda *args, **kwargs: ws)
+    return ws
+
+
+def test_fetch_keeps_text_that_only_looks_numeric(worksheet):
+    df = sync.fetch_templates(None)
+    assert df['Number'].tolist() == [1, 2, 3]
+    assert df.at[1, 'Title'] == '007'
+    assert snapshot_base(df) == snapshot_base(remote_frame(worksheet))
+
+
+def test_unchanged_push_after_remote_edit_has_no_conflicts(worksheet):
+    df = sync.fetch_templates(None)
+    base = snapshot_base(df)
+    worksheet._values[3][1] = 'Chart v2'
+
+    result = sync.push_templates(None, df, base=base)
+
+    assert result['status'] == 'pushed'
+    assert result['conflicts'] == []
+    assert result['remote_changes'] == 1
+    assert worksheet.get_all_values()[2][1] == '007'
+    assert worksheet.get_all_values()[3][1] == 'Chart v2'
+
+
+def test_duplicate_numbers_merge_by_occurrence():
+    ws = sheet([1, 'First', 'A', '', 'a()'], [1, 'Second', 'B', '', 'b()'])
+    local = remote_frame(ws)
+    base = snapshot_base(local)
+    local.at[1, 'Code'] = 'b2()'
+    ws._values[1][4] = 'a2()'
+
+    result = three_way_merge(base, local, remote_frame(ws))
+
+    assert result['conflicts'] == []
+    assert result['df']['Code'].tolist() == ['a2()', 'b2()']
+
+
+def test_same_field_edited_on_both_sides_conflicts():
+    ws = sheet([1, 'Login', 'HTML', '', 'old'])
+    local = remote_frame(ws)
+    base = snapshot_base(local)
+    local.at[0, 'Code'] = 'mine'
+    ws._values[1][4] = 'theirs'
+
+    result = three_way_merge(base, local, remote_frame(ws))
+
+    assert [(item['kind'], item['field']) for item in result['conflicts']] == [('edit', 'Code')]
+    assert result['df'].at[0, 'Code'] == 'mine'
+    resolved = resolve_conflicts(result, {result['conflicts'][0]['id']: 'remote'})
+    assert resolved.at[0, 'Code'] == 'theirs'
+
+
+def test_local_delete_of_remotely_edited_row():
+    ws = sheet([1, 'Keep', 'A', '', 'k()'], [2, 'Gone', 'B', '', 'g()'])
+    local = remote_frame(ws)
+    base = snapshot_base(local)
+    local = local.iloc[:1]
+    ws._values[2][4] = 'g2()'
+
+    result = three_way_merge(base, local, remote_frame(ws))
+
+    assert [item['kind'] for item in result['conflicts']] == ['deleted_locally']
+    assert resolve_conflicts(result, {})['Title'].tolist() == ['Keep']
+    kept = resolve_conflicts(result, {result['conflicts'][0]['id']: 'remote'})
+    assert kept['Code'].tolist() == ['k()', 'g2()']
+
+
+def test_local_edit_of_remotely_deleted_row():
+    ws = sheet([1, 'Keep', 'A', '', 'k()'], [2, 'Edited', 'B', '', 'e()'])
+    local = remote_frame(ws)
+    base = snapshot_base(local)
+    local.at[1, 'Code'] = 'e2()'
+    del ws._values[2]
+
+    result = three_way_merge(base, local, remote_frame(ws))
+
+    assert [item['kind'] for item in result['conflicts']] == ['deleted_remotely']
+    assert resolve_conflicts(result, {})['Code'].tolist() == ['k()', 'e2()']
+    dropped = resolve_conflicts(result, {result['conflicts'][0]['id']: 'remote'})
+    assert dropped['Title'].tolist() == ['Keep']
+
+
+def test_unedited_row_deleted_remotely_is_dropped():
+    ws = sheet([1, 'Keep', 'A', '', 'k()'], [2, 'Gone', 'B', '', 'g()'])
+    local = remote_frame(ws)
+    base = snapshot_base(local)
+    del ws._values[2]
+
+    result = three_way_merge(base, local, remote_frame(ws))
+
+    assert result['conflicts'] == []
+    assert result['df']['Title'].tolist() == ['Keep']
+
+
+def test_assigning_ids_does_not_count_as_a_local_edit(worksheet):
+    df = sync.fetch_templates(None)
+    base = snapshot_base(df)
+    ensure_template_ids(df)
+    del worksheet._values[2]
+
+    result = sync.push_templates(None, df, base=base)
+
+    assert result['status'] == 'pushed'
+    assert result['conflicts'] == []
+    assert [row[1] for row in worksheet.get_all_values()[1:]] == ['Login', 'Chart']
+    assert worksheet.get_all_values()[0][-1] == ID_COLUMN
+
+
+def test_templates_added_on_both_sides_are_both_kept(monkeypatch):
+    ws = sheet([1, 'Login', 'HTML', '', 'l()', 'aaaaaaaaaaaa'], [2, 'Chart', 'JS', '', 'c()', 'bbbbbbbbbbbb'], header=ID_HEADER)
+    monkeypatch.setattr(sync, 'open_worksheet', lambda *args, **kwargs: ws)
+    local = sync.fetch_templates(None)
+    base = snapshot_base(local)
+    add_row(local, Number=3, Title='Mine', Code='mine()', Id='cccccccccccc')
+    ws._values.append(['3', 'Theirs', '', '', 'theirs()', 'dddddddddddd'])
+
+    result = sync.push_templates(None, local, base=base)
+
+    assert result['status'] == 'pushed'
+    assert result['conflicts'] == []
+    rows = {row[1]: row for row in ws.get_all_values()[1:]}
+    assert set(rows) == {'Login', 'Chart', 'Mine', 'Theirs'}
+    assert rows['Theirs'][0] == '3'
+    assert rows['Mine'][0] == '4'
+
+
+def test_ids_assigned_by_two_sessions_match_by_number():
+    ws = sheet([1, 'Login', 'HTML', '', 'l()'], [2, 'Chart', 'JS', '', 'c()'])
+    base = snapshot_base(remote_frame(ws))
+    first = ensure_template_ids(remote_frame(ws))
+    second = ensure_template_ids(remote_frame(ws))
+    second.at[1, 'Code'] = 'c2()'
+    pushed = sheet_values(first)
+
+    result = three_way_merge(base, second, remote_frame(FakeWorksheet(pushed)))
+
+    assert result['conflicts'] == []
+    assert result['df']['Code'].tolist() == ['l()', 'c2()']
+    assert result['df'][ID_COLUMN].tolist() == first[ID_COLUMN].tolist()
@@ -0,0 +1,75 @@
+"""Tests for the shared sync log and transfer estimates."""
+
+import fcntl
+import json
+import os
+import threading
+from datetime import datetime, timedelta, timezone
+
+from template_manager.telemetry import SyncLog, SyncMeter
+
+
+def record(operation='fetch', **fields):
+    meter = SyncMeter(operation, 'sheet')
+    entry = meter.record()
+    entry.update(fields)
+    return entry
+
+
+def test_records_include_appends_from_other_writers(tmp_path):
+    path = str(tmp_path / 'sync.jsonl')
+    reader = SyncLog(path)
+    SyncLog(path).append(record('push'))
+
+    assert [entry['operation'] for entry in reader.records()] == ['push']
+
+
+def test_rotation_keeps_the_previous_generation(tmp_path):
+    path = str(tmp_path / 'sync.jsonl')
+    log = SyncLog(path, max_bytes=2000)
+    for _ in range(40):
+        log.append(record())
+
+    with open(f"{path}.1", encoding='utf-8') as handle:
+        rotated = handle.readlines()
+    with open(path, encoding='utf-8') as handle:
+        current = handle.readlines()
+    assert rotated
+    assert len(log.records()) == len(rotated) + len(current) < 40
+
+
+def test_appends_wait_for_the_writer_lock(tmp_path):
+    path = str(tmp_path / 'sync.jsonl')
+    log = SyncLog(path, max_bytes=1)
+    log.append(record())
+    writer = threading.Thread(target=log.append, args=(record(),))
+
+    with open(f"{path}.lock", 'a') as lock:
+        fcntl.flock(lock, fcntl.LOCK_EX)
+        writer.start()
+        writer.join(0.2)
+        assert writer.is_alive()
+        assert not os.path.exists(f"{path}.1")
+        fcntl.flock(lock, fcntl.LOCK_UN)
+    writer.join(5)
+
+    assert os.path.exists(f"{path}.1")
+    assert len(log.records()) == 2
+
+
+def test_retention_drops_old_records(tmp_path):
+    log = SyncLog(str(tmp_path / 'sync.jsonl'), retention=timedelta(days=1))
+    old = (datetime.now(timezone.utc) - timedelta(days=2)).isoformat(timespec='milliseconds')
+    log.append(record(ts=old))
+    log.append(record())
+
+    assert len(log.records()) == 1
+
+
+def test_transfer_bytes_track_the_json_size():
+    values = [['Number', 'Title', 'Code'], [1, 'Login', 'print("hi")\n'], [2, None, '']]
+    meter = SyncMeter('push', 'sheet')
+    meter.uploaded(values)
+
+    assert abs(meter.bytes_up - len(json.dumps(values))) <= len(json.dumps(values)) * 0.1
+    assert meter.cells_up == 9